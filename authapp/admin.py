@@ -2,6 +2,11 @@ from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from authapp.utils import set_single_group
+from tasks.jobs import background_action
+from tasks.pagination import EstimatedCountPaginator
 
 
 class SingleGroupUserChangeForm(forms.ModelForm):
@@ -21,15 +26,33 @@ class SingleGroupUserChangeForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance and self.instance.pk:
-            groups_qs = self.instance.groups.all()
-            if groups_qs.exists():
-                self.fields["groups"].initial = groups_qs.first()
+            # один запрос вместо exists() + first():
+            self.fields["groups"].initial = self.instance.groups.first()
 
 
 class SingleGroupUserAdmin(UserAdmin):
     form = SingleGroupUserChangeForm
     list_display = ("id", "username", "group_names", "email", "is_active")
     ordering = ("id",)
+    # поиск по началу логина/почты/имени/фамилии - по индексам UPPER(...)
+    # text_pattern_ops (миграции 0007_user_search_indexes, 0009); подстрока в
+    # середине не ищется: такой LIKE индекс не использует. им же пользуются
+    # autocomplete_fields задач (TaskAdmin):
+    search_fields = ("^username", "^email", "^first_name", "^last_name")
+    # фильтр по роли - по индексу auth_user_groups(group_id):
+    list_filter = ("groups", "is_active", "is_staff")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        "make_admin",
+        "make_manager",
+        "make_user",
+        background_action("delete", "Удалить в фоне"),
+    )
+
+    def get_queryset(self, request):
+        # группы всех пользователей страницы - одним запросом:
+        return super().get_queryset(request).prefetch_related("groups")
 
     def group_names(self, obj):
         # отображать группы в таблице админки(m2m полю туда нельзя)
@@ -37,6 +60,7 @@ class SingleGroupUserAdmin(UserAdmin):
 
     group_names.short_description = "Groups"  # имя колонки в таблице
 
+    @transaction.atomic
     def save_model(self, request, obj, form, change):
         """Django хранит ManyToMany в отдельной промежуточной таблице
         (auth_user_groups); чтобы добавить запись в эту таблицу, нужно знать user.id.
@@ -47,7 +71,26 @@ class SingleGroupUserAdmin(UserAdmin):
         obj.save()  # сначала сохраняю пользователя
         group = form.cleaned_data.get("groups")
         if group:
-            obj.groups.set([group])  # устанавливаю одну группу
+            set_single_group([obj.pk], group)  # устанавливаю одну группу
+
+    def set_role(self, request, queryset, role):
+        """Одна роль выбранным пользователям - set-based, без save() на каждого."""
+        group, _ = Group.objects.get_or_create(name=role)
+        with transaction.atomic():
+            set_single_group(queryset.values_list("pk", flat=True), group)
+        self.message_user(request, f'Role "{role}" set for {queryset.count()} users.')
+
+    @admin.action(description="Сделать администраторами")
+    def make_admin(self, request, queryset):
+        self.set_role(request, queryset, "admin")
+
+    @admin.action(description="Сделать менеджерами")
+    def make_manager(self, request, queryset):
+        self.set_role(request, queryset, "manager")
+
+    @admin.action(description="Сделать пользователями")
+    def make_user(self, request, queryset):
+        self.set_role(request, queryset, "user")
 
 
 admin.site.unregister(User)
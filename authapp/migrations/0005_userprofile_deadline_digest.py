@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authapp", "0004_remove_userprofile_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="deadline_digest",
+            field=models.BooleanField(
+                default=False, verbose_name="Дайджест уведомлений о дедлайнах"
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authapp", "0005_userprofile_deadline_digest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "email_type",
+                    models.CharField(max_length=64, verbose_name="Тип письма"),
+                ),
+                (
+                    "context",
+                    models.JSONField(default=dict, verbose_name="Контекст шаблона"),
+                ),
+                (
+                    "recipient",
+                    models.EmailField(max_length=254, verbose_name="Получатель"),
+                ),
+                (
+                    "queue",
+                    models.CharField(
+                        default="default", max_length=32, verbose_name="Очередь celery"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создано"),
+                ),
+                (
+                    "dispatched_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Передано в celery"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Попыток передачи"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, default="", verbose_name="Ошибка"),
+                ),
+            ],
+            options={
+                "verbose_name": "Письмо в outbox",
+                "verbose_name_plural": "Outbox писем",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("dispatched_at__isnull", True)),
+                        fields=["id"],
+                        name="outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
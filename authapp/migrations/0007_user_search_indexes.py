@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# поиск пользователей в админке (^username, ^email) - это
+# UPPER(field::text) LIKE UPPER('...%') на postgres; индексы по тому же выражению.
+FIELDS = ("username", "email")
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "auth_user_{field}_prefix_idx" '
+            f'ON "auth_user" (UPPER({field}::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "auth_user_{field}_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authapp", "0006_outboxemail"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# authapp.tasks.delete_unconfirmed_users: is_active = false AND date_joined < ...;
+# без индекса - seq scan по всей auth_user каждые несколько минут.
+INDEX = "auth_user_inactive_joined_idx"
+
+
+def create_index(apps, schema_editor):
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{INDEX}" ON "auth_user" (is_active, date_joined)'
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authapp", "0007_user_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
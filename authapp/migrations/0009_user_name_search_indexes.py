@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# поиск пользователей в админке по началу имени и фамилии (^first_name, ^last_name) -
+# индексы по тому же выражению, что и в 0007_user_search_indexes.
+FIELDS = ("first_name", "last_name")
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "auth_user_{field}_prefix_idx" '
+            f'ON "auth_user" (UPPER({field}::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for field in FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "auth_user_{field}_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authapp", "0008_user_unconfirmed_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
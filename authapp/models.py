@@ -8,6 +8,10 @@ class UserProfile(models.Model):
     date_of_birth = models.DateField(null=True, blank=True)
     phone = models.CharField(max_length=20, null=True, blank=True)  # valid
     location = models.CharField(max_length=255, null=True, blank=True)
+    # одно письмо-дайджест со всеми задачами вместо письма на каждую задачу:
+    deadline_digest = models.BooleanField(
+        default=False, verbose_name="Дайджест уведомлений о дедлайнах"
+    )
 
     def __str__(self):
         return f"Profile of {self.user.username}"
@@ -15,3 +19,40 @@ class UserProfile(models.Model):
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
+
+
+class OutboxEmail(models.Model):
+    """Письмо в outbox.
+
+    записывается в той же транзакции, что и изменения, ради которых оно отправляется,
+    поэтому при откате транзакции письмо не уйдет; после коммита relay передает письма
+    в celery (authapp.tasks.relay_outbox_emails) - запрос не зависит от брокера.
+    """
+
+    email_type = models.CharField(max_length=64, verbose_name="Тип письма")
+    context = models.JSONField(default=dict, verbose_name="Контекст шаблона")
+    recipient = models.EmailField(verbose_name="Получатель")
+    queue = models.CharField(
+        max_length=32, default="default", verbose_name="Очередь celery"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    dispatched_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Передано в celery"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток передачи")
+    last_error = models.TextField(blank=True, default="", verbose_name="Ошибка")
+
+    class Meta:
+        verbose_name = "Письмо в outbox"
+        verbose_name_plural = "Outbox писем"
+        indexes = [
+            # relay читает только неотправленные - частичный индекс остается маленьким
+            models.Index(
+                fields=["id"],
+                condition=models.Q(dispatched_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.email_type} to {self.recipient}"
@@ -0,0 +1,46 @@
+import time
+
+from django.db import close_old_connections
+
+from authapp.tasks import OUTBOX_RELAY_LEASE, relay_outbox
+from tasks.locks import LeaseLock
+
+
+def run(interval=1):
+    """Relay outbox писем: раз в interval секунд передает новые письма в celery.
+
+    процесс держит аренду relay все время работы (поток продления tasks.locks), а не
+    берет ее на каждой итерации; периодическая задача relay_outbox_emails с той же
+    арендой пропускается, пока процесс работает, и подстраховывает, если он не запущен.
+    """
+    interval = float(interval)
+    lease = LeaseLock(OUTBOX_RELAY_LEASE)
+    held = False
+    print(f"Outbox relay started, interval {interval} s")
+    try:
+        while True:
+            # итерация - как запрос: CONN_MAX_AGE и проверка соединения с бд
+            close_old_connections()
+            if held and lease.lost.is_set():
+                lease.stop_heartbeat()
+                held = False
+                print("Outbox relay lease lost")
+            if not held:
+                # аренду держит запуск по расписанию - ждем его окончания:
+                held = lease.acquire()
+                if held:
+                    lease.start_heartbeat()
+            if held:
+                dispatched = relay_outbox()
+                if dispatched:
+                    print(f"Dispatched {dispatched} emails")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if held:
+            lease.stop_heartbeat()
+            lease.release()
+
+
+# python manage.py runscript run_outbox_relay --script-args 1
@@ -0,0 +1,28 @@
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+def run():
+    """Создает периодическую задачу celery-beat, которая передает письма из outbox в
+    celery, если relay (run_outbox_relay) не запущен."""
+
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=15, period=IntervalSchedule.SECONDS
+    )
+
+    task, created = PeriodicTask.objects.update_or_create(
+        name="Отправка писем из outbox",
+        task="authapp.tasks.relay_outbox_emails",
+        defaults={
+            "interval": schedule,
+            "queue": "high_priority",
+        },
+    )
+
+    if created:
+        print(f"Периодическая задача '{task.name}' создана.")
+
+    else:
+        print(f"Периодическая задача '{task.name}' обновлена.")
+
+
+# python manage.py runscript setup_outbox_relay_periodic_task
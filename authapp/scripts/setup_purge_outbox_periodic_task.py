@@ -0,0 +1,28 @@
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+def run():
+    """Создает периодическую задачу celery-beat, которая раз в сутки удаляет из outbox
+    давно переданные в celery письма."""
+
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=1, period=IntervalSchedule.DAYS
+    )
+
+    task, created = PeriodicTask.objects.update_or_create(
+        name="Очистка outbox писем",
+        task="authapp.tasks.purge_outbox_emails",
+        defaults={
+            "interval": schedule,
+            "queue": "low_priority",
+        },
+    )
+
+    if created:
+        print(f"Периодическая задача '{task.name}' создана.")
+
+    else:
+        print(f"Периодическая задача '{task.name}' обновлена.")
+
+
+# python manage.py runscript setup_purge_outbox_periodic_task
@@ -1,28 +1,41 @@
 import logging
 from datetime import timedelta
+from functools import partial
 
 from celery import shared_task
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
+from authapp.models import OutboxEmail
+from tasks.deletion import chunked_delete
+from tasks.locks import single_instance
+from tasks.mailqueue import EmailThrottled, OutboundEmailQueue, get_task_lane
+from tasks.rendering import get_notification_template
+
 auth_logger = logging.getLogger("auth_tasks")
 cleanup_logger = logging.getLogger("cleanup_tasks")
 
+OUTBOX_RELAY_LEASE = "authapp.tasks.relay_outbox_emails"
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
 def send_email_task(self, email_type, context, recipient):
     """Выполняет задачи с разными приоритетами, на разных воркерах, принимает тип
     письма, по которому выбирает шаблон-html.
 
-    на выполнение задачи дается 3 попытки c интервалом в 5 мин
+    на выполнение задачи дается 3 попытки c интервалом в 5 мин;
+    письмо уходит через очередь с ограничением скорости провайдера, если провайдер
+    ограничивает отправку - повтор через время, нужное на восстановление лимита.
     """
     auth_logger.info("[SEND EMAIL TASK CODE STARTED]")
     try:
-        template_name = f"emails/{email_type}"
-        text_content = render_to_string(f"{template_name}.txt", context)
-        html_content = render_to_string(f"{template_name}.html", context)
+        text_content, html_content = get_notification_template(
+            f"emails/{email_type}"
+        ).render(context)
         subject_map = {
             "register_confirmation": "Подтверждение email",
             "repeat_register_confirmation": "Повторное подтверждение email",
@@ -35,9 +48,19 @@ def send_email_task(self, email_type, context, recipient):
         # print(f'msg.recipients() = {msg.recipients()}')  # кому
         # print(f'msg.body = {msg.body}')  # текстовая часть
         # print(f'msg.alternatives = {msg.alternatives}')  # список с html
-        msg.send()
+        # лимит провайдера и доля очереди celery - в общем для воркеров bucket
+        # (tasks.mailqueue), так что письма разных задач делят скорость по весам:
+        queue = OutboundEmailQueue()
+        queue.put(msg, lane=get_task_lane(self))
+        queue.flush()
         auth_logger.info(f"[SUCCESS] Type: {email_type} | Email: {recipient}")
 
+    except EmailThrottled as e:
+        auth_logger.warning(
+            f"[THROTTLED] Type: {email_type} | Retry after: {e.retry_after:.0f}s"
+        )
+        raise self.retry(exc=e, countdown=max(1, round(e.retry_after)))
+
     except Exception as e:
         auth_logger.exception(f"[FAILURE] Type: {email_type}")
         raise self.retry(exc=e)
@@ -47,13 +70,100 @@ User = get_user_model()
 
 
 @shared_task
+@single_instance("authapp.tasks.delete_unconfirmed_users")
 def delete_unconfirmed_users():
     cleanup_logger.info("[DELETE UNCONFIRMED USERS CODE STARTED")
     cutoff = timezone.now() - timedelta(minutes=5)
     users = User.objects.filter(is_active=False, date_joined__lt=cutoff)
 
-    count = users.count()
-    users.delete()
+    def log_progress(deleted, counts):
+        cleanup_logger.info(f"[PROGRESS] Deleted {counts.get('auth.User', 0)} users")
+
+    # пачками, чтобы не держать блокировки на весь каскад сразу:
+    _, counts = chunked_delete(users, progress=log_progress)
+    count = counts.get("auth.User", 0)
 
     # logger.info(f"Удалено {count} неподтверждённых аккаунтов")
-    cleanup_logger.info(f"[SUCCESS] Deleted {count} unconfirmed users")
+    cleanup_logger.info(f"[SUCCESS] Deleted {count} unconfirmed users | {counts}")
+
+
+def publish_outbox_emails(emails, result):
+    """Передает письма в celery по порядку, до первой ошибки брокера; result -
+    {"dispatched", "error"} для relay_outbox_batch."""
+    dispatched = []
+    for email in emails:
+        try:
+            send_email_task.apply_async(
+                args=[email.email_type, email.context, email.recipient],
+                queue=email.queue,
+            )
+        except Exception as e:
+            result["error"] = e
+            auth_logger.warning(f"[OUTBOX RELAY FAILURE] Email id: {email.id}")
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                attempts=email.attempts + 1, last_error=repr(e)
+            )
+            break
+        dispatched.append(email.pk)
+
+    OutboxEmail.objects.filter(pk__in=dispatched).update(
+        dispatched_at=timezone.now(), attempts=F("attempts") + 1
+    )
+    result["dispatched"] = len(dispatched)
+
+
+def relay_outbox_batch(batch_size):
+    """Передает в celery одну пачку писем из outbox, возвращает (передано, ошибка).
+
+    пачка читается с skip_locked, а в брокер уходит после коммита (on_commit) -
+    блокировки строк не держатся, пока отвечает брокер; одновременно работает один relay
+    (аренда OUTBOX_RELAY_LEASE). если брокер недоступен, письмо остается в outbox до
+    следующего запуска; если relay упадет между передачей и отметкой dispatched_at,
+    письмо уйдет повторно (at-least-once).
+    """
+    result = {"dispatched": 0, "error": None}
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(dispatched_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if emails:
+            transaction.on_commit(partial(publish_outbox_emails, emails, result))
+    return result["dispatched"], result["error"]
+
+
+def relay_outbox(batch_size=None):
+    """Передает в celery все письма из outbox пачками по batch_size; аренду берет
+    вызывающий (relay_outbox_emails или процесс run_outbox_relay)."""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        dispatched, error = relay_outbox_batch(batch_size)
+        total += dispatched
+        if error or dispatched < batch_size:
+            break
+
+    if total:
+        auth_logger.info(f"[OUTBOX RELAY] Dispatched {total} emails")
+    return total
+
+
+@shared_task
+@single_instance(OUTBOX_RELAY_LEASE)
+def relay_outbox_emails(batch_size=None):
+    """Подстраховка relay по расписанию: пропускается, пока работает процесс
+    run_outbox_relay (он держит ту же аренду)."""
+    return relay_outbox(batch_size)
+
+
+@shared_task
+@single_instance("authapp.tasks.purge_outbox_emails")
+def purge_outbox_emails():
+    """Удаляет письма, переданные в celery больше EMAIL_OUTBOX_RETENTION_DAYS дней
+    назад; раз в сутки, не в каждом запуске relay."""
+    cutoff = timezone.now() - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS)
+    _, counts = chunked_delete(OutboxEmail.objects.filter(dispatched_at__lt=cutoff))
+    count = counts.get("authapp.OutboxEmail", 0)
+    cleanup_logger.info(f"[SUCCESS] Purged {count} dispatched outbox emails")
+    return count
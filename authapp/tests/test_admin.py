@@ -1,4 +1,6 @@
 from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -63,3 +65,93 @@ class AdminUserFormTest(APITestCase):
         user_groups = list(self.user.groups.all())
         self.assertEqual(len(user_groups), 1)
         self.assertEqual(user_groups[0], self.group2)
+
+
+class SingleGroupUserAdminChangelistTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass"
+        )
+        self.client.login(username="admin", password="adminpass")
+        self.url = reverse("admin:auth_user_changelist")
+        self.manager = Group.objects.create(name="manager")
+
+    def make_users(self, count):
+        start = User.objects.count()
+        users = User.objects.bulk_create(
+            User(username=f"user{n}") for n in range(start, start + count)
+        )
+        for user in users:
+            user.groups.add(self.manager)
+        return users
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.make_users(2)
+        few = self.count_queries()
+        self.make_users(8)
+
+        self.assertEqual(self.count_queries(), few)
+
+    def test_filter_by_role(self):
+        self.make_users(1)
+        response = self.client.get(self.url, {"groups__id__exact": self.manager.pk})
+
+        self.assertContains(response, "user1")
+        self.assertNotContains(
+            response, reverse("admin:auth_user_change", args=[self.admin_user.pk])
+        )
+
+    def test_search_by_prefix(self):
+        User.objects.create(
+            username="ivan",
+            email="ivan@mail.com",
+            first_name="Ivan",
+            last_name="Sidorov",
+        )
+        User.objects.create(
+            username="petr",
+            email="petr@mail.com",
+            first_name="Petr",
+            last_name="Ivanov",
+        )
+        User.objects.create(
+            username="anna",
+            email="anna@mail.com",
+            first_name="Anna",
+            last_name="Petrova",
+        )
+
+        def search(query):
+            response = self.client.get(self.url, {"q": query})
+            return sorted(user.username for user in response.context["cl"].result_list)
+
+        self.assertEqual(search("ivan"), ["ivan", "petr"])  # логин, почта, фамилия
+        self.assertEqual(search("petr"), ["anna", "petr"])  # логин, имя, фамилия
+        self.assertEqual(search("SIDOR"), ["ivan"])  # без учета регистра
+        self.assertEqual(search("idorov"), [])  # не по подстроке
+        self.assertEqual(search("anna@"), ["anna"])
+
+    def test_bulk_role_action(self):
+        users = self.make_users(3)
+        other = Group.objects.create(name="user")
+        users[0].groups.add(other)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                self.url,
+                {
+                    "action": "make_user",
+                    "_selected_action": [user.pk for user in users],
+                },
+            )
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith('UPDATE "auth_user"')]
+        )
+        for user in users:
+            self.assertEqual(list(user.groups.all()), [other])
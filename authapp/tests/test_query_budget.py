@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.urls import reverse
+
+from authapp.tests.test_views import JwtBaseTestCase
+from tasks_project.testing import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class AuthQueryBudgetTests(QueryBudgetMixin, JwtBaseTestCase):
+    """Число запросов эндпоинтов пользователей, групп и входа не растет с данными."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="some_user", password="pass12345")
+        self.make_authenticated(self.user)
+
+    def grow_users(self, size):
+        """Пользователи, каждый в своей группе."""
+        for n in range(User.objects.count(), size):
+            user = User.objects.create_user(username=f"user {n}")
+            user.groups.add(Group.objects.create(name=f"group {n}"))
+
+    def test_user_list(self):
+        url = reverse("user-list")
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_users)
+
+    def test_user_detail(self):
+        def grow(size):
+            for n in range(self.user.groups.count(), size):
+                self.user.groups.add(Group.objects.create(name=f"own group {n}"))
+
+        url = reverse("user-detail", args=[self.user.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), grow)
+
+    def test_group_list(self):
+        def grow(size):
+            for n in range(Group.objects.count(), size):
+                Group.objects.create(name=f"group {n}")
+
+        url = reverse("group-list")
+        self.assertQueryBudget(lambda: self.client.get(url), grow)
+
+    def test_login(self):
+        def login():
+            self.client.cookies.clear()  # уже залогиненному вход запрещен
+            return self.client.post(
+                reverse("login"), {"username": "some_user", "password": "pass12345"}
+            )
+
+        self.assertQueryBudget(login, self.grow_users)
+
+    def test_refresh_token(self):
+        def grow(size):
+            self.grow_users(size)
+            self.make_authenticated(self.user)  # свежий refresh-токен на каждый замер
+
+        url = reverse("refresh_token")
+        self.assertQueryBudget(lambda: self.client.post(url), grow)
@@ -4,10 +4,21 @@ from unittest.mock import patch
 from celery.exceptions import Retry
 from django.contrib.auth import get_user_model
 from django.core import mail
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 
-from authapp.tasks import delete_unconfirmed_users, send_email_task
+from authapp.models import OutboxEmail
+from authapp.scripts import run_outbox_relay
+from authapp.tasks import (
+    OUTBOX_RELAY_LEASE,
+    delete_unconfirmed_users,
+    purge_outbox_emails,
+    relay_outbox_emails,
+    send_email_task,
+)
+from authapp.utils import enqueue_email
+from tasks.models import JobLease
 
 User = get_user_model()
 
@@ -91,3 +102,114 @@ class TestDeleteUconfirmedUsers(TestCase):
         self.assertIn(self.user1, User.objects.all())
         self.assertIn(self.user2, User.objects.all())
         self.assertNotIn(self.user3, User.objects.all())
+
+
+# TransactionTestCase: письма передаются в брокер после коммита (on_commit)
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+class TestOutboxRelay(TransactionTestCase):
+    def enqueue(self, n, queue="default"):
+        enqueue_email(
+            "register_confirmation",
+            {"username": f"user{n}", "confirmation_link": "link"},
+            f"user{n}@mail.com",
+            queue=queue,
+        )
+
+    def test_relay_sends_emails_in_batches(self):
+        for n in range(5):
+            self.enqueue(n)
+
+        self.assertEqual(relay_outbox_emails(batch_size=2), 5)
+
+        self.assertEqual(
+            [m.to for m in mail.outbox], [[f"user{n}@mail.com"] for n in range(5)]
+        )
+        self.assertFalse(OutboxEmail.objects.filter(dispatched_at__isnull=True))
+        # повторный запуск ничего не отправляет:
+        self.assertEqual(relay_outbox_emails(), 0)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_rolled_back_transaction_sends_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.enqueue(0)
+                raise RuntimeError
+
+        relay_outbox_emails()
+
+        self.assertEqual(len(mail.outbox), 0)
+
+    @patch("authapp.tasks.send_email_task.apply_async")
+    def test_broker_failure_keeps_email_in_outbox(self, mock_apply_async):
+        self.enqueue(0, queue="high_priority")
+        self.enqueue(1)
+        mock_apply_async.side_effect = [None, ConnectionError("broker is down")]
+
+        self.assertEqual(relay_outbox_emails(), 1)
+
+        mock_apply_async.assert_any_call(
+            args=[
+                "register_confirmation",
+                {"username": "user0", "confirmation_link": "link"},
+                "user0@mail.com",
+            ],
+            queue="high_priority",
+        )
+        pending = OutboxEmail.objects.get(dispatched_at__isnull=True)
+        self.assertEqual(pending.recipient, "user1@mail.com")
+        self.assertEqual(pending.attempts, 1)
+        self.assertIn("broker is down", pending.last_error)
+
+        # брокер снова доступен - письмо уходит при следующем запуске:
+        mock_apply_async.side_effect = None
+        self.assertEqual(relay_outbox_emails(), 1)
+        self.assertFalse(OutboxEmail.objects.filter(dispatched_at__isnull=True))
+
+    @patch("authapp.tasks.send_email_task.apply_async")
+    def test_broker_called_after_commit(self, mock_apply_async):
+        self.enqueue(0)
+        in_transaction = []
+        mock_apply_async.side_effect = lambda **kwargs: in_transaction.append(
+            transaction.get_connection().in_atomic_block
+        )
+
+        self.assertEqual(relay_outbox_emails(), 1)
+
+        # блокировки пачки сняты до обращения к брокеру:
+        self.assertEqual(in_transaction, [False])
+
+    def test_relay_process_holds_lease_for_its_lifetime(self):
+        self.enqueue(0)
+        ticks = []
+
+        def sleep(interval):
+            owner = JobLease.objects.get(name=OUTBOX_RELAY_LEASE).owner
+            # запуск по расписанию, пока работает процесс relay:
+            ticks.append((owner, relay_outbox_emails()))
+            if len(ticks) == 3:
+                raise KeyboardInterrupt
+
+        with patch("authapp.scripts.run_outbox_relay.time.sleep", side_effect=sleep):
+            run_outbox_relay.run()
+
+        owners = {owner for owner, _ in ticks}
+        self.assertEqual(len(owners), 1)
+        self.assertNotIn("", owners)
+        self.assertEqual([result for _, result in ticks], [None, None, None])
+        self.assertEqual(len(mail.outbox), 1)
+        lease = JobLease.objects.get(name=OUTBOX_RELAY_LEASE)
+        self.assertEqual((lease.owner, lease.skipped_ticks), ("", 3))
+
+    def test_old_dispatched_emails_purged_separately(self):
+        self.enqueue(0)
+        self.enqueue(1)
+        relay_outbox_emails()
+        OutboxEmail.objects.filter(recipient="user0@mail.com").update(
+            dispatched_at=timezone.now() - timedelta(days=30)
+        )
+
+        relay_outbox_emails()
+        self.assertEqual(OutboxEmail.objects.count(), 2)  # relay не чистит
+
+        self.assertEqual(purge_outbox_emails(), 1)
+        self.assertEqual(OutboxEmail.objects.get().recipient, "user1@mail.com")
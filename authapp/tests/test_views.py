@@ -1,5 +1,4 @@
 import re
-from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
@@ -15,6 +14,8 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
+from authapp.models import OutboxEmail
+from authapp.tasks import relay_outbox_emails
 from authapp.utils import create_verification_link
 
 User = get_user_model()
@@ -46,6 +47,12 @@ class RegisterAPIViewTest(APITestCase):
         user_exists = User.objects.filter(email=self.user_data["email"]).exists()
         self.assertTrue(user_exists)
 
+        # письмо записано в outbox, в celery его передает relay:
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().queue, "high_priority")
+        with self.captureOnCommitCallbacks(execute=True):
+            relay_outbox_emails()
+
         self.assertEqual(len(mail.outbox), 1)  # проверяем, что отправлено 1 письмо
         self.assertIn("Подтверждение email", mail.outbox[0].subject)
         # print(f'mail.outbox[0].body = {mail.outbox[0].body}')
@@ -195,6 +202,10 @@ class RepeatConfirmRegisterAPIViewTest(APITestCase):
             "На ваш email было отправлено письмо-подтверждение",
             response.content.decode(),
         )
+        # брокер в запросе не нужен - письмо ждет relay в outbox:
+        self.assertEqual(
+            OutboxEmail.objects.get().email_type, "repeat_register_confirmation"
+        )
 
     def test_wrong_username(self):
         user_data = {
@@ -574,6 +585,8 @@ class ResetPasswordAPIViewTest(APITestCase):
         response = self.client.post(self.url, user_data)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            relay_outbox_emails()
         # извлекаю uid и token из ссылки письма:
         self.assertEqual(len(mail.outbox), 1)  # проверяю, что отправлено письмо
         self.assertIn("Сброс пароля", mail.outbox[0].subject)
@@ -602,6 +615,8 @@ class ResetPasswordAPIViewTest(APITestCase):
         )
         # проверяю, что письмо отправляется:
         # mock_send_email_task.assert_called_once()
+        with self.captureOnCommitCallbacks(execute=True):
+            relay_outbox_emails()
         self.assertEqual(len(mail.outbox), 1)
         # проверяю содержимое письма:
         self.assertEqual(mail.outbox[0].subject, "Сброс пароля")
@@ -622,8 +637,7 @@ class ResetPasswordAPIViewTest(APITestCase):
         self.assertTrue(uid, "UID отсутствует")
         self.assertTrue(token, "Token отсутствует")
 
-    @patch("authapp.views.send_email_task")
-    def test_reset_password_wrong_email(self, mock_send_mail):
+    def test_reset_password_wrong_email(self):
         user_data = {"email": "wrong_email@example.com"}
 
         response = self.client.post(self.url, user_data)
@@ -634,7 +648,7 @@ class ResetPasswordAPIViewTest(APITestCase):
             response.content.decode(),
         )
         # проверяю что письмо не отправляется:
-        mock_send_mail.assert_not_called()
+        self.assertFalse(OutboxEmail.objects.exists())
 
 
 class ChangePasswordAPIViewTest(APITestCase):
@@ -1,11 +1,13 @@
 import uuid
 from datetime import timedelta
 
+from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.core.mail import send_mail
 from django.urls import reverse
 from django.utils import timezone
 
+from authapp.models import OutboxEmail
 from tasks_project.settings import DOMAIN_NAME
 
 time_email_verification = 10
@@ -56,3 +58,29 @@ def send_verification_email(user, verification_link=None):
         "noreply@yourdomain.com",
         [user.email],
     )
+
+
+def enqueue_email(email_type, context, recipient, queue="default"):
+    """Кладет письмо в outbox вместо send_email_task.apply_async.
+
+    вызывается внутри transaction.atomic вместе с изменениями, ради которых письмо
+    отправляется: письмо уйдет только после коммита, запрос не ждет брокер.
+    """
+    return OutboxEmail.objects.create(
+        email_type=email_type, context=context, recipient=recipient, queue=queue
+    )
+
+
+def set_single_group(user_ids, group):
+    """Делает group единственной группой пользователей user_ids (роль как в апи).
+
+    два запроса на любое число пользователей - вместо save() и groups.set() на
+    каждого; m2m_changed при этом не отправляется.
+    """
+    membership = User.groups.through
+    user_ids = list(user_ids)
+    membership.objects.filter(user_id__in=user_ids).exclude(group=group).delete()
+    membership.objects.bulk_create(
+        [membership(user_id=user_id, group=group) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
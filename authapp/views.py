@@ -4,6 +4,7 @@ from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.tokens import default_token_generator
 from django.core.cache import cache
+from django.db import transaction
 from django.urls.base import reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
@@ -31,14 +32,17 @@ from authapp.serializers import (
     ResetPasswordSerializer,
     UserSerializer,
 )
-from authapp.tasks import send_email_task
-from authapp.utils import create_verification_link, generate_email_verification_token
+from authapp.utils import (
+    create_verification_link,
+    enqueue_email,
+    generate_email_verification_token,
+)
 
 
 class UserViewSet(viewsets.ModelViewSet):
     """API endpoint that allows authapp to be viewed or edited."""
 
-    queryset = User.objects.all().order_by("-date_joined")
+    queryset = User.objects.prefetch_related("groups").order_by("-date_joined")
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]  # AllowAny]
 
@@ -108,33 +112,37 @@ class RegisterAPIView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-
             response_data = {
                 "message": "Спасибо за регистрацию! "
                 "На ваш email было отправлено письмо-подтверждение. "
                 "Пожалуйста, пройдите по ссылке из письма."
             }
 
-            # создаю токен, ссылку, отправляю письмо:
-            token, created_at, lifetime = generate_email_verification_token(user)
+            # юзер и письмо сохраняются вместе: при откате письмо не уйдет
+            with transaction.atomic():
+                user = serializer.save()
 
-            # в режиме отладки вывожу токен с ответом:
-            if settings.DEBUG:
-                response_data["token"] = token
+                # создаю токен, ссылку, отправляю письмо:
+                token, created_at, lifetime = generate_email_verification_token(user)
 
-            confirmation_link = create_verification_link(
-                user, token=token, created_at=created_at, lifetime=lifetime
-            )
-            context = {
-                "username": user.username,
-                "confirmation_link": confirmation_link,
-            }
+                # в режиме отладки вывожу токен с ответом:
+                if settings.DEBUG:
+                    response_data["token"] = token
 
-            send_email_task.apply_async(
-                args=["register_confirmation", context, user.email],
-                queue="high_priority",
-            )
+                confirmation_link = create_verification_link(
+                    user, token=token, created_at=created_at, lifetime=lifetime
+                )
+                context = {
+                    "username": user.username,
+                    "confirmation_link": confirmation_link,
+                }
+
+                enqueue_email(
+                    "register_confirmation",
+                    context,
+                    user.email,
+                    queue="high_priority",
+                )
 
             return Response(response_data, status=status.HTTP_201_CREATED)
 
@@ -395,11 +403,8 @@ class RepeatConfirmRegisterAPIView(APIView):
             "confirmation_link": confirmation_link,
         }
 
-        # отправление письма-подтверждения со ссылкой:
-        send_email_task.apply_async(
-            args=["repeat_register_confirmation", context, user.email],
-            queue="default",
-        )
+        # отправление письма-подтверждения со ссылкой (через outbox):
+        enqueue_email("repeat_register_confirmation", context, user.email)
         return Response(response_data, status=status.HTTP_200_OK)
 
 
@@ -745,10 +750,9 @@ class ResetPasswordAPIView(APIView):
                 "username": user.username,
                 "confirmation_link": confirmation_link,
             }
-            # отправка email:
-            send_email_task.apply_async(
-                args=["reset_password_confirmation", context, email],
-                queue="low_priority",
+            # отправка email (через outbox):
+            enqueue_email(
+                "reset_password_confirmation", context, email, queue="low_priority"
             )
 
         # отправляю одинаковый ответ, чтобы не раскрывать существование email:
@@ -0,0 +1,10 @@
+"""Микробенчмарки горячих участков запроса на python: сериализация задачи, метки
+статуса/приоритета, фильтр по метке, права на задачу и аутентификация по куке.
+
+данные - фиксированный набор в in-memory sqlite (DJANGO_USE_SQLITE=True), замеры с
+прогревом, отчет со статистикой в json; --save сохраняет базовый отчет, --compare
+сравнивает с ним.
+
+DJANGO_ENV_FILE=.env.example python -m benchmarks --save benchmarks/baseline.json
+DJANGO_ENV_FILE=.env.example python -m benchmarks --compare benchmarks/baseline.json
+"""
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tasks_project.settings")
+# фикстуры создаются в in-memory sqlite, рабочая бд не трогается:
+os.environ.setdefault("DJANGO_USE_SQLITE", "True")
+
+
+def main(argv=None):
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+
+    from benchmarks import cases  # noqa: F401 - регистрирует бенчмарки
+    from benchmarks.fixtures import make_fixtures
+    from benchmarks.runner import BENCHMARKS, compare, run_benchmarks
+
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Микробенчмарки сериализаторов, фильтров, прав и аутентификации.",
+    )
+    parser.add_argument(
+        "names",
+        nargs="*",
+        help=f"бенчмарки (по умолчанию все): {', '.join(BENCHMARKS)}",
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="число повторов")
+    parser.add_argument(
+        "--min-time", type=float, default=0.01, help="минимум секунд на повтор"
+    )
+    parser.add_argument("--warmup", type=float, default=0.1, help="секунд прогрева")
+    parser.add_argument("--save", help="сохранить отчет как базовый")
+    parser.add_argument("--compare", help="базовый отчет для сравнения")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="допустимое замедление, доля"
+    )
+    args = parser.parse_args(argv)
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    if settings.DATABASES["default"]["NAME"] != ":memory:":
+        parser.error("benchmarks run on in-memory sqlite only: DJANGO_USE_SQLITE=True")
+
+    call_command("migrate", verbosity=0)
+    results = run_benchmarks(
+        make_fixtures(),
+        args.names,
+        repeat=args.repeat,
+        min_time=args.min_time,
+        warmup=args.warmup,
+    )
+    report = {"python": sys.version.split()[0], "benchmarks": results}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["benchmarks"]
+        report["regressions"] = compare(results, baseline, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.save:
+        with open(args.save, "w") as file:
+            file.write(output)
+    print(output)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+from authapp.authentication import CookieJWTAuthentication
+from benchmarks.fixtures import make_request
+from benchmarks.runner import benchmark
+from tasks.filters import TaskFilter
+from tasks.models import Task
+from tasks.permissions import TaskPermission
+from tasks.serializers import TaskSerializer
+
+
+@benchmark("task_serializer.to_representation")
+def task_to_representation(fixtures):
+    """Одна задача с категорией, тэгами и исполнителями."""
+    serializer = TaskSerializer()
+    return lambda: serializer.to_representation(fixtures.task)
+
+
+@benchmark("task_serializer.page")
+def task_page(fixtures):
+    """Страница списка задач: TaskSerializer(many=True).data."""
+    return lambda: TaskSerializer(fixtures.tasks, many=True).data
+
+
+@benchmark("label_choice_field.to_internal_value")
+def label_to_internal_value(fixtures):
+    """Метка приоритета -> число, последняя в choices."""
+    field = TaskSerializer().fields["priority"]
+    return lambda: field.to_internal_value("high")
+
+
+@benchmark("task_filter.filter_by_field_display")
+def filter_by_field_display(fixtures):
+    """?status_display=done -> queryset.filter(status=3), без выполнения запроса."""
+    queryset = Task.objects.all()
+    filterset = TaskFilter(queryset=queryset)
+    return lambda: filterset.filter_by_status_display(
+        queryset, "status_display", "done"
+    )
+
+
+def has_object_permission(fixtures, role, method, data=None):
+    permission = TaskPermission()
+    request = make_request(method, "/tasks/1/", fixtures.users[role], data)
+    return lambda: permission.has_object_permission(request, None, fixtures.task)
+
+
+@benchmark("task_permission.admin_get")
+def admin_get(fixtures):
+    """Админ читает задачу."""
+    return has_object_permission(fixtures, "admin", "get")
+
+
+@benchmark("task_permission.owner_patch")
+def owner_patch(fixtures):
+    """Менеджер-владелец меняет задачу."""
+    return has_object_permission(fixtures, "manager", "patch", {"title": "new"})
+
+
+@benchmark("task_permission.executor_patch")
+def executor_patch(fixtures):
+    """Исполнитель меняет только статус."""
+    return has_object_permission(fixtures, "user", "patch", {"status": "done"})
+
+
+@benchmark("cookie_jwt_authentication.authenticate")
+def authenticate(fixtures):
+    """Проверка access-токена из куки и загрузка пользователя."""
+    authentication = CookieJWTAuthentication()
+    request = make_request(
+        "get", "/tasks/", cookies={"access_token": fixtures.access_token}
+    )
+    return lambda: authentication.authenticate(request)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tasks.models import Category, Tag, Task, TaskPriority, TaskStatus
+
+User = get_user_model()
+PAGE_SIZE = 20  # PAGE_SIZE списка задач
+
+
+def make_request(method, path, user=None, data=None, cookies=None):
+    """Request drf с пользователем, как его видят права и сериализаторы."""
+    factory = APIRequestFactory()
+    request = getattr(factory, method)(path, data, format="json")
+    request.COOKIES.update(cookies or {})
+    request = Request(request, parsers=[JSONParser()])
+    if user is not None:
+        request.user = user
+    return request
+
+
+def make_fixtures():
+    """Один и тот же набор данных на каждом запуске: по пользователю на роль, страница
+    задач с категорией, тремя тэгами и двумя исполнителями; задачи загружены так же, как
+    в TaskViewSet.get_queryset (без запросов при сериализации)."""
+    users = {}
+    for role in ("admin", "manager", "user"):
+        user = User.objects.create_user(username=f"bench_{role}")
+        user.groups.add(Group.objects.get_or_create(name=role)[0])
+        users[role] = user
+    category = Category.objects.create(name="bench category")
+    tags = [Tag.objects.create(name=f"bench tag {n}") for n in range(3)]
+    deadline = timezone.now() + timedelta(days=7)
+    for n in range(PAGE_SIZE):
+        task = Task.objects.create(
+            title=f"bench task {n}",
+            description="benchmark task " * 10,
+            deadline=deadline,
+            status=TaskStatus.IN_PROGRESS,
+            priority=TaskPriority.HIGH,
+            owner=users["manager"],
+            category=category,
+        )
+        task.executor.set([users["manager"], users["user"]])
+        task.tags.set(tags)
+    tasks = list(
+        Task.objects.select_related("category")
+        .prefetch_related("executor", "tags")
+        .filter(title__startswith="bench task")
+        .order_by("pk")
+    )
+    token = str(AccessToken.for_user(users["user"]))
+    return SimpleNamespace(
+        users=users,
+        tasks=tasks,
+        task=tasks[0],
+        access_token=token,
+    )
@@ -0,0 +1,103 @@
+import gc
+import statistics
+import time
+
+# имя -> (функция замера, описание)
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Регистрирует бенчмарк: make(fixtures) возвращает функцию без аргументов, время
+    вызова которой измеряется."""
+
+    def decorator(make):
+        BENCHMARKS[name] = (make, (make.__doc__ or "").strip())
+        return make
+
+    return decorator
+
+
+def calibrate(func, min_time, timer=time.perf_counter):
+    """Число вызовов в одном повторе, чтобы повтор длился не меньше min_time."""
+    loops = 1
+    while True:
+        started = timer()
+        for _ in range(loops):
+            func()
+        if timer() - started >= min_time:
+            return loops
+        loops *= 2
+
+
+def measure(func, repeat=20, min_time=0.01, warmup=0.1, timer=time.perf_counter):
+    """Время одного вызова func в секундах для каждого из repeat повторов.
+
+    сначала прогрев warmup секунд (кэши, ленивые импорты), сборщик мусора на время
+    замера выключен, как в timeit.
+    """
+    deadline = timer() + warmup
+    while timer() < deadline:
+        func()
+    loops = calibrate(func, min_time, timer)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = []
+        for _ in range(repeat):
+            started = timer()
+            for _ in range(loops):
+                func()
+            times.append((timer() - started) / loops)
+    finally:
+        if enabled:
+            gc.enable()
+    return times, loops
+
+
+def summarize(times, loops):
+    """Статистика повторов в микросекундах на вызов."""
+    values = sorted(time * 1e6 for time in times)
+    q1, _, q3 = statistics.quantiles(values, n=4) if len(values) > 1 else values * 3
+    iqr = q3 - q1
+    median = statistics.median(values)
+    return {
+        "rounds": len(values),
+        "loops": loops,
+        "min_us": round(values[0], 3),
+        "median_us": round(median, 3),
+        "mean_us": round(statistics.fmean(values), 3),
+        "stdev_us": round(statistics.stdev(values), 3) if len(values) > 1 else 0.0,
+        "iqr_us": round(iqr, 3),
+        # повторы за 1.5 IQR - шум (другие процессы, частота cpu):
+        "outliers": sum(
+            1 for value in values if value < q1 - 1.5 * iqr or value > q3 + 1.5 * iqr
+        ),
+        "ops": round(1e6 / median, 1) if median else 0.0,
+    }
+
+
+def run_benchmarks(fixtures, names=None, **options):
+    """Выполняет бенчмарки names (по умолчанию все) на fixtures: {имя: статистика}."""
+    results = {}
+    for name in names or BENCHMARKS:
+        make, _ = BENCHMARKS[name]
+        results[name] = summarize(*measure(make(fixtures), **options))
+    return results
+
+
+def compare(current, baseline, tolerance=0.1):
+    """Регрессии: медиана выросла больше чем на tolerance и больше чем на разброс (IQR)
+    базового замера; возвращает список описаний."""
+    regressions = []
+    for name, before in baseline.items():
+        now = current.get(name)
+        if now is None:
+            continue
+        limit = before["median_us"] + max(
+            before["median_us"] * tolerance, before["iqr_us"]
+        )
+        if now["median_us"] > limit:
+            regressions.append(
+                f"{name}: median {before['median_us']}us -> {now['median_us']}us"
+            )
+    return regressions
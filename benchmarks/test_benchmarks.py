@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase, TestCase
+
+from benchmarks import cases  # noqa: F401 - регистрирует бенчмарки
+from benchmarks.fixtures import make_fixtures
+from benchmarks.runner import BENCHMARKS, calibrate, compare, run_benchmarks, summarize
+
+
+class FakeTimer:
+    """Каждый вызов функции замера сдвигает время на step секунд."""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        return self.now
+
+    def tick(self):
+        self.now += self.step
+
+
+class RunnerTests(SimpleTestCase):
+    def test_calibrate_doubles_loops_until_min_time(self):
+        timer = FakeTimer(0.001)
+        self.assertEqual(calibrate(timer.tick, min_time=0.01, timer=timer), 16)
+
+    def test_summarize(self):
+        times = [n / 1e6 for n in (10, 11, 11, 12, 12, 12, 13, 13, 100)]
+        stats = summarize(times, loops=4)
+        self.assertEqual(stats["rounds"], 9)
+        self.assertEqual(stats["loops"], 4)
+        self.assertEqual(stats["min_us"], 10.0)
+        self.assertEqual(stats["median_us"], 12.0)
+        self.assertEqual(stats["outliers"], 1)
+        self.assertEqual(stats["ops"], round(1e6 / 12, 1))
+
+    def test_compare(self):
+        baseline = {
+            "fast": {"median_us": 10.0, "iqr_us": 0.5},
+            "noisy": {"median_us": 10.0, "iqr_us": 5.0},
+            "removed": {"median_us": 10.0, "iqr_us": 0.5},
+        }
+        current = {
+            "fast": {"median_us": 12.0},
+            "noisy": {"median_us": 14.0},  # в пределах разброса
+        }
+        self.assertEqual(
+            compare(current, baseline, tolerance=0.1),
+            ["fast: median 10.0us -> 12.0us"],
+        )
+
+
+class BenchmarkSmokeTests(TestCase):
+    def test_all_benchmarks_run(self):
+        results = run_benchmarks(make_fixtures(), repeat=2, min_time=0, warmup=0)
+
+        self.assertEqual(set(results), set(BENCHMARKS))
+        for stats in results.values():
+            self.assertGreater(stats["median_us"], 0)
@@ -0,0 +1,33 @@
+# gunicorn читает этот файл из рабочей директории сам; хуки держат соединения с бд
+# корректными при fork воркеров (tasks_project.db)
+
+
+def _django_ready():
+    # без --preload django загружается только в воркерах:
+    from django.apps import apps
+
+    return apps.ready
+
+
+def pre_fork(server, worker):
+    if _django_ready():
+        from django.db import connections
+
+        connections.close_all()  # мастер не передает воркерам открытых соединений
+
+
+def post_fork(server, worker):
+    if _django_ready():
+        from tasks_project.db import drop_inherited_connections
+
+        drop_inherited_connections()
+
+
+def worker_exit(server, worker):
+    if _django_ready():
+        from django.db import connections
+
+        from tasks_project.db import logger, metrics
+
+        logger.info(f"[GUNICORN WORKER EXIT] {metrics.snapshot()}")
+        connections.close_all()
@@ -0,0 +1,7 @@
+"""Нагрузочные тесты http api: сценарии поверх запущенного сервера с данными из
+runscript seed_bulk, отчет с p50/p95/p99, rps и долей ошибок в json и сравнение с
+базовым отчетом.
+
+python -m load_tests --base-url http://localhost:8000 --users 20 --duration 60 \
+    --output load.json --baseline baseline.json
+"""
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+
+from load_tests.runner import run_load
+from load_tests.scenarios import SCENARIOS
+from load_tests.stats import compare
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m load_tests",
+        description="Нагрузочный тест api на запущенном сервере.",
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--username", default=os.getenv("DJANGO_ADMIN_USERNAME"), help="логин админа"
+    )
+    parser.add_argument("--password", default=os.getenv("DJANGO_ADMIN_PASSWORD"))
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"через запятую из: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="секунд")
+    parser.add_argument("--ramp-up", type=float, default=0, help="секунд")
+    parser.add_argument("--think-time", type=float, default=0, help="секунд")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="файл для json-отчета (иначе stdout)")
+    parser.add_argument("--baseline", help="json-отчет прошлого запуска")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="допустимое ухудшение, доля"
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if not args.username or not args.password:
+        parser.error("--username and --password are required")
+
+    report = run_load(
+        args.base_url,
+        {"username": args.username, "password": args.password},
+        scenarios=scenarios,
+        users=args.users,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        seed=args.seed,
+        think_time=args.think_time,
+    )
+    if args.baseline:
+        with open(args.baseline) as file:
+            report["regressions"] = compare(report, json.load(file), args.tolerance)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
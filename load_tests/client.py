@@ -0,0 +1,69 @@
+import http.client
+import json
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+
+class Client:
+    """Http-клиент одного виртуального пользователя: постоянное соединение и свои куки
+    (access_token/refresh_token после логина).
+
+    куки secure хранятся и отправляются вручную - локальный сервер работает по http.
+    каждый запрос записывается в stats под именем name.
+    """
+
+    def __init__(self, base_url, stats, timeout=30):
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+        self.prefix = parts.path.rstrip("/")
+        self.stats = stats
+        self.cookies = {}
+
+    def close(self):
+        self.connection.close()
+
+    def request(self, method, path, name, params=None, data=None, expect=(200,)):
+        """Возвращает (статус, json или None); статус вне expect - ошибка."""
+        url = self.prefix + path
+        if params:
+            url += f"?{urlencode(params, doseq=True)}"
+        headers = {"Accept": "application/json"}
+        body = None
+        if data is not None:
+            body = json.dumps(data)
+            headers["Content-Type"] = "application/json"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, url, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # переподключится при следующем запросе
+            self.stats.record(name, time.perf_counter() - started, ok=False)
+            return None, None
+        self.stats.record(
+            name, time.perf_counter() - started, ok=response.status in expect
+        )
+
+        for header in response.headers.get_all("Set-Cookie") or []:
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        try:
+            return response.status, json.loads(payload) if payload else None
+        except ValueError:
+            return response.status, None
+
+    def get(self, path, name, params=None):
+        return self.request("GET", path, name, params=params)
+
+    def post(self, path, name, data, expect=(200, 201)):
+        return self.request("POST", path, name, data=data, expect=expect)
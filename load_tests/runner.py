@@ -0,0 +1,64 @@
+import random
+import threading
+import time
+
+from load_tests.scenarios import SCENARIOS, Session
+from load_tests.stats import Stats
+
+
+def run_load(
+    base_url,
+    credentials,
+    scenarios=None,
+    users=10,
+    duration=30,
+    ramp_up=0,
+    seed=None,
+    think_time=0,
+):
+    """Запускает users виртуальных пользователей на duration секунд; каждый логинится и
+    выполняет сценарии в пропорции их весов.
+
+    возвращает отчет Stats.report() с параметрами запуска в meta.
+    """
+    names = list(scenarios or SCENARIOS)
+    functions = [SCENARIOS[name][0] for name in names]
+    weights = [SCENARIOS[name][1] for name in names]
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    seeds = random.Random(seed)
+
+    def virtual_user(number, rng):
+        time.sleep(ramp_up * number / max(users, 1))  # пользователи приходят плавно
+        session = Session(base_url, stats, credentials, rng)
+        try:
+            if not session.login():
+                return
+            while time.monotonic() < deadline:
+                rng.choices(functions, weights)[0](session)
+                if think_time:
+                    time.sleep(rng.uniform(0, think_time))
+        finally:
+            session.client.close()
+
+    threads = [
+        threading.Thread(
+            target=virtual_user, args=(n, random.Random(seeds.random())), daemon=True
+        )
+        for n in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finish()
+
+    report = stats.report()
+    report["meta"] = {
+        "base_url": base_url,
+        "users": users,
+        "duration_s": duration,
+        "scenarios": names,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    return report
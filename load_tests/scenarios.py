@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+
+from load_tests.client import Client
+
+WORDS = ("api", "bug", "fix", "review", "release", "report", "test", "query")
+STATUSES = ("to_do", "in_progress", "done")
+PRIORITIES = ("low", "medium", "high")
+ORDERINGS = ("urgency", "-urgency", "priority", "deadline", "-comments_count")
+
+
+class Session:
+    """Состояние виртуального пользователя между сценариями: клиент с куками и увиденные
+    в ответах задачи, исполнители, тэги и категории."""
+
+    def __init__(self, base_url, stats, credentials, rng):
+        self.base_url = base_url
+        self.stats = stats
+        self.credentials = credentials
+        self.random = rng
+        self.client = Client(base_url, stats)
+        self.task_ids = []
+        self.own_task_ids = []  # комментировать можно только свои задачи
+        self.executors = set()
+        self.tags = set()
+        self.categories = set()
+        self.tasks_count = 0
+
+    def login(self, client=None):
+        status, _ = (client or self.client).post(
+            "/api/auth/login/", "POST /api/auth/login/", self.credentials, expect=(200,)
+        )
+        return status == 200
+
+    def remember(self, tasks):
+        for task in tasks:
+            self.task_ids.append(task["id"])
+            self.executors.update(task.get("executor") or [])
+            self.tags.update(task.get("tags") or [])
+            if task.get("category"):
+                self.categories.add(task["category"])
+        del self.task_ids[:-500]
+
+
+def list_tasks(session, params=None, unfiltered=False):
+    """unfiltered - в ответе общее число задач, от него считается offset."""
+    _, data = session.client.get("/tasks/", "GET /tasks/", params)
+    if data:
+        session.remember(data.get("results", []))
+        if unfiltered:
+            session.tasks_count = data.get("count", 0)
+
+
+def browse(session):
+    """Список задач с фильтрами, сортировкой и пагинацией, затем одна задача."""
+    rng = session.random
+    params = {
+        "ordering": rng.choice(ORDERINGS),
+        "offset": rng.randrange(0, max(session.tasks_count - 20, 0) + 1, 20),
+    }
+    filters = {}
+    # первый заход - список без фильтров, как при открытии страницы:
+    if session.task_ids:
+        if rng.random() < 0.5:
+            filters["status_display"] = rng.choice(STATUSES)
+        if rng.random() < 0.3:
+            filters["priority_display"] = rng.choice(PRIORITIES)
+        if session.tags and rng.random() < 0.3:
+            filters["tags"] = rng.choice(sorted(session.tags))
+    if rng.random() < 0.2:
+        params["facets"] = "status,priority,category,tag"
+    list_tasks(session, {**params, **filters}, unfiltered=not filters)
+    if session.task_ids:
+        task_id = rng.choice(session.task_ids)
+        session.client.get(f"/tasks/{task_id}/", "GET /tasks/{id}/")
+
+
+def search(session):
+    """Полнотекстовый фильтр search и подсказки имен тэгов/категорий."""
+    rng = session.random
+    word = rng.choice(WORDS)
+    _, data = session.client.get("/tasks/", "GET /tasks/?search", {"search": word})
+    if data:
+        session.remember(data.get("results", []))
+    session.client.get("/autocomplete/", "GET /autocomplete/", {"q": word[:2]})
+
+
+def create_task(session):
+    rng = session.random
+    deadline = datetime.now(timezone.utc) + timedelta(days=rng.randint(1, 30))
+    data = {
+        "title": f"load {rng.choice(WORDS)} {rng.randrange(10**6)}",
+        "description": " ".join(rng.choices(WORDS, k=8)),
+        "deadline": deadline.isoformat(),
+        "executor": [],
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(PRIORITIES),
+        "category": rng.choice(sorted(session.categories) or ["Load"]),
+        "tags": rng.sample(sorted(session.tags), min(2, len(session.tags))),
+    }
+    if not session.executors:
+        list_tasks(session, unfiltered=True)  # исполнителей берем из увиденных задач
+        if not session.executors:
+            return
+    data["executor"] = [rng.choice(sorted(session.executors))]
+    status, task = session.client.post("/tasks/", "POST /tasks/", data, expect=(201,))
+    if status == 201 and task:
+        session.own_task_ids.append(task["id"])
+
+
+def comment(session):
+    """Лента комментариев и новый комментарий к своей задаче."""
+    if not session.own_task_ids:
+        create_task(session)
+        if not session.own_task_ids:
+            return
+    task_id = session.random.choice(session.own_task_ids)
+    session.client.get(
+        f"/tasks/{task_id}/comments/timeline/", "GET /tasks/{id}/comments/timeline/"
+    )
+    session.client.post(
+        f"/tasks/{task_id}/comments/",
+        "POST /tasks/{id}/comments/",
+        {"text": " ".join(session.random.choices(WORDS, k=6))},
+        expect=(201,),
+    )
+
+
+def login_storm(session):
+    """Логин и обновление токена новым клиентом - как поток входящих
+    пользователей."""
+    client = Client(session.base_url, session.stats)
+    try:
+        if session.login(client):
+            client.post(
+                "/api/auth/refresh-token/",
+                "POST /api/auth/refresh-token/",
+                None,
+                expect=(200,),
+            )
+    finally:
+        client.close()
+
+
+# сценарий -> вес по умолчанию в смеси
+SCENARIOS = {
+    "browse": (browse, 50),
+    "search": (search, 20),
+    "create_task": (create_task, 10),
+    "comment": (comment, 15),
+    "login_storm": (login_storm, 5),
+}
@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль методом ближайшего ранга по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+class Stats:
+    """Латентность и ошибки по именам запросов; пишется из всех потоков."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.latencies = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+        self.started_at = clock()
+        self.finished_at = None
+
+    def record(self, name, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            self.errors[name] = self.errors.get(name, 0) + (not ok)
+
+    def finish(self):
+        self.finished_at = self.clock()
+
+    @staticmethod
+    def summarize(latencies, errors, elapsed):
+        values = sorted(latencies)
+        count = len(values)
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+
+    def report(self):
+        elapsed = (self.finished_at or self.clock()) - self.started_at
+        with self.lock:
+            endpoints = {
+                name: self.summarize(values, self.errors[name], elapsed)
+                for name, values in sorted(self.latencies.items())
+            }
+            total = self.summarize(
+                [value for values in self.latencies.values() for value in values],
+                sum(self.errors.values()),
+                elapsed,
+            )
+        return {"elapsed_s": round(elapsed, 2), "total": total, "endpoints": endpoints}
+
+
+def compare(current, baseline, tolerance=0.2, error_margin=0.01):
+    """Регрессии текущего отчета относительно базового: p95/p99 выросли больше чем на
+    tolerance, rps упал больше чем на tolerance, доля ошибок выросла больше чем на
+    error_margin; возвращает список описаний."""
+    regressions = []
+    sections = {"total": (current["total"], baseline["total"])}
+    for name, before in baseline["endpoints"].items():
+        if name in current["endpoints"]:
+            sections[name] = (current["endpoints"][name], before)
+    for name, (now, before) in sections.items():
+        for metric in ("p95_ms", "p99_ms"):
+            if before[metric] and now[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {before[metric]} -> {now[metric]}"
+                )
+        if before["rps"] and now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {now['rps']}")
+        if now["error_rate"] > before["error_rate"] + error_margin:
+            regressions.append(
+                f"{name}: error_rate {before['error_rate']} -> {now['error_rate']}"
+            )
+    return regressions
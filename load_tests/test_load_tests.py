@@ -0,0 +1,123 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from load_tests.runner import run_load
+from load_tests.scenarios import SCENARIOS, Session
+from load_tests.stats import Stats, compare, percentile
+from tasks.factories import TaskFactory
+from tasks.resolvers import category_resolver, tag_resolver
+
+User = get_user_model()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StatsTests(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_report(self):
+        clock = FakeClock()
+        stats = Stats(clock)
+        for ms in range(1, 11):
+            stats.record("GET /tasks/", ms / 1000, ok=ms != 10)
+        stats.record("POST /tasks/", 0.05, ok=True)
+        clock.now = 2.0
+        stats.finish()
+
+        report = stats.report()
+        self.assertEqual(report["elapsed_s"], 2.0)
+        self.assertEqual(report["total"]["requests"], 11)
+        tasks = report["endpoints"]["GET /tasks/"]
+        self.assertEqual(tasks["errors"], 1)
+        self.assertEqual(tasks["error_rate"], 0.1)
+        self.assertEqual(tasks["rps"], 5.0)
+        self.assertEqual(tasks["p50_ms"], 5.0)
+        self.assertEqual(tasks["p99_ms"], 10.0)
+
+
+class CompareTests(SimpleTestCase):
+    def report(self, p95=10.0, rps=100.0, error_rate=0.0):
+        section = {
+            "p95_ms": p95,
+            "p99_ms": p95,
+            "rps": rps,
+            "error_rate": error_rate,
+        }
+        return {"total": section, "endpoints": {"GET /tasks/": dict(section)}}
+
+    def test_no_regressions_within_tolerance(self):
+        self.assertEqual(compare(self.report(p95=11.0, rps=90.0), self.report()), [])
+
+    def test_flags_latency_throughput_and_errors(self):
+        current = self.report(p95=20.0, rps=50.0, error_rate=0.05)
+        regressions = compare(current, self.report())
+        self.assertIn("GET /tasks/: p95_ms 10.0 -> 20.0", regressions)
+        self.assertIn("total: rps 100.0 -> 50.0", regressions)
+        self.assertIn("total: error_rate 0.0 -> 0.05", regressions)
+
+    def test_new_endpoints_are_not_compared(self):
+        current = self.report()
+        current["endpoints"]["GET /autocomplete/"] = dict(current["total"], p95_ms=99)
+        self.assertEqual(compare(current, self.report()), [])
+
+
+class LoadSmokeTests(LiveServerTestCase):
+    """Короткий прогон всех сценариев против живого сервера."""
+
+    def setUp(self):
+        # таблицы очищаются между тестами, кэши id имен процесса - нет:
+        tag_resolver.clear()
+        category_resolver.clear()
+        self.admin = User.objects.create_user(username="admin", password="pass12345")
+        self.admin.groups.add(Group.objects.get_or_create(name="admin")[0])
+        TaskFactory.create_batch(3, owner=self.admin, executor=[self.admin])
+
+    def test_scenarios_run_without_errors(self):
+        report = run_load(
+            self.live_server_url,
+            {"username": "admin", "password": "pass12345"},
+            users=1,
+            duration=1,
+            seed=1,
+        )
+        self.assertGreater(report["total"]["requests"], 0)
+        self.assertEqual(report["total"]["errors"], 0, report["endpoints"])
+        self.assertIn("GET /tasks/", report["endpoints"])
+
+    def test_each_scenario(self):
+        stats = Stats()
+        credentials = {"username": "admin", "password": "pass12345"}
+        session = Session(self.live_server_url, stats, credentials, random.Random(1))
+        self.assertTrue(session.login())
+        for name, (scenario, _) in SCENARIOS.items():
+            with self.subTest(name):
+                scenario(session)
+        session.client.close()
+
+        endpoints = stats.report()["endpoints"]
+        for name in (
+            "GET /tasks/{id}/",
+            "POST /tasks/",
+            "GET /tasks/{id}/comments/timeline/",
+            "POST /tasks/{id}/comments/",
+            "POST /api/auth/refresh-token/",
+        ):
+            self.assertIn(name, endpoints)
+        self.assertEqual(
+            {name: s["errors"] for name, s in endpoints.items() if s["errors"]}, {}
+        )
@@ -1,29 +1,72 @@
 import logging
+import time
 
 logger = logging.getLogger("data_fixtures")
 
 
-def run():
-    from django.contrib.auth.models import Group, User
+def log_progress(deleted, counts):
+    logger.info(f"Deleted {deleted} rows: {counts}")
 
-    from tasks.models import Category, Comment, Task
 
-    logger.info("Removing comments...")
-    Comment.objects.all().delete()
+def report(step, started):
+    message = f"{step}: {time.monotonic() - started:.2f}s"
+    logger.info(message)
+    print(message)
+
 
-    logger.info("Removing tasks...")
-    Task.objects.all().delete()
+def run(*args):
+    """Удаляет все данные проекта.
 
-    logger.info("Removing categories...")
-    Category.objects.all().delete()
+    по умолчанию - пачками через ORM без загрузки объектов (tasks.deletion):
+    python manage.py runscript clear_all --script-args 5000
+    fast - TRUNCATE таблиц проекта, keep-admin - сохранить суперпользователей,
+    drop-outbox - удалить и не отправленные еще письма outbox:
+    python manage.py runscript clear_all --script-args fast keep-admin
+    """
+    from django.contrib.auth.models import Group, User
+
+    from tasks.autocomplete import index
+    from tasks.deletion import ChunkedDeleter, truncate_project_data
+    from tasks.models import Category, Comment, Task
+    from tasks.resolvers import bump_generation
 
-    logger.info("Removing users...")
-    User.objects.all().delete()
+    batch_size = next((int(arg) for arg in args if arg.isdigit()), None)
+    started = time.monotonic()
 
-    # logger.info("Removing users, except superuser...")
-    # User.objects.exclude(is_superuser=True).delete()
+    if "fast" in args:
+        logger.info("Truncating project tables...")
+        tables, kept = truncate_project_data(
+            keep_superusers="keep-admin" in args,
+            drop_pending_emails="drop-outbox" in args,
+        )
+        logger.info(f"Truncated {len(tables)} tables, kept {kept} superusers")
+        report("Truncate", started)
+    else:
+        deleter = ChunkedDeleter(batch_size=batch_size, progress=log_progress)
+        steps = [
+            ("comments", Comment.objects.all()),
+            ("tasks", Task.objects.all()),
+            ("categories", Category.objects.all()),
+            (
+                "users",
+                (
+                    User.objects.exclude(is_superuser=True)
+                    if "keep-admin" in args
+                    else User.objects.all()
+                ),
+            ),
+            ("groups", Group.objects.all()),
+        ]
+        for name, queryset in steps:
+            if name == "groups" and "keep-admin" in args:
+                continue  # группы суперпользователей нужны
+            step_started = time.monotonic()
+            logger.info(f"Removing {name}...")
+            deleter.delete(queryset)
+            report(f"Removing {name}", step_started)
 
-    logger.info("Removing groups...")
-    Group.objects.all().delete()
+    # удаление шло в обход сигналов - сбрасываю кэши имен тэгов и категорий:
+    bump_generation()
+    index.clear()
 
-    logger.info("Data successfully cleaned!")
+    report("Data successfully cleaned", started)
@@ -7,7 +7,7 @@ logger = logging.getLogger("data_fixtures")
 
 def run():
     print("Cleaning old data...")
-    call_command("runscript", "clear_all")
+    call_command("runscript", "clear_all", "--script-args", "fast")
 
     print("Creation of groups...")
     call_command("runscript", "populate_groups")
@@ -20,5 +20,7 @@ def run():
 
     print("Creation of tasks...")
     call_command("runscript", "populate_comments")
+    # фабрики создают комментарии в обход api - пересчитываю счетчики задач:
+    call_command("runscript", "reconcile_comment_counters")
 
     print("The data is successfully filled!")
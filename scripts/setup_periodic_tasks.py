@@ -1,9 +1,23 @@
-from authapp.scripts import setup_delete_unconfirmed_users_periodic_task
-from tasks.scripts import setup_deadline_notification_periodic_task
+from authapp.scripts import (
+    setup_delete_unconfirmed_users_periodic_task,
+    setup_outbox_relay_periodic_task,
+    setup_purge_outbox_periodic_task,
+)
+from tasks.scripts import (
+    setup_archive_tasks_periodic_task,
+    setup_deadline_notification_periodic_task,
+    setup_partitions_periodic_task,
+    setup_stale_admin_jobs_periodic_task,
+)
 
 
 def run():
     """Скрипт для запуска всех периодических задач проекта."""
     setup_deadline_notification_periodic_task.run()
+    setup_archive_tasks_periodic_task.run()
+    setup_partitions_periodic_task.run()
+    setup_stale_admin_jobs_periodic_task.run()
     setup_delete_unconfirmed_users_periodic_task.run()
+    setup_outbox_relay_periodic_task.run()
+    setup_purge_outbox_periodic_task.run()
     print("Все периодические задачи зарегистрированы.")
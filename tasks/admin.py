@@ -1,11 +1,72 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.db import transaction
 
-from tasks.models import Category, Comment, Tag, Task
+from tasks.counters import comment_added, comments_removed
+from tasks.jobs import background_action, cancel_job
+from tasks.models import (
+    AdminJob,
+    AdminJobStatus,
+    ArchivedComment,
+    ArchivedTask,
+    Category,
+    Comment,
+    JobLease,
+    Tag,
+    Task,
+    TaskStatus,
+)
+from tasks.pagination import EstimatedCountPaginator
 
-# Register your models here.
+# поиск по началу имени - по индексу UPPER(name) text_pattern_ops
+# (миграция 0015_autocomplete_indexes); нужен autocomplete_fields в TaskAdmin.
 
-admin.site.register(Category)
-admin.site.register(Tag)
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    search_fields = ("^name",)
+    ordering = ("name",)
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    search_fields = ("^name",)
+    ordering = ("name",)
+
+
+class TaskActionForm(ActionForm):
+    """Параметры фоновых действий - рядом со списком действий."""
+
+    owner = forms.CharField(required=False, label="Новый создатель (логин)")
+    status = forms.TypedChoiceField(
+        choices=[("", "---"), *TaskStatus.choices],
+        coerce=int,
+        empty_value=None,
+        required=False,
+        label="Новый статус",
+    )
+
+
+def get_owner_param(request):
+    username = request.POST.get("owner", "").strip()
+    owner_id = (
+        get_user_model()
+        .objects.filter(username=username)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if owner_id is None:
+        raise ValueError(f'User "{username}" not found.')
+    return {"owner_id": owner_id}
+
+
+def get_status_param(request):
+    try:
+        return {"status": int(request.POST.get("status", ""))}
+    except ValueError:
+        raise ValueError("Choose a status.") from None
 
 
 @admin.register(Task)
@@ -19,11 +80,39 @@ class TaskAdmin(admin.ModelAdmin):
         "status",
         "deadline",
         "notified",
+        "comments_count",
+        "last_activity_at",
     )
+    # фильтры по индексированным полям (task_status_idx, task_priority_idx,
+    # task_deadline_idx):
+    list_filter = ("status", "priority", "deadline")
     ordering = ("id",)
+    # поиск вместо выпадающих списков со всеми пользователями/тэгами:
+    autocomplete_fields = ("owner", "executor", "category", "tags")
+    # большие выборки - пачками в celery (tasks.jobs), а не в http-запросе:
+    action_form = TaskActionForm
+    actions = (
+        background_action("delete", "Удалить в фоне"),
+        background_action(
+            "reassign_owner", "Сменить создателя в фоне", get_owner_param
+        ),
+        background_action("change_status", "Сменить статус в фоне", get_status_param),
+    )
+    # без точного COUNT(*) на больших таблицах:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # исполнители, создатели и их группы - по запросу на страницу, а не на строку:
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("category", "owner")
+            .prefetch_related("executor", "owner__groups")
+        )
 
     def get_owner_id(self, obj):
-        return obj.owner.id
+        return obj.owner_id
 
     get_owner_id.short_description = "Создатель"
 
@@ -42,3 +131,108 @@ class TaskAdmin(admin.ModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "created_at", "task", "author")
     ordering = ("id",)
+    actions = (background_action("delete", "Удалить в фоне"),)
+
+    # счетчики комментариев задачи (tasks.counters):
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old_task_id = (
+            Comment.objects.filter(pk=obj.pk).values_list("task_id", flat=True).first()
+            if change
+            else None
+        )
+        super().save_model(request, obj, form, change)
+        if not change:
+            comment_added(obj)
+        elif old_task_id != obj.task_id:  # комментарий перенесен в другую задачу
+            comments_removed([old_task_id])
+            comment_added(obj)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        comments_removed([obj.task_id])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        task_ids = list(queryset.values_list("task_id", flat=True))
+        super().delete_queryset(request, queryset)
+        comments_removed(task_ids)
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "owner", "status", "deadline", "archived_at")
+    ordering = ("id",)
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "task", "author")
+    ordering = ("id",)
+
+
+@admin.register(JobLease)
+class JobLeaseAdmin(admin.ModelAdmin):
+    # skipped_ticks - метрика пропущенных из-за перекрытия запусков
+    list_display = (
+        "name",
+        "owner",
+        "expires_at",
+        "renewed_at",
+        "skipped_ticks",
+        "last_skipped_at",
+        "takeovers",
+    )
+    readonly_fields = list_display
+    ordering = ("name",)
+
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "action",
+        "model",
+        "status",
+        "progress",
+        "created_by",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "action")
+    exclude = ("object_ids",)  # может быть очень длинным
+    readonly_fields = (
+        "action",
+        "model",
+        "params",
+        "status",
+        "progress",
+        "total",
+        "processed",
+        "cancel_requested",
+        "error",
+        "created_by",
+        "created_at",
+        "started_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+    actions = ("cancel",)
+
+    def has_add_permission(self, request):
+        return False  # задания создаются действиями в списках объектов
+
+    @admin.display(description="Прогресс")
+    def progress(self, obj):
+        percent = obj.processed * 100 // obj.total if obj.total else 100
+        return f"{obj.processed}/{obj.total} ({percent}%)"
+
+    @admin.action(description="Отменить")
+    def cancel(self, request, queryset):
+        jobs = queryset.filter(
+            status__in=[AdminJobStatus.PENDING, AdminJobStatus.RUNNING]
+        )
+        for job in jobs:
+            cancel_job(job)
+        self.message_user(request, f"Cancellation requested for {len(jobs)} jobs.")
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "tasks"
+
+    def ready(self):
+        # метрики соединений с бд процесса:
+        import tasks_project.db  # noqa: F401
+
+        # сброс кэшей имен тэгов и категорий при переименовании/удалении:
+        from tasks import signals  # noqa: F401
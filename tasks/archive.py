@@ -0,0 +1,105 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.deletion import ChunkedDeleter
+from tasks.models import (
+    ArchivedComment,
+    ArchivedTask,
+    Comment,
+    Task,
+    TaskStatus,
+)
+
+TASK_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "status",
+    "deadline",
+    "priority",
+    "owner_id",
+    "category_id",
+    "notified",
+    "comments_count",
+    "last_activity_at",
+)
+COMMENT_FIELDS = ("id", "task_id", "author_id", "text", "created_at")
+
+
+def get_archivable_tasks(older_than_days=None):
+    """Выполненные задачи, дедлайн которых прошел больше older_than_days дней назад.
+
+    у задачи нет времени завершения, поэтому возраст считается по дедлайну.
+    """
+    if older_than_days is None:
+        older_than_days = settings.TASK_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Task.objects.filter(status=TaskStatus.DONE, deadline__lt=cutoff)
+
+
+def archive_batch(pks):
+    """Копирует задачи с комментариями, исполнителями и тэгами в архив и удаляет
+    исходные строки - в одной транзакции, возвращает количество задач."""
+    with transaction.atomic():
+        # блокирую задачи, чтобы их не изменили между копированием и удалением:
+        tasks = list(
+            Task.objects.select_for_update()
+            .filter(pk__in=pks, status=TaskStatus.DONE)
+            .values(*TASK_FIELDS)
+        )
+        pks = [task["id"] for task in tasks]
+        ArchivedTask.objects.bulk_create(ArchivedTask(**task) for task in tasks)
+
+        executors = Task.executor.through.objects.filter(task_id__in=pks)
+        ArchivedTask.executor.through.objects.bulk_create(
+            ArchivedTask.executor.through(archivedtask_id=task_id, user_id=user_id)
+            for task_id, user_id in executors.values_list("task_id", "user_id")
+        )
+        tags = Task.tags.through.objects.filter(task_id__in=pks)
+        ArchivedTask.tags.through.objects.bulk_create(
+            ArchivedTask.tags.through(archivedtask_id=task_id, tag_id=tag_id)
+            for task_id, tag_id in tags.values_list("task_id", "tag_id")
+        )
+        comments = Comment.objects.filter(task_id__in=pks).values(*COMMENT_FIELDS)
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment) for comment in comments
+        )
+
+        ChunkedDeleter(batch_size=len(pks) or 1, sleep=0).delete(
+            Task.objects.filter(pk__in=pks)
+        )
+    return len(pks)
+
+
+def archive_done_tasks(
+    older_than_days=None, batch_size=None, sleep=None, progress=None
+):
+    """Переносит выполненные задачи в архив пачками, возвращает количество задач.
+
+    progress(archived) - вызывается после каждой пачки.
+    """
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    sleep = settings.DELETION_BATCH_SLEEP if sleep is None else sleep
+    queryset = get_archivable_tasks(older_than_days).order_by("pk")
+
+    archived = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        archived += archive_batch(pks)
+        last_pk = pks[-1]
+        if progress:
+            progress(archived)
+        if len(pks) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return archived
@@ -0,0 +1,343 @@
+import heapq
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from tasks.models import Category, Tag
+
+logger = logging.getLogger("autocomplete")
+
+MODELS = {"tag": Tag, "category": Category}
+END = ""  # ключ узла trie, под которым лежат слова, заканчивающиеся в узле
+GRAM = 3  # длина n-граммы индекса подстрок
+
+
+@dataclass
+class Entry:
+    kind: str
+    id: int
+    name: str
+    popularity: int = 0
+
+    def as_dict(self):
+        return {
+            "type": self.kind,
+            "id": self.id,
+            "name": self.name,
+            "popularity": self.popularity,
+        }
+
+
+class Trie:
+    """Префиксное дерево: слово -> множество ключей (kind, id)."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, word, key):
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node.setdefault(END, set()).add(key)
+
+    def remove(self, word, key):
+        path = [self.root]
+        for char in word:
+            if char not in path[-1]:
+                return
+            path.append(path[-1][char])
+        keys = path[-1].get(END)
+        if not keys or key not in keys:
+            return
+        keys.discard(key)
+        if not keys:
+            del path[-1][END]
+        # убираю опустевшие узлы снизу вверх:
+        for depth in range(len(word), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][word[depth - 1]]
+
+    def keys_with_prefix(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char == END:
+                    yield from child
+                else:
+                    stack.append(child)
+
+
+class NgramIndex:
+    """Индекс подстрок: n-грамма (длиной до GRAM символов) -> множество ключей.
+
+    подстрока до GRAM символов ищется одним словарем, длиннее - пересечением множеств
+    ее n-грамм с проверкой кандидатов; без перебора всех слов.
+    """
+
+    def __init__(self):
+        self.grams = {}
+
+    @staticmethod
+    def split(word):
+        return {
+            word[start : start + size]
+            for size in range(1, GRAM + 1)
+            for start in range(len(word) - size + 1)
+        }
+
+    def insert(self, word, key):
+        for gram in self.split(word):
+            self.grams.setdefault(gram, set()).add(key)
+
+    def remove(self, word, key):
+        for gram in self.split(word):
+            keys = self.grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.grams[gram]
+
+    def candidates(self, query):
+        """Ключи, у слов которых могут быть все n-граммы query (проверяет
+        вызывающий)."""
+        if len(query) <= GRAM:
+            return self.grams.get(query, set())
+        sets = sorted(
+            (
+                self.grams.get(query[start : start + GRAM], set())
+                for start in range(len(query) - GRAM + 1)
+            ),
+            key=len,
+        )
+        return set.intersection(*sets)
+
+
+def run_in_thread(target):
+    def run():
+        try:
+            target()
+        finally:
+            # у потока свое соединение с бд - закрываю его сам:
+            connection.close()
+
+    threading.Thread(target=run, name="autocomplete-reload", daemon=True).start()
+
+
+class AutocompleteIndex:
+    """Индекс подсказок по именам тэгов и категорий в памяти процесса.
+
+    загружается из бд при первом запросе и раз в AUTOCOMPLETE_REFRESH_SECONDS, между
+    перезагрузками обновляется сигналами (tasks.signals): новые и переименованные имена,
+    удаления и использование тэгов/категорий в задачах. префиксы ищутся по trie,
+    подстроки - по n-граммам. устаревший индекс перезагружается в фоне
+    (run_in_background), запросы тем временем обслуживаются старыми данными.
+    """
+
+    def __init__(
+        self, refresh_seconds=None, clock=time.monotonic, run_in_background=None
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.run_in_background = run_in_background or run_in_thread
+        self.entries = {}
+        self.trie = Trie()
+        self.ngrams = NgramIndex()
+        self.loaded_at = None
+        self.lock = threading.RLock()
+        # изменения, пришедшие сигналами во время перезагрузки, - повторяются на
+        # новых данных (перезагрузка могла прочитать бд до них):
+        self.replay = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def load(self):
+        with self.lock:
+            if self.replay is None:
+                self.replay = []
+        try:
+            entries = {}
+            for kind, model in MODELS.items():
+                rows = model.objects.annotate(popularity=Count("task")).values_list(
+                    "id", "name", "popularity"
+                )
+                for pk, name, popularity in rows:
+                    entries[(kind, pk)] = Entry(kind, pk, name, popularity)
+            trie, ngrams = Trie(), NgramIndex()
+            for key, entry in entries.items():
+                trie.insert(entry.name.lower(), key)
+                ngrams.insert(entry.name.lower(), key)
+        except Exception:
+            with self.lock:
+                self.replay = None
+            raise
+        with self.lock:
+            replay, self.replay = self.replay or [], None
+            self.entries, self.trie, self.ngrams = entries, trie, ngrams
+            self.loaded_at = self.clock()
+            for change in replay:
+                change()
+
+    def clear(self):
+        with self.lock:
+            self.entries, self.trie, self.ngrams = {}, Trie(), NgramIndex()
+            self.loaded_at = None
+
+    def ensure_fresh(self):
+        """Первая загрузка - в запросе (отдавать нечего), перезагрузка - в фоне."""
+        if not self.loaded:
+            self.load()
+            return
+        refresh_seconds = (
+            settings.AUTOCOMPLETE_REFRESH_SECONDS
+            if self.refresh_seconds is None
+            else self.refresh_seconds
+        )
+        with self.lock:
+            if self.replay is not None:
+                return  # уже перезагружается
+            if self.clock() - self.loaded_at <= refresh_seconds:
+                return
+            self.replay = []
+        self.run_in_background(self.reload)
+
+    def reload(self):
+        try:
+            self.load()
+        except Exception:
+            logger.exception("[AUTOCOMPLETE] Reload failed")
+            with self.lock:
+                # старые данные служат дальше, следующая попытка - через период:
+                self.loaded_at = self.clock()
+
+    def upsert(self, kind, pk, name):
+        with self.lock:
+            if self.replay is not None:
+                self.replay.append(lambda: self.upsert(kind, pk, name))
+            if not self.loaded:
+                return  # загрузится целиком при первом запросе
+            entry = self.entries.get((kind, pk))
+            if entry is None:
+                entry = self.entries[(kind, pk)] = Entry(kind, pk, name)
+            else:
+                self.trie.remove(entry.name.lower(), (kind, pk))
+                self.ngrams.remove(entry.name.lower(), (kind, pk))
+                entry.name = name
+            self.trie.insert(name.lower(), (kind, pk))
+            self.ngrams.insert(name.lower(), (kind, pk))
+
+    def remove(self, kind, pk):
+        with self.lock:
+            if self.replay is not None:
+                self.replay.append(lambda: self.remove(kind, pk))
+            entry = self.entries.pop((kind, pk), None)
+            if entry is not None:
+                self.trie.remove(entry.name.lower(), (kind, pk))
+                self.ngrams.remove(entry.name.lower(), (kind, pk))
+
+    def add_usage(self, kind, pks, delta):
+        """Меняет популярность на delta; имена, которых в индексе нет (тэги из
+        bulk_create резолвера идут без post_save), догружаются из бд."""
+        with self.lock:
+            if not self.loaded:
+                return
+            missing = []
+            for pk in pks:
+                entry = self.entries.get((kind, pk))
+                if entry is None:
+                    missing.append(pk)
+                else:
+                    entry.popularity = max(0, entry.popularity + delta)
+        if missing:
+            rows = list(
+                MODELS[kind]
+                .objects.filter(pk__in=missing)
+                .annotate(popularity=Count("task"))
+                .values_list("id", "name", "popularity")
+            )
+            with self.lock:
+                for pk, name, popularity in rows:
+                    self.upsert(kind, pk, name)
+                    entry = self.entries.get((kind, pk))
+                    if entry is not None:
+                        entry.popularity = popularity
+
+    def search(self, query, kinds=None, limit=10):
+        """Сначала имена, начинающиеся с query, затем содержащие его; внутри - по
+        популярности (число задач), затем по имени."""
+        self.ensure_fresh()
+        query = query.strip().lower()
+        kinds = set(kinds or MODELS)
+        with self.lock:
+            prefix = {
+                key for key in self.trie.keys_with_prefix(query) if key[0] in kinds
+            }
+            ranked = heapq.nsmallest(
+                limit,
+                (self.entries[key] for key in prefix),
+                key=lambda entry: (-entry.popularity, entry.name),
+            )
+            if len(ranked) < limit and query:
+                substring = (
+                    self.entries[key]
+                    for key in self.ngrams.candidates(query)
+                    if key[0] in kinds
+                    and key not in prefix
+                    and query in self.entries[key].name.lower()
+                )
+                ranked += heapq.nsmallest(
+                    limit - len(ranked),
+                    substring,
+                    key=lambda entry: (-entry.popularity, entry.name),
+                )
+            return [entry.as_dict() for entry in ranked]
+
+
+def search_database(query, kinds=None, limit=10):
+    """Тот же поиск запросами к бд; на postgres по trigram-индексам UPPER(name)
+    (миграция 0015_autocomplete_indexes)."""
+    query = query.strip()
+    results = []
+    for kind in kinds or MODELS:
+        rows = (
+            MODELS[kind]
+            .objects.filter(name__icontains=query)
+            .annotate(
+                popularity=Count("task"),
+                is_prefix=Case(
+                    When(name__istartswith=query, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+            )
+            .order_by("-is_prefix", "-popularity", "name")
+            .values_list("id", "name", "popularity", "is_prefix")[:limit]
+        )
+        results += [
+            (-is_prefix, -popularity, name, Entry(kind, pk, name, popularity))
+            for pk, name, popularity, is_prefix in rows
+        ]
+    results.sort(key=lambda row: row[:3])
+    return [row[3].as_dict() for row in results[:limit]]
+
+
+index = AutocompleteIndex()
+
+
+def autocomplete(query, kinds=None, limit=10):
+    if settings.AUTOCOMPLETE_BACKEND == "database":
+        return search_database(query, kinds, limit)
+    return index.search(query, kinds, limit)
@@ -0,0 +1,99 @@
+from collections import Counter
+
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    OuterRef,
+    PositiveIntegerField,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from tasks.models import Comment, Task
+
+
+def comment_added(comment):
+    """Учитывает новый комментарий в счетчиках задачи одним UPDATE.
+
+    F() - без чтения задачи, параллельные комментарии не теряются.
+    """
+    created_at = Value(comment.created_at)
+    Task.objects.filter(pk=comment.task_id).update(
+        comments_count=F("comments_count") + 1,
+        last_activity_at=Greatest(Coalesce("last_activity_at", created_at), created_at),
+    )
+
+
+def latest_comment():
+    return (
+        Comment.objects.filter(task=OuterRef("pk"))
+        .order_by("-created_at")
+        .values("created_at")[:1]
+    )
+
+
+def comments_removed(task_ids):
+    """Учитывает удаленные комментарии (task_ids - задача каждого удаленного):
+    count уменьшается, last_activity_at - время последнего оставшегося."""
+    for task_id, removed in Counter(task_ids).items():
+        Task.objects.filter(pk=task_id).update(
+            comments_count=Greatest(
+                F("comments_count") - removed,
+                Value(0),
+                output_field=PositiveIntegerField(),
+            ),
+            last_activity_at=Subquery(latest_comment()),
+        )
+
+
+def reconcile_comment_counters(batch_size=1000, progress=None):
+    """Исправляет расхождения счетчиков с комментариями пачками задач.
+
+    расхождения появляются, если комментарии меняются в обход CommentViewSet и
+    админки (bulk-операции, скрипты); возвращает (проверено, исправлено).
+    progress(checked, fixed) - вызывается после каждой пачки.
+    """
+    checked = fixed = 0
+    last_pk = 0
+    while True:
+        tasks = list(
+            Task.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .annotate(
+                actual_count=Count("comments"),
+                actual_last=Max("comments__created_at"),
+            )
+            .only("pk", "comments_count", "last_activity_at")[:batch_size]
+        )
+        if not tasks:
+            break
+        drifted = [
+            task.pk
+            for task in tasks
+            if (task.comments_count, task.last_activity_at)
+            != (task.actual_count, task.actual_last)
+        ]
+        if drifted:
+            # пересчет в самом UPDATE - комментарии, добавленные после проверки,
+            # тоже будут учтены:
+            Task.objects.filter(pk__in=drifted).update(
+                comments_count=Coalesce(
+                    Subquery(
+                        Comment.objects.filter(task=OuterRef("pk"))
+                        .values("task")
+                        .annotate(count=Count("id"))
+                        .values("count")
+                    ),
+                    0,
+                ),
+                last_activity_at=Subquery(latest_comment()),
+            )
+
+        checked += len(tasks)
+        fixed += len(drifted)
+        last_pk = tasks[-1].pk
+        if progress:
+            progress(checked, fixed)
+    return checked, fixed
@@ -0,0 +1,228 @@
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management.color import no_style
+from django.db import connections, models, transaction
+from django.db.models import ProtectedError
+
+from authapp.models import OutboxEmail
+
+# приложения, чьи таблицы очищает truncate_project_data (вместе с User и Group):
+PROJECT_APPS = ("authapp", "tasks")
+# поля суперпользователя, которые переживают очистку:
+KEPT_USER_FIELDS = (
+    "username",
+    "email",
+    "password",
+    "first_name",
+    "last_name",
+    "is_staff",
+    "is_superuser",
+    "is_active",
+    "date_joined",
+)
+
+
+class ChunkedDeleter:
+    """Удаление большого набора строк пачками.
+
+    в отличие от queryset.delete() объекты не загружаются в память: каскад обходится
+    по _meta моделей и удаляется set-based запросами (зависимые строки раньше
+    родительских), каждая пачка - в своей короткой транзакции, между пачками пауза
+    sleep, чтобы не держать блокировки и дать место другим запросам.
+    сигналы pre_delete/post_delete при этом не отправляются.
+
+    deleted, counts = ChunkedDeleter(batch_size=500).delete(
+        User.objects.filter(is_active=False)
+    )
+    """
+
+    def __init__(self, batch_size=None, sleep=None, progress=None):
+        """progress(deleted, counts) - вызывается после каждой пачки."""
+        self.batch_size = batch_size or settings.DELETION_BATCH_SIZE
+        self.sleep = settings.DELETION_BATCH_SLEEP if sleep is None else sleep
+        self.progress = progress
+
+    def delete(self, queryset):
+        """Удаляет строки queryset с каскадом, возвращает (всего, {модель: строк}) - как
+        queryset.delete()."""
+        model = queryset.model
+        counts = Counter()
+        last_pk = None
+        while True:
+            batch = queryset.order_by("pk")
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list("pk", flat=True)[: self.batch_size])
+            if not pks:
+                break
+
+            with transaction.atomic(using=queryset.db):
+                self._delete(
+                    model._base_manager.using(queryset.db).filter(pk__in=pks), counts
+                )
+
+            last_pk = pks[-1]
+            if self.progress:
+                self.progress(sum(counts.values()), dict(counts))
+            if len(pks) < self.batch_size:
+                break
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        counts = {label: count for label, count in counts.items() if count}
+        return sum(counts.values()), counts
+
+    def _delete(self, queryset, counts, path=()):
+        model = queryset.model
+        if model in path:
+            raise ValueError(f"Cyclic cascade is not supported: {model._meta.label}")
+        path = (*path, model)
+
+        for relation in model._meta.related_objects:
+            if relation.many_to_many:
+                # m2m на эту модель из другой: строки промежуточной таблицы
+                through = relation.through
+                if through._meta.auto_created:
+                    field_name = relation.field.m2m_reverse_field_name()
+                    self._raw_delete(
+                        through._base_manager.filter(
+                            **{f"{field_name}__in": queryset.values("pk")}
+                        ),
+                        counts,
+                    )
+                continue
+            self._delete_related(relation, queryset, counts, path)
+
+        for field in model._meta.many_to_many:
+            # свои m2m: строки промежуточной таблицы
+            through = field.remote_field.through
+            if through._meta.auto_created:
+                self._raw_delete(
+                    through._base_manager.filter(
+                        **{f"{field.m2m_field_name()}__in": queryset.values("pk")}
+                    ),
+                    counts,
+                )
+
+        self._raw_delete(queryset, counts)
+
+    def _delete_related(self, relation, queryset, counts, path):
+        field = relation.field
+        related = relation.related_model._base_manager.using(queryset.db).filter(
+            **{f"{field.attname}__in": queryset.values(field.target_field.attname)}
+        )
+        on_delete = relation.on_delete
+
+        if on_delete is models.CASCADE:
+            self._delete(related, counts, path)
+        elif on_delete is models.SET_NULL:
+            related.update(**{field.attname: None})
+        elif on_delete is models.SET_DEFAULT:
+            related.update(**{field.attname: field.get_default()})
+        elif on_delete in (models.PROTECT, models.RESTRICT):
+            protected = list(related[:10])
+            if protected:
+                raise ProtectedError(
+                    f"Cannot delete {queryset.model._meta.label}: referenced through "
+                    f"protected foreign key {relation.related_model._meta.label}."
+                    f"{field.name}",
+                    set(protected),
+                )
+        elif on_delete is not models.DO_NOTHING:
+            raise ValueError(
+                f"Unsupported on_delete for {relation.related_model._meta.label}."
+                f"{field.name}"
+            )
+
+    @staticmethod
+    def _raw_delete(queryset, counts):
+        # без загрузки объектов и без повторного сбора каскада:
+        counts[queryset.model._meta.label] += queryset._raw_delete(queryset.db)
+
+
+def chunked_delete(queryset, batch_size=None, sleep=None, progress=None):
+    return ChunkedDeleter(batch_size, sleep, progress).delete(queryset)
+
+
+def project_tables():
+    """Таблицы данных проекта: модели PROJECT_APPS, User, Group и их m2m."""
+    project_models = [get_user_model(), Group]
+    for label in PROJECT_APPS:
+        project_models += apps.get_app_config(label).get_models()
+    tables = set()
+    for model in project_models:
+        tables.add(model._meta.db_table)
+        for field in model._meta.local_many_to_many:
+            tables.add(field.remote_field.through._meta.db_table)
+    return sorted(tables)
+
+
+def truncate_project_data(
+    keep_superusers=False, drop_pending_emails=False, using="default"
+):
+    """Быстрая очистка всех данных проекта без загрузки объектов и сигналов.
+
+    postgres - TRUNCATE ... RESTART IDENTITY CASCADE, sqlite - DELETE FROM по
+    таблицам и всем ссылающимся на них и сброс sqlite_sequence (connection.ops.
+    sql_flush, как в manage.py flush, но только для таблиц проекта).
+    keep_superusers - суперпользователи и их группы создаются заново (с новыми id).
+    еще не переданные в celery письма outbox остаются (удаляются только переданные),
+    drop_pending_emails=True - очистить outbox целиком.
+    возвращает (очищенные таблицы, сохранено суперпользователей).
+    """
+    User = get_user_model()
+    connection = connections[using]
+    kept = []
+    if keep_superusers:
+        superusers = User.objects.using(using).filter(is_superuser=True)
+        groups = {}
+        for username, group in superusers.values_list("username", "groups__name"):
+            groups.setdefault(username, set()).update({group} - {None})
+        kept = [
+            (row, groups[row["username"]])
+            for row in superusers.values(*KEPT_USER_FIELDS)
+        ]
+
+    existing = set(connection.introspection.table_names())
+    tables = [table for table in project_tables() if table in existing]
+    if not drop_pending_emails:
+        tables.remove(OutboxEmail._meta.db_table)
+    with transaction.atomic(using=using):
+        if not drop_pending_emails:
+            OutboxEmail.objects.using(using).filter(
+                dispatched_at__isnull=False
+            ).delete()
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(
+                no_style(), tables, reset_sequences=True, allow_cascade=True
+            )
+        )
+        if kept:
+            restore_users(kept, using)
+    return tables, len(kept)
+
+
+def restore_users(kept, using):
+    """[(поля пользователя, имена групп)] -> пользователи с группами, bulk-запросами."""
+    User = get_user_model()
+    names = set().union(*(group_names for _, group_names in kept))
+    groups = {
+        group.name: group
+        for group in Group.objects.using(using).bulk_create(
+            [Group(name=name) for name in sorted(names)]
+        )
+    }
+    users = User.objects.using(using).bulk_create([User(**row) for row, _ in kept])
+    membership = User.groups.through
+    membership.objects.using(using).bulk_create(
+        [
+            membership(user_id=user.pk, group=groups[name])
+            for user, (_, group_names) in zip(users, kept)
+            for name in group_names
+        ]
+    )
@@ -0,0 +1,226 @@
+import json
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from tasks.filters import TaskFilter
+from tasks.models import Category, Tag, Task
+
+User = get_user_model()
+SNAPSHOTS_DIR = Path(__file__).resolve().parent / "explain_snapshots"
+PAGE_SIZE = 20
+
+# запрос -> функция(samples), возвращающая queryset
+CRITICAL_QUERIES = {}
+
+# узлы плана, читающие таблицу по индексу:
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+SEQ_SCAN = "Seq Scan"
+LINE = re.compile(
+    r"^(?P<indent> *)(?P<node>.+?)(?: on (?P<relation>\S+))?"
+    r"(?: using (?P<index>\S+))?$"
+)
+
+
+def critical_query(name):
+    def decorator(build):
+        CRITICAL_QUERIES[name] = build
+        return build
+
+    return decorator
+
+
+def task_list(params):
+    """Первая страница TaskViewSet.list с фильтрами params, как ее строит вьюсет."""
+    # импорт здесь: tasks.views импортирует много модулей приложения
+    from tasks.views import TaskViewSet
+
+    queryset = TaskFilter(params, queryset=TaskViewSet().get_queryset()).qs
+    return queryset.order_by("urgency")[:PAGE_SIZE]
+
+
+def samples():
+    """Значения фильтров из данных бд; на пустой бд - заглушки (план строится и без
+    строк)."""
+    task = Task.objects.order_by("pk").first()
+    executor = task.executor.first() if task else None
+    return {
+        "task_id": task.pk if task else 1,
+        "owner": task.owner.username if task else "owner",
+        "executor": executor.username if executor else "executor",
+        "category": getattr(Category.objects.order_by("pk").first(), "name", "c"),
+        "tag": getattr(Tag.objects.order_by("pk").first(), "name", "t"),
+        "now": timezone.now(),
+    }
+
+
+for filter_name, value in {
+    "status_display": lambda s: "in_progress",
+    "priority_display": lambda s: "high",
+    "deadline_after": lambda s: s["now"].isoformat(),
+    "deadline_before": lambda s: (s["now"] + timedelta(days=7)).isoformat(),
+    "owner": lambda s: s["owner"],
+    "executor": lambda s: s["executor"],
+    "tags": lambda s: s["tag"],
+    "category": lambda s: s["category"],
+    "comments_count_min": lambda s: "10",
+    "last_activity_after": lambda s: (s["now"] - timedelta(days=1)).isoformat(),
+}.items():
+    critical_query(f"task_list.{filter_name}")(
+        lambda s, name=filter_name, value=value: task_list({name: value(s)})
+    )
+
+critical_query("task_list")(lambda s: task_list({}))
+critical_query("task_list.search")(lambda s: task_list({"search": "report"}))
+
+
+@critical_query("deadline_notification")
+def deadline_window(s):
+    """Окно tasks.tasks.deadline_notification."""
+    return Task.objects.filter(
+        deadline__lte=s["now"] + timedelta(hours=24),
+        deadline__gte=s["now"],
+        notified=False,
+    )
+
+
+@critical_query("comment_list")
+def comment_list(s):
+    from tasks.views import CommentViewSet
+
+    view = CommentViewSet(kwargs={"task_pk": s["task_id"]})
+    return view.get_queryset().order_by("-created_at", "-id")[:PAGE_SIZE]
+
+
+@critical_query("delete_unconfirmed_users")
+def unconfirmed_users(s):
+    """Отбор authapp.tasks.delete_unconfirmed_users."""
+    return User.objects.filter(
+        is_active=False, date_joined__lt=s["now"] - timedelta(minutes=5)
+    ).values("pk")
+
+
+# месячные секции tasks.partitions: tasks_comment_p2025_01 -> tasks_comment_p?
+MONTHLY_PARTITION = re.compile(r"_p\d{4}_\d{2}(?=_|$)")
+
+
+def _postgres_lines(plan, depth=0):
+    """Узлы плана; месяц в именах секций не пишется, одинаковые секции под Append - один
+    раз (иначе снимок менялся бы каждый месяц)."""
+    line = "  " * depth + plan["Node Type"]
+    if plan.get("Relation Name"):
+        line += f" on {MONTHLY_PARTITION.sub('_p?', plan['Relation Name'])}"
+    if plan.get("Index Name"):
+        line += f" using {MONTHLY_PARTITION.sub('_p?', plan['Index Name'])}"
+    yield line
+    children = []
+    for child in plan.get("Plans", []):
+        lines = list(_postgres_lines(child, depth + 1))
+        if lines not in children:
+            children.append(lines)
+    for lines in children:
+        yield from lines
+
+
+SQLITE_ACCESS = re.compile(
+    r"^(?:SCAN|SEARCH) (?P<relation>\S+)"
+    r"(?: USING (?P<kind>COVERING INDEX|INDEX|INTEGER PRIMARY KEY)"
+    r"(?: (?P<index>\S+))?)?"
+)
+
+
+def _sqlite_lines(explained):
+    """Строки EXPLAIN QUERY PLAN "id parent notused detail" -> те же узлы, что у
+    postgres: SCAN - Seq Scan, SEARCH/SCAN по индексу - Index (Only) Scan."""
+    depths = {"0": -1}
+    for row in explained.splitlines():
+        node_id, parent, _, detail = row.split(" ", 3)
+        depth = depths[node_id] = depths.get(parent, -1) + 1
+        match = SQLITE_ACCESS.match(detail)
+        if match is None:
+            line = re.sub(r"\d+", "?", detail)  # USE TEMP B-TREE, подзапросы
+        elif match["kind"] is None:
+            line = f"{SEQ_SCAN} on {match['relation']}"
+        else:
+            node = (
+                "Index Only Scan" if match["kind"] == "COVERING INDEX" else "Index Scan"
+            )
+            index = match["index"] if match["kind"] != "INTEGER PRIMARY KEY" else "pk"
+            line = f"{node} on {match['relation']} using {index}"
+        yield "  " * depth + line
+
+
+def explain(queryset):
+    """Нормализованный план: узлы с таблицами и индексами, без стоимостей, числа строк и
+    значений параметров."""
+    if connection.vendor == "postgresql":
+        [root] = json.loads(queryset.explain(format="json"))
+        return list(_postgres_lines(root["Plan"]))
+    return list(_sqlite_lines(queryset.explain()))
+
+
+def capture(names=None):
+    """{запрос: план} для names (по умолчанию все критичные запросы)."""
+    values = samples()
+    return {
+        name: explain(CRITICAL_QUERIES[name](values))
+        for name in names or CRITICAL_QUERIES
+    }
+
+
+def _access(lines):
+    """Таблица -> способы чтения; индексы плана."""
+    relations, indexes = {}, set()
+    for line in lines:
+        match = LINE.match(line.strip())
+        if match["relation"]:
+            relations.setdefault(match["relation"], set()).add(match["node"])
+        if match["index"]:
+            indexes.add(match["index"])
+    return relations, indexes
+
+
+def compare(current, snapshot):
+    """(регрессии, изменения): регрессия - таблица, читавшаяся по индексу, читается
+    seq scan, или индекс из снимка больше не используется; изменения - прочие
+    отличия плана."""
+    regressions, changes = [], []
+    for name, before in snapshot.items():
+        now = current.get(name)
+        if now is None or now == before:
+            continue
+        relations_before, indexes_before = _access(before)
+        relations_now, indexes_now = _access(now)
+        found = False
+        for relation, nodes in relations_before.items():
+            nodes_now = relations_now.get(relation, set())
+            if nodes & INDEX_NODES and SEQ_SCAN in nodes_now - nodes:
+                regressions.append(f"{name}: sequential scan on {relation}")
+                found = True
+        for index in sorted(indexes_before - indexes_now):
+            regressions.append(f"{name}: index {index} is no longer used")
+            found = True
+        if not found:
+            changes.append(name)
+    return regressions, changes
+
+
+def snapshot_path(vendor=None):
+    return SNAPSHOTS_DIR / f"{vendor or connection.vendor}.json"
+
+
+def load_snapshot(vendor=None):
+    path = snapshot_path(vendor)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_snapshot(plans, vendor=None):
+    path = snapshot_path(vendor)
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(plans, indent=2, sort_keys=True) + "\n")
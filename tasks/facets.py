@@ -0,0 +1,153 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from tasks.models import TaskPriority, TaskStatus
+
+# фасет -> поле задачи; значения фасетов - те же, что принимает TaskFilter
+# (status_display, priority_display, category, tags)
+FACETS = {
+    "status": "status",
+    "priority": "priority",
+    "category": "category__name",
+    "tag": "tags__name",
+}
+LABELS = {
+    "status": dict(TaskStatus.choices),
+    "priority": dict(TaskPriority.choices),
+}
+CACHE_PREFIX = "tasks:facets"
+# параметры запроса, не влияющие на выборку:
+IGNORED_PARAMS = {"facets", "limit", "offset", "ordering", "include"}
+
+
+def parse_facets(value):
+    """?facets=status,tag -> ["status", "tag"]."""
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    unknown = [name for name in names if name not in FACETS]
+    if unknown:
+        raise ValidationError(
+            {
+                "facets": f"Unknown facets: {', '.join(unknown)}. "
+                f"Available: {', '.join(FACETS)}."
+            }
+        )
+    return list(dict.fromkeys(names))
+
+
+def filter_signature(model, facets, query_params):
+    """Ключ кэша: модель, фасеты и параметры фильтрации (без пагинации и сортировки)."""
+    params = sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        if key not in IGNORED_PARAMS
+        for value in values
+    )
+    raw = repr((model._meta.label, sorted(facets), params))
+    return f"{CACHE_PREFIX}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def _label(facet, value):
+    if facet in LABELS:
+        return LABELS[facet].get(int(value), value)
+    return value
+
+
+def _union_counts(queryset, facets):
+    """По подзапросу GROUP BY на фасет, склеенных UNION ALL - один запрос на любой
+    бд.
+
+    выборка задач - подзапросом id: иначе фасет тэгов переиспользует join фильтра
+    ?tags= и видит только отфильтрованные тэги задачи.
+    """
+    tasks = queryset.model.objects.filter(pk__in=queryset.order_by().values("pk"))
+    parts = [
+        tasks.values(value=Cast(F(FACETS[facet]), output_field=CharField()))
+        .annotate(facet=Value(facet, output_field=CharField()))
+        .annotate(count=Count("id", distinct=True))
+        .values_list("facet", "value", "count")
+        for facet in facets
+    ]
+    rows = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    return list(rows)
+
+
+def _grouping_sets_counts(queryset, facets):
+    """Postgres: один проход по задачам с GROUP BY GROUPING SETS вместо UNION ALL."""
+    model = queryset.model
+    table = model._meta.db_table
+    tags = model._meta.get_field("tags")
+    category_table = model._meta.get_field("category").related_model._meta.db_table
+    columns = {
+        "status": "CAST(t.status AS text)",
+        "priority": "CAST(t.priority AS text)",
+        "category": "c.name",
+        "tag": "tg.name",
+    }
+    joins = []
+    if "category" in facets:
+        joins.append(f'LEFT JOIN "{category_table}" c ON c.id = t.category_id')
+    if "tag" in facets:
+        through = tags.remote_field.through._meta
+        joins.append(
+            f'LEFT JOIN "{through.db_table}" tt '
+            f'ON tt."{tags.m2m_column_name()}" = t.id '
+            f'LEFT JOIN "{tags.related_model._meta.db_table}" tg '
+            f'ON tg.id = tt."{tags.m2m_reverse_name()}"'
+        )
+    selected = ", ".join(
+        f"{columns[facet]}, GROUPING({columns[facet]})" for facet in facets
+    )
+    grouping_sets = ", ".join(f"({columns[facet]})" for facet in facets)
+    subquery, params = queryset.order_by().values("pk").query.sql_with_params()
+    sql = (
+        f"SELECT {selected}, COUNT(DISTINCT t.id) "
+        f'FROM "{table}" t {" ".join(joins)} '
+        f"WHERE t.id IN ({subquery}) "
+        f"GROUP BY GROUPING SETS ({grouping_sets})"
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    result = []
+    for row in rows:
+        count = row[-1]
+        for index, facet in enumerate(facets):
+            value, grouped_out = row[2 * index], row[2 * index + 1]
+            if not grouped_out:
+                result.append((facet, value, count))
+                break
+    return result
+
+
+def compute_facets(queryset, facets):
+    """Счетчики задач выборки по значениям каждого фасета: {facet: {value: count}}.
+
+    задачи без категории/тэгов в счетчики не попадают.
+    """
+    if queryset.query.is_empty():
+        return {facet: {} for facet in facets}
+    if connections[queryset.db].vendor == "postgresql":
+        rows = _grouping_sets_counts(queryset, facets)
+    else:
+        rows = _union_counts(queryset, facets)
+    result = {facet: {} for facet in facets}
+    for facet, value, count in rows:
+        if value is not None:
+            result[facet][_label(facet, value)] = count
+    return result
+
+
+def cached_facets(queryset, facets, query_params):
+    """compute_facets с кэшем на FACETS_CACHE_TTL секунд по сигнатуре фильтра."""
+    key = filter_signature(queryset.model, facets, query_params)
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(queryset, facets)
+        cache.set(key, result, settings.FACETS_CACHE_TTL)
+    return result
@@ -11,16 +11,25 @@ from tasks.models import Category, Comment, Tag, Task, TaskPriority, TaskStatus
 User = get_user_model()
 
 
+def random_row(queryset):
+    """Случайная строка: COUNT и одна строка по смещению - без загрузки всей выборки
+    (массовые данные - tasks.seeding)."""
+    count = queryset.count()
+    if not count:
+        raise IndexError(f"No {queryset.model.__name__} rows to choose from.")
+    return queryset.order_by("pk")[random.randrange(count)]
+
+
 def get_random_manager():
-    return random.choice(User.objects.filter(groups__name="manager"))
+    return random_row(User.objects.filter(groups__name="manager"))
 
 
 def get_random_user():
-    return random.choice(User.objects.filter(groups__name="user"))
+    return random_row(User.objects.filter(groups__name="user"))
 
 
 def get_random_task():
-    return random.choice(Task.objects.all())
+    return random_row(Task.objects.all())
 
 
 class TaskFactory(factory.django.DjangoModelFactory):
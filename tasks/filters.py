@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q
 from django_filters import BaseInFilter, CharFilter
 
-from .models import Task, TaskPriority, TaskStatus
+from .models import ArchivedTask, Task, TaskPriority, TaskStatus
 
 User = get_user_model()
 
@@ -39,6 +39,19 @@ class TaskFilter(django_filters.FilterSet):
         field_name="category__name", lookup_expr="iexact"
     )
     tags = CharInFilter(field_name="tags__name", lookup_expr="in")
+    # денормализованные счетчики (tasks.counters) - фильтр по индексу:
+    comments_count_min = django_filters.NumberFilter(
+        field_name="comments_count", lookup_expr="gte"
+    )
+    comments_count_max = django_filters.NumberFilter(
+        field_name="comments_count", lookup_expr="lte"
+    )
+    last_activity_after = django_filters.DateTimeFilter(
+        field_name="last_activity_at", lookup_expr="gte"
+    )
+    last_activity_before = django_filters.DateTimeFilter(
+        field_name="last_activity_at", lookup_expr="lte"
+    )
     search = django_filters.CharFilter(method="filter_search", lookup_expr="icontains")
     status_display = django_filters.ChoiceFilter(
         method="filter_by_status_display",
@@ -64,6 +77,10 @@ class TaskFilter(django_filters.FilterSet):
             "tags",
             "search",
             "category",
+            "comments_count_min",
+            "comments_count_max",
+            "last_activity_after",
+            "last_activity_before",
         ]  # here exact or custom
 
     def filter_search(self, queryset, name, value):  # name	- filter name "search"
@@ -109,3 +126,10 @@ class TaskFilter(django_filters.FilterSet):
         return self.filter_by_field_display(
             queryset, name, value, "priority", TaskPriority.choices
         )
+
+
+class ArchivedTaskFilter(TaskFilter):
+    """Те же фильтры для архива (?archived=true) - поля ArchivedTask повторяют Task."""
+
+    class Meta(TaskFilter.Meta):
+        model = ArchivedTask
@@ -0,0 +1,188 @@
+import logging
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from tasks.counters import comments_removed
+from tasks.deletion import ChunkedDeleter
+from tasks.models import AdminJob, AdminJobStatus, Comment, Task, TaskStatus
+
+logger = logging.getLogger("cleanup_tasks")
+User = get_user_model()
+
+# действие -> (обработчик пачки, метки моделей, к которым оно применимо)
+ACTIONS = {}
+
+
+def job_action(name, *models):
+    """Регистрирует действие: handler(queryset, params) обрабатывает одну пачку объектов
+    в транзакции."""
+
+    def decorator(handler):
+        ACTIONS[name] = (handler, {model._meta.label for model in models})
+        return handler
+
+    return decorator
+
+
+@job_action("delete", Task, Comment, User)
+def delete_objects(queryset, params):
+    # счетчики задач, у которых пропадут комментарии (tasks.counters):
+    if queryset.model is Comment:
+        removed = Comment.objects.filter(pk__in=queryset.values("pk"))
+    elif queryset.model is User:
+        removed = Comment.objects.filter(author__in=queryset.values("pk"))
+    else:
+        removed = Comment.objects.none()
+    task_ids = list(removed.values_list("task_id", flat=True))
+    ChunkedDeleter(sleep=0).delete(queryset)
+    comments_removed(task_ids)
+
+
+@job_action("reassign_owner", Task)
+def reassign_owner(queryset, params):
+    queryset.update(owner_id=params["owner_id"])
+
+
+@job_action("change_status", Task)
+def change_status(queryset, params):
+    queryset.update(status=params["status"])
+
+
+def validate_params(action, params):
+    """Проверяет параметры до постановки задания в очередь, ValueError - ошибка."""
+    if action == "reassign_owner":
+        if not User.objects.filter(pk=params.get("owner_id")).exists():
+            raise ValueError("Choose an existing owner.")
+    elif action == "change_status":
+        if params.get("status") not in TaskStatus.values:
+            raise ValueError("Choose a status.")
+
+
+def start_job(action, queryset, user=None, **params):
+    """Создает AdminJob по выбранным объектам и ставит его в очередь celery после
+    коммита."""
+    # tasks.tasks импортирует этот модуль:
+    from tasks.tasks import run_admin_job
+
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action}.")
+    label = queryset.model._meta.label
+    if label not in ACTIONS[action][1]:
+        raise ValueError(f"Action {action} is not available for {label}.")
+    validate_params(action, params)
+
+    object_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    job = AdminJob.objects.create(
+        action=action,
+        model=label,
+        object_ids=object_ids,
+        params=params,
+        total=len(object_ids),
+        created_by=user,
+    )
+    transaction.on_commit(
+        lambda: run_admin_job.apply_async((job.pk,), queue="low_priority")
+    )
+    return job
+
+
+def cancel_job(job):
+    """Задание в очереди отменяется сразу, выполняемое - перед следующей пачкой."""
+    AdminJob.objects.filter(pk=job.pk, status=AdminJobStatus.PENDING).update(
+        status=AdminJobStatus.CANCELLED, finished_at=timezone.now()
+    )
+    AdminJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+
+
+def _finish(job, status, error=""):
+    # задание, признанное брошенным (fail_stale_jobs), не перезаписывается:
+    AdminJob.objects.filter(pk=job.pk, status=AdminJobStatus.RUNNING).update(
+        status=status, error=error, finished_at=timezone.now()
+    )
+
+
+def fail_stale_jobs(timeout=None):
+    """Помечает FAILED задания RUNNING, у которых не было пачки дольше timeout секунд
+    (воркер упал посреди задания); обработанные пачки уже закоммичены - processed
+    показывает, докуда дошло. возвращает число заданий."""
+    timeout = timeout or settings.ADMIN_JOB_STALE_SECONDS
+    now = timezone.now()
+    return AdminJob.objects.filter(
+        status=AdminJobStatus.RUNNING, heartbeat_at__lt=now - timedelta(seconds=timeout)
+    ).update(
+        status=AdminJobStatus.FAILED,
+        error=f"No progress for {timeout} s, the worker has probably stopped.",
+        finished_at=now,
+    )
+
+
+def run_job(job_id, batch_size=None):
+    """Выполняет задание пачками по batch_size объектов, каждая пачка и ее прогресс - в
+    одной транзакции; возвращает итоговый статус."""
+    batch_size = batch_size or settings.ADMIN_JOB_BATCH_SIZE
+    # забираю задание атомарно - повторная доставка сообщения его не запустит:
+    now = timezone.now()
+    started = AdminJob.objects.filter(pk=job_id, status=AdminJobStatus.PENDING).update(
+        status=AdminJobStatus.RUNNING, started_at=now, heartbeat_at=now
+    )
+    job = AdminJob.objects.get(pk=job_id)
+    if not started:
+        return job.status
+
+    handler = ACTIONS[job.action][0]
+    model = apps.get_model(job.model)
+    try:
+        for start in range(0, len(job.object_ids), batch_size):
+            status, cancel_requested = (
+                AdminJob.objects.filter(pk=job.pk)
+                .values_list("status", "cancel_requested")
+                .get()
+            )
+            if status != AdminJobStatus.RUNNING:  # признано брошенным
+                return status
+            if cancel_requested:
+                _finish(job, AdminJobStatus.CANCELLED)
+                return AdminJobStatus.CANCELLED
+            batch = job.object_ids[start : start + batch_size]
+            with transaction.atomic():
+                handler(model._base_manager.filter(pk__in=batch), job.params)
+                AdminJob.objects.filter(pk=job.pk).update(
+                    processed=F("processed") + len(batch), heartbeat_at=timezone.now()
+                )
+    except Exception as error:
+        logger.exception(f"Admin job {job.pk} ({job.action}) failed.")
+        _finish(job, AdminJobStatus.FAILED, str(error))
+        return AdminJobStatus.FAILED
+    _finish(job, AdminJobStatus.DONE)
+    return AdminJobStatus.DONE
+
+
+def background_action(action, description, get_params=None):
+    """Действие админки, которое ставит AdminJob в очередь вместо выполнения в
+    запросе; get_params(request) - параметры из формы действий (ValueError -
+    ошибка)."""
+
+    def admin_action(modeladmin, request, queryset):
+        try:
+            params = get_params(request) if get_params else {}
+            job = start_job(action, queryset, request.user, **params)
+        except ValueError as error:
+            modeladmin.message_user(request, str(error), messages.ERROR)
+            return
+        url = reverse("admin:tasks_adminjob_change", args=[job.pk])
+        modeladmin.message_user(
+            request, format_html('Запущено в фоне: <a href="{}">{}</a>', url, job)
+        )
+
+    admin_action.__name__ = f"{action}_in_background"
+    admin_action.short_description = description
+    return admin_action
@@ -0,0 +1,169 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Now
+
+from tasks.models import JobLease
+
+logger = logging.getLogger("periodic_tasks")
+
+
+def get_lease_ttl():
+    return getattr(settings, "PERIODIC_TASK_LEASE_TTL", 120)
+
+
+class LeaseLock:
+    """Распределенная блокировка периодической задачи на основе аренды в бд.
+
+    захват - условный UPDATE строки JobLease (или ее создание), поэтому работает между
+    воркерами на разных машинах; пока задача выполняется, фоновый поток продлевает
+    аренду каждые ttl/3 секунд; если воркер упал, аренда истекает через ttl и ее
+    забирает следующий запуск.
+
+    время аренды считается часами бд (Now()), а не воркера: расхождение часов машин не
+    продлевает и не сокращает чужую аренду. если продлить аренду не удалось, поток
+    выставляет lost - владелец узнает, что работает без аренды.
+    """
+
+    def __init__(self, name, ttl=None, heartbeat_interval=None):
+        self.name = name
+        self.ttl = ttl or get_lease_ttl()
+        self.heartbeat_interval = heartbeat_interval or self.ttl / 3
+        # по токену видно, какой воркер держит аренду:
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread = None
+        self.lost = threading.Event()
+
+    def expires_at(self):
+        return Now() + Value(timedelta(seconds=self.ttl))
+
+    def acquire(self):
+        """Захватывает аренду; False - аренду держит другой живой воркер."""
+        self.lost.clear()
+        lease, created = JobLease.objects.get_or_create(
+            name=self.name,
+            defaults={
+                "owner": self.token,
+                "acquired_at": Now(),
+                "renewed_at": Now(),
+                "expires_at": self.expires_at(),
+            },
+        )
+        if created:
+            return True
+
+        # свободная или просроченная аренда забирается одним условным UPDATE,
+        # из двух конкурентов его выполнит только один:
+        free = Q(owner="") | Q(expires_at__isnull=True) | Q(expires_at__lt=Now())
+        taken = (
+            JobLease.objects.filter(free, name=self.name).update(
+                owner=self.token,
+                acquired_at=Now(),
+                renewed_at=Now(),
+                expires_at=self.expires_at(),
+                takeovers=F("takeovers")
+                + Case(When(~Q(owner=""), then=Value(1)), default=Value(0)),
+            )
+            == 1
+        )
+        if taken:
+            if lease.owner:
+                logger.warning(
+                    f"[TAKEOVER] Job: {self.name} | Stale owner: {lease.owner}"
+                )
+            return True
+
+        JobLease.objects.filter(name=self.name).update(
+            skipped_ticks=F("skipped_ticks") + 1, last_skipped_at=Now()
+        )
+        logger.info(f"[SKIPPED] Job: {self.name} | Lease owner: {lease.owner}")
+        return False
+
+    def renew(self):
+        """Продлевает аренду; False - аренду уже забрал другой воркер."""
+        return (
+            JobLease.objects.filter(name=self.name, owner=self.token).update(
+                renewed_at=Now(), expires_at=self.expires_at()
+            )
+            == 1
+        )
+
+    def release(self):
+        JobLease.objects.filter(name=self.name, owner=self.token).update(
+            owner="", expires_at=Now()
+        )
+
+    def _heartbeat(self):
+        try:
+            while not self._stop.wait(self.heartbeat_interval):
+                try:
+                    renewed = self.renew()
+                except Exception:
+                    # без продления аренда истечет - иначе поток умер бы молча:
+                    logger.exception(f"[LEASE RENEW FAILED] Job: {self.name}")
+                    self.lost.set()
+                    break
+                if not renewed:
+                    logger.warning(f"[LEASE LOST] Job: {self.name}")
+                    self.lost.set()
+                    break
+        finally:
+            # у потока свое соединение с бд - закрываю его сам:
+            connection.close()
+
+    def start_heartbeat(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._heartbeat, name=f"lease-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def single_instance(name=None, ttl=None):
+    """Декоратор периодической задачи: запуск выполняется, только если удалось захватить
+    аренду, иначе пропускается (запуск засчитывается в skipped_ticks).
+
+    ставится под @shared_task:
+    @shared_task
+    @single_instance("authapp.tasks.delete_unconfirmed_users")
+    def delete_unconfirmed_users(): ...
+    """
+
+    def decorator(func):
+        lease_name = name or f"{func.__module__}.{func.__name__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            lease = LeaseLock(lease_name, ttl=ttl)
+            if not lease.acquire():
+                return None
+            lease.start_heartbeat()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                lease.stop_heartbeat()
+                if lease.lost.is_set():
+                    logger.error(
+                        f"[LEASE LOST] Job: {lease_name} | Finished without lease, "
+                        "another worker may have run it concurrently"
+                    )
+                lease.release()
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,386 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.core.mail import get_connection
+
+logger = logging.getLogger("email_queue")
+
+# ответы smtp-провайдера, означающие "слишком часто, попробуйте позже":
+THROTTLE_CODES = (421, 450, 451, 452)
+
+
+def get_provider():
+    """Провайдер - smtp-хост, через который уходит почта."""
+    return settings.EMAIL_HOST or "default"
+
+
+def get_rate_limits(provider):
+    limits = settings.EMAIL_RATE_LIMITS
+    return limits.get(provider, limits["default"])
+
+
+def get_lane_share(lane):
+    """Доля очереди (high_priority, default, low_priority) в лимите провайдера."""
+    weights = settings.EMAIL_QUEUE_WEIGHTS
+    return weights.get(lane, weights["default"]) / sum(weights.values())
+
+
+def get_task_lane(task):
+    """Очередь celery, из которой пришла задача; при прямом вызове - default."""
+    delivery_info = task.request.delivery_info or {}
+    return delivery_info.get("routing_key") or "default"
+
+
+def get_throttle_code(exc):
+    """Код ответа, если провайдер ограничивает частоту отправки, иначе None."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+    else:
+        codes = [getattr(exc, "smtp_code", None)]
+    for code in codes:
+        if code in THROTTLE_CODES:
+            return code
+    return None
+
+
+def lane_capacity(capacity, share):
+    return max(1.0, capacity * share)
+
+
+def reserve_tokens(state, now, lane, share, limits):
+    """Резервирует токен очереди lane в состоянии провайдера state (dict).
+
+    общий bucket провайдера пополняется со скоростью rate, bucket очереди - со
+    скоростью rate * share. в пределах своей доли очередь резервирует токен даже в
+    долг (ждет своей очереди), сверх доли - только свободный токен провайдера, так
+    что занятые очереди получают скорость по весам, а простаивающие отдают свою долю
+    остальным. возвращает (зарезервирован, секунд подождать); незарезервированный
+    токен запрашивается снова после ожидания. та же логика - в BUCKET_SCRIPT.
+    """
+    rate = state.setdefault("rate", limits["rate"])
+    capacity = limits["burst"]
+    tokens = state.get("tokens", capacity)
+    tokens = min(capacity, tokens + (now - state.get("updated_at", now)) * rate)
+    lane_rate = rate * share
+    lane_tokens = state.get(f"lane:{lane}", lane_capacity(capacity, share))
+    lane_tokens = min(
+        lane_capacity(capacity, share),
+        lane_tokens + (now - state.get(f"lane:{lane}:updated_at", now)) * lane_rate,
+    )
+    if lane_tokens >= 1:
+        lane_tokens -= 1
+        tokens -= 1  # отрицательный остаток - очередь на будущие токены
+        result = (True, max(0.0, -tokens / rate))
+    elif tokens >= 1:
+        tokens -= 1
+        result = (True, 0.0)
+    else:
+        result = (False, min((1 - tokens) / rate, (1 - lane_tokens) / lane_rate))
+    state.update(
+        {
+            "tokens": tokens,
+            "updated_at": now,
+            f"lane:{lane}": lane_tokens,
+            f"lane:{lane}:updated_at": now,
+        }
+    )
+    return result
+
+
+# то же в redis одним атомарным скриптом: состояние провайдера - hash, время - часы
+# redis (одни на все процессы). ARGV: операция, очередь, доля, rate, burst, min_rate
+BUCKET_SCRIPT = """
+local op, lane = ARGV[1], ARGV[2]
+local share, max_rate = tonumber(ARGV[3]), tonumber(ARGV[4])
+local capacity, min_rate = tonumber(ARGV[5]), tonumber(ARGV[6])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = {}
+local raw = redis.call("HGETALL", KEYS[1])
+for i = 1, #raw, 2 do state[raw[i]] = tonumber(raw[i + 1]) end
+local rate = state["rate"] or max_rate
+local lane_key = "lane:" .. lane
+
+if op == "reserve" then
+  local tokens = state["tokens"] or capacity
+  tokens = math.min(capacity, tokens + (now - (state["updated_at"] or now)) * rate)
+  local lane_rate = rate * share
+  local lane_cap = math.max(1, capacity * share)
+  local lane_tokens = state[lane_key] or lane_cap
+  lane_tokens = math.min(
+    lane_cap,
+    lane_tokens + (now - (state[lane_key .. ":updated_at"] or now)) * lane_rate
+  )
+  local reserved, wait = 1, 0
+  if lane_tokens >= 1 then
+    lane_tokens = lane_tokens - 1
+    tokens = tokens - 1
+    wait = math.max(0, -tokens / rate)
+  elseif tokens >= 1 then
+    tokens = tokens - 1
+  else
+    reserved = 0
+    wait = math.min((1 - tokens) / rate, (1 - lane_tokens) / lane_rate)
+  end
+  redis.call(
+    "HSET", KEYS[1], "rate", rate, "tokens", tokens, "updated_at", now,
+    lane_key, lane_tokens, lane_key .. ":updated_at", now
+  )
+  redis.call("EXPIRE", KEYS[1], 3600)
+  return {reserved, tostring(wait)}
+elseif op == "cancel" then
+  redis.call("HINCRBYFLOAT", KEYS[1], "tokens", 1)
+  redis.call("HINCRBYFLOAT", KEYS[1], lane_key, 1)
+elseif op == "throttle" then
+  rate = math.max(min_rate, rate / 2)
+  redis.call("HSET", KEYS[1], "rate", rate)
+  if (state["tokens"] or capacity) > 0 then
+    redis.call("HSET", KEYS[1], "tokens", 0, "updated_at", now)
+  end
+elseif op == "recover" then
+  rate = math.min(max_rate, rate + max_rate / 10)
+  redis.call("HSET", KEYS[1], "rate", rate)
+end
+return {1, tostring(rate)}
+"""
+
+
+class LocalBucketStore:
+    """Состояние bucket'ов в памяти процесса - без общего redis (разработка, тесты);
+    каждый процесс тогда расходует весь лимит провайдера сам."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+    def call(self, op, provider, lane, share, limits):
+        with self.lock:
+            state = self.states.setdefault(provider, {})
+            now = self.clock()
+            if op == "reserve":
+                return reserve_tokens(state, now, lane, share, limits)
+            rate = state.setdefault("rate", limits["rate"])
+            if op == "cancel":
+                state["tokens"] = state.get("tokens", 0) + 1
+                state[f"lane:{lane}"] = state.get(f"lane:{lane}", 0) + 1
+            elif op == "throttle":
+                state["rate"] = max(limits["min_rate"], rate / 2)
+                if state.get("tokens", limits["burst"]) > 0:
+                    state.update({"tokens": 0, "updated_at": now})
+            elif op == "recover":
+                state["rate"] = min(limits["rate"], rate + limits["rate"] / 10)
+            return True, state["rate"]
+
+
+class RedisBucketStore:
+    """Состояние bucket'ов в общем redis (CACHES с CACHE_URL): лимит провайдера и доли
+    очередей соблюдаются по всем воркерам вместе."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.script = cache._cache.get_client(write=True).register_script(BUCKET_SCRIPT)
+
+    def call(self, op, provider, lane, share, limits):
+        reserved, value = self.script(
+            keys=[self.cache.make_key(f"email_bucket:{provider}")],
+            args=[
+                op,
+                lane,
+                share,
+                limits["rate"],
+                limits["burst"],
+                limits["min_rate"],
+            ],
+        )
+        return bool(reserved), float(value)
+
+
+_store = None
+_local_store = LocalBucketStore()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if isinstance(cache, RedisCache):
+            _store = RedisBucketStore(cache)
+        else:
+            _store = _local_store
+    return _store
+
+
+class ProviderBucket:
+    """Token bucket провайдера с долями очередей и адаптивной скоростью.
+
+    на ответ 421/450 скорость уменьшается вдвое, после каждой успешной отправки
+    возвращается на 10% от заданной (AIMD, как у TCP); состояние общее для всех
+    процессов, если настроен redis.
+    """
+
+    def __init__(self, provider, store=None):
+        self.provider = provider
+        limits = get_rate_limits(provider)
+        self.limits = {
+            "rate": limits["rate"],
+            "burst": limits["burst"],
+            "min_rate": limits.get("min_rate", limits["rate"] / 20),
+        }
+        self.store = store or get_store()
+
+    def _call(self, op, lane="default"):
+        return self.store.call(
+            op, self.provider, lane, get_lane_share(lane), self.limits
+        )
+
+    def reserve(self, lane):
+        """Возвращает (зарезервирован, секунд подождать); см.
+
+        reserve_tokens.
+        """
+        return self._call("reserve", lane)
+
+    def cancel(self, lane):
+        """Возвращает зарезервированный, но не использованный токен."""
+        self._call("cancel", lane)
+
+    @property
+    def rate(self):
+        return self._call("rate")[1]
+
+    def throttle(self):
+        return self._call("throttle")[1]
+
+    def recover(self):
+        return self._call("recover")[1]
+
+
+def get_bucket(provider):
+    return ProviderBucket(provider)
+
+
+class EmailThrottled(Exception):
+    """Провайдер ограничивает отправку дольше, чем можно ждать в текущей задаче."""
+
+    def __init__(self, retry_after, pending):
+        super().__init__(f"Email provider throttled, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+        self.pending = pending
+
+
+class OutboundEmailQueue:
+    """Очередь исходящих писем с ограничением скорости по провайдеру.
+
+    письма из очередей high_priority/default/low_priority чередуются пропорционально
+    весам EMAIL_QUEUE_WEIGHTS и уходят пачками по batch_size через одно smtp-соединение;
+    скорость и доли очередей ограничивает общий для процессов bucket провайдера.
+    """
+
+    def __init__(
+        self, provider=None, batch_size=None, max_wait=None, connection=None, sleep=None
+    ):
+        self.provider = provider or get_provider()
+        limits = get_rate_limits(self.provider)
+        self.batch_size = batch_size or limits["batch_size"]
+        self.max_wait = settings.EMAIL_QUEUE_MAX_WAIT if max_wait is None else max_wait
+        self.bucket = get_bucket(self.provider)
+        self.connection = connection
+        self.sleep = sleep or time.sleep
+        self.lanes = {}
+        self._current = {}  # для smooth weighted round-robin
+        self.sent = 0
+
+    def __len__(self):
+        return sum(len(messages) for messages in self.lanes.values())
+
+    def put(self, message, lane="default", on_sent=None):
+        """on_sent - вызывается после успешной отправки письма."""
+        self.lanes.setdefault(lane, deque()).append((message, on_sent))
+
+    def _next_lane(self):
+        active = [lane for lane, messages in self.lanes.items() if messages]
+        total = sum(get_lane_share(lane) for lane in active)
+        for lane in active:
+            self._current[lane] = self._current.get(lane, 0) + get_lane_share(lane)
+        lane = max(active, key=self._current.get)
+        self._current[lane] -= total
+        return lane
+
+    def _next_batch(self):
+        batch = []
+        while self and len(batch) < self.batch_size:
+            lane = self._next_lane()
+            batch.append((lane, *self.lanes[lane].popleft()))
+        return batch
+
+    def _requeue(self, batch):
+        for lane, message, on_sent in reversed(batch):
+            self.lanes[lane].appendleft((message, on_sent))
+
+    def flush(self):
+        """Отправляет все письма, возвращает количество отправленных.
+
+        если провайдер ограничивает отправку дольше max_wait секунд - неотправленные
+        письма остаются в очереди и поднимается EmailThrottled.
+        """
+        bucket = self.bucket
+        waited = 0.0
+        while self:
+            batch = self._next_batch()
+            connection = self.connection or get_connection()
+            try:
+                # без open() send() каждого письма открывает и закрывает свою сессию:
+                connection.open()
+            except Exception:
+                self._requeue(batch)
+                raise
+            try:
+                while batch:
+                    lane, message, on_sent = batch[0]
+                    reserved, wait = bucket.reserve(lane)
+                    if waited + wait > self.max_wait:
+                        if reserved:
+                            bucket.cancel(lane)
+                        self._requeue(batch)
+                        raise EmailThrottled(wait, len(self))
+                    if wait:
+                        self.sleep(wait)
+                        waited += wait
+                    if not reserved:
+                        continue  # свободный токен появится после ожидания
+
+                    message.connection = connection  # одна сессия на пачку
+                    try:
+                        message.send()
+                    except Exception as exc:
+                        code = get_throttle_code(exc)
+                        if code is None:
+                            self._requeue(batch)
+                            raise
+                        rate = bucket.throttle()
+                        logger.warning(
+                            f"[THROTTLED] Provider: {self.provider} | Code: {code} "
+                            f"| Rate: {rate:.2f}/s"
+                        )
+                        # после 421 провайдер закрывает соединение - переоткрываю:
+                        self._requeue(batch)
+                        break
+
+                    batch.pop(0)
+                    bucket.recover()
+                    self.sent += 1
+                    if on_sent:
+                        on_sent(message)
+            finally:
+                connection.close()
+        return self.sent
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.7 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0009_task_notified"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobLease",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Имя задачи"
+                    ),
+                ),
+                (
+                    "owner",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        max_length=255,
+                        verbose_name="Владелец аренды",
+                    ),
+                ),
+                (
+                    "acquired_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Время захвата"
+                    ),
+                ),
+                (
+                    "renewed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Время продления"
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Истекает в"
+                    ),
+                ),
+                (
+                    "skipped_ticks",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Пропущено запусков"
+                    ),
+                ),
+                (
+                    "last_skipped_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Последний пропуск"
+                    ),
+                ),
+                (
+                    "takeovers",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Перехвачено просроченных аренд"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Аренда периодической задачи",
+                "verbose_name_plural": "Аренды периодических задач",
+            },
+        ),
+    ]
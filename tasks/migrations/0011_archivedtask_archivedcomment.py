@@ -0,0 +1,125 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0010_joblease"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTask",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="ID задачи"
+                    ),
+                ),
+                (
+                    "title",
+                    models.CharField(max_length=255, verbose_name="Название задачи"),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        blank=True, null=True, verbose_name="Описание задачи"
+                    ),
+                ),
+                (
+                    "status",
+                    models.IntegerField(
+                        choices=[(1, "to_do"), (2, "in_progress"), (3, "done")],
+                        verbose_name="Статус выполнения",
+                    ),
+                ),
+                ("deadline", models.DateTimeField(verbose_name="Срок выполнения")),
+                (
+                    "priority",
+                    models.IntegerField(
+                        choices=[(1, "low"), (2, "medium"), (3, "high")],
+                        verbose_name="Приоритет задачи",
+                    ),
+                ),
+                ("notified", models.BooleanField(default=False)),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время архивации"
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_tasks",
+                        to="tasks.category",
+                    ),
+                ),
+                (
+                    "executor",
+                    models.ManyToManyField(
+                        related_name="archived_task_executors",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Исполнитель задачи",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_task_owner",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Создатель задачи",
+                    ),
+                ),
+                (
+                    "tags",
+                    models.ManyToManyField(
+                        blank=True, related_name="archived_tasks", to="tasks.tag"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Архивная задача",
+                "verbose_name_plural": "Архивные задачи",
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedComment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("text", models.TextField(verbose_name="Текст комментария")),
+                ("created_at", models.DateTimeField(verbose_name="Время создания")),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_comment_author",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор комментария",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="comments",
+                        to="tasks.archivedtask",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Архивный комментарий",
+                "verbose_name_plural": "Архивные комментарии",
+            },
+        ),
+    ]
@@ -0,0 +1,119 @@
+from django.db import migrations
+
+# sql миграции не зависит от кода приложения (tasks.partitions может меняться);
+# имена секций те же, что у tasks.partitions.partition_name: tasks_comment_p2025_01
+TABLE = "tasks_comment"
+LEGACY_TABLE = f"{TABLE}_legacy"
+SEQUENCE = f"{TABLE}_id_seq_partitioned"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def recreate_constraints(schema_editor, Comment):
+    """Внешние ключи и индексы, которые django создает для Comment."""
+    for name in ("task", "author"):
+        field = Comment._meta.get_field(name)
+        schema_editor.execute(
+            schema_editor._create_fk_sql(
+                Comment, field, "_fk_%(to_table)s_%(to_column)s"
+            )
+        )
+        schema_editor.execute(schema_editor._create_index_sql(Comment, fields=[field]))
+
+
+def partition_comments(apps, schema_editor):
+    """Переводит tasks_comment в таблицу, секционированную по месяцам created_at.
+
+    первичный ключ секционированной таблицы обязан включать ключ секционирования - (id,
+    created_at), так что уникальность самого id база больше не проверяет. id выдается
+    одной последовательностью и явно не задается (tasks.models.Comment это проверяет).
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Comment = apps.get_model("tasks", "Comment")
+    execute = schema_editor.execute
+
+    execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+    execute(f'CREATE SEQUENCE "{SEQUENCE}"')
+    execute(
+        f'CREATE TABLE "{TABLE}" ('
+        f"id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'), "
+        "text text NOT NULL, "
+        "created_at timestamp with time zone NOT NULL, "
+        "author_id integer NOT NULL, "
+        "task_id bigint NOT NULL, "
+        f'CONSTRAINT "{TABLE}_partitioned_pkey" PRIMARY KEY (id, created_at)'
+        ") PARTITION BY RANGE (created_at)"
+    )
+    execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+    # месячные секции (границы - начало месяца по UTC) от самого старого комментария
+    # до третьего месяца вперед:
+    execute(
+        "DO $$ DECLARE first_day timestamp; BEGIN "
+        "FOR first_day IN SELECT generate_series(date_trunc('month', "
+        f'COALESCE((SELECT min(created_at) FROM "{LEGACY_TABLE}"), now()) '
+        "AT TIME ZONE 'UTC'), "
+        "date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months', "
+        "interval '1 month') LOOP "
+        "EXECUTE 'CREATE TABLE ' "
+        f"|| quote_ident('{TABLE}_p' || to_char(first_day, 'YYYY_MM')) "
+        f"|| ' PARTITION OF {TABLE} FOR VALUES FROM (' "
+        "|| quote_literal(first_day AT TIME ZONE 'UTC') || ') TO (' "
+        "|| quote_literal((first_day + interval '1 month') AT TIME ZONE 'UTC') "
+        "|| ')'; "
+        "END LOOP; END $$",
+        None,
+    )
+
+    execute(
+        f'INSERT INTO "{TABLE}" (id, text, created_at, author_id, task_id) '
+        f'SELECT id, text, created_at, author_id, task_id FROM "{LEGACY_TABLE}"'
+    )
+    execute(
+        f"SELECT setval('{SEQUENCE}', "
+        f'COALESCE((SELECT max(id) FROM "{TABLE}"), 0) + 1, false)'
+    )
+    execute(f'ALTER SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+    execute(f'DROP TABLE "{LEGACY_TABLE}"')
+    recreate_constraints(schema_editor, Comment)
+
+
+def unpartition_comments(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Comment = apps.get_model("tasks", "Comment")
+    execute = schema_editor.execute
+
+    execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+    execute(
+        f'CREATE TABLE "{TABLE}" ('
+        "id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+        "text text NOT NULL, "
+        "created_at timestamp with time zone NOT NULL, "
+        "author_id integer NOT NULL, "
+        "task_id bigint NOT NULL)"
+    )
+    execute(
+        f'INSERT INTO "{TABLE}" (id, text, created_at, author_id, task_id) '
+        f'SELECT id, text, created_at, author_id, task_id FROM "{LEGACY_TABLE}"'
+    )
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f'COALESCE((SELECT max(id) FROM "{TABLE}"), 0) + 1, false)'
+    )
+    # секции и последовательность удаляются вместе с родительской таблицей:
+    execute(f'DROP TABLE "{LEGACY_TABLE}" CASCADE')
+    recreate_constraints(schema_editor, Comment)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0011_archivedtask_archivedcomment"),
+    ]
+
+    # индекс (task, created_at, id) добавляет следующая миграция - один раз на все
+    # секции
+    operations = [
+        migrations.RunPython(partition_comments, unpartition_comments),
+    ]
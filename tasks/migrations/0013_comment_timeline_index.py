@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0012_partition_comments"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # на секционированной таблице (0012) индекс создается в каждой секции:
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["task", "created_at", "id"], name="comment_task_timeline_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.7 on 2026-10-18 23:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counters(apps, schema_editor):
+    """Заполняет счетчики у существующих задач одним запросом."""
+    Task = apps.get_model("tasks", "Task")
+    Comment = apps.get_model("tasks", "Comment")
+    comments = Comment.objects.filter(task=OuterRef("pk")).values("task")
+    Task.objects.update(
+        comments_count=Coalesce(
+            Subquery(comments.annotate(count=Count("id")).values("count")), 0
+        ),
+        last_activity_at=Subquery(
+            comments.annotate(latest=Max("created_at")).values("latest")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0013_comment_timeline_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedtask",
+            name="comments_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество комментариев"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Последний комментарий"
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="comments_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество комментариев"
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Последний комментарий"
+            ),
+        ),
+        migrations.RunPython(fill_comment_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["comments_count"], name="task_comments_count_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["last_activity_at"], name="task_last_activity_idx"
+            ),
+        ),
+    ]
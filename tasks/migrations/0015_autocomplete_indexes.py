@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# подсказки (tasks.autocomplete, бэкенд database) ищут по name__icontains и
+# name__istartswith - на postgres это UPPER(name::text) LIKE, поэтому индексы
+# строятся по тому же выражению: gin_trgm_ops - для подстроки, text_pattern_ops -
+# для префикса.
+TABLES = ("tasks_tag", "tasks_category")
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    execute = schema_editor.execute
+    execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TABLES:
+        execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_name_trgm_idx" ON "{table}" '
+            "USING gin (UPPER(name::text) gin_trgm_ops)"
+        )
+        execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_name_prefix_idx" ON "{table}" '
+            "(UPPER(name::text) text_pattern_ops)"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_name_trgm_idx"')
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_name_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0014_task_comment_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
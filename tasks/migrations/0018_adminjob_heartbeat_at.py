@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 00:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0017_adminjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adminjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Последняя пачка"
+            ),
+        ),
+    ]
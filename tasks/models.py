@@ -8,11 +8,42 @@ from django.utils import timezone
 User = get_user_model()
 
 
+class NameQuerySet(models.QuerySet):
+    """update() проходит мимо post_save - кэши имен (tasks.resolvers) сбрасываются
+    здесь; bulk_update вызывает update()."""
+
+    def update(self, **kwargs):
+        from tasks.resolvers import bump_generation  # resolvers импортирует модели
+
+        rows = super().update(**kwargs)
+        if rows:
+            bump_generation()
+        return rows
+
+
+def check_sequence_ids(comments):
+    """Id комментария выдает только последовательность (см.
+
+    Comment).
+    """
+    if any(comment.pk is not None for comment in comments):
+        raise ValueError("id комментария выдается последовательностью")
+
+
+class CommentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        check_sequence_ids(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Category(models.Model):
     name = models.CharField(
         max_length=255, unique=True, verbose_name="Название категории"
     )
 
+    objects = NameQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
@@ -24,6 +55,8 @@ class Category(models.Model):
 class Tag(models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name="Название тэга")
 
+    objects = NameQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Тэг"
         verbose_name_plural = "Тэги"
@@ -80,10 +113,26 @@ class Task(models.Model):
     )
     tags = models.ManyToManyField(Tag, blank=True)
     notified = models.BooleanField(default=False)
+    # счетчики комментариев поддерживаются tasks.counters, чтобы список задач
+    # не считал агрегаты по comments:
+    comments_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество комментариев"
+    )
+    last_activity_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последний комментарий"
+    )
 
     class Meta:
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(fields=["comments_count"], name="task_comments_count_idx"),
+            models.Index(fields=["last_activity_at"], name="task_last_activity_idx"),
+            # фильтры админки и api:
+            models.Index(fields=["status"], name="task_status_idx"),
+            models.Index(fields=["priority"], name="task_priority_idx"),
+            models.Index(fields=["deadline"], name="task_deadline_idx"),
+        ]
 
     def clean(self):
         """Проверяем, чтобы был хотя бы один исполнитель."""
@@ -103,6 +152,13 @@ class Task(models.Model):
 
 
 class Comment(models.Model):
+    """Комментарий к задаче.
+
+    на postgres первичный ключ секционированной таблицы - (id, created_at), поэтому
+    уникальность одного id база не проверяет; она держится на том, что id выдает только
+    последовательность и явно не задается (сидинг, архив, ChunkedDeleter его не пишут).
+    """
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(
         User,
@@ -113,9 +169,220 @@ class Comment(models.Model):
     text = models.TextField(verbose_name="Текст комментария")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        # на postgres таблица секционирована по created_at (tasks.partitions),
+        # комментарии задачи читаются по этому индексу в каждой секции;
+        # id - для курсоров ленты комментариев (tasks.pagination):
+        indexes = [
+            models.Index(
+                fields=["task", "created_at", "id"], name="comment_task_timeline_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            check_sequence_ids([self])
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Comment by {self.author} on {self.task}"
+
+
+class ArchivedTask(models.Model):
+    """Выполненная задача, перенесенная из Task архивацией (tasks.archive).
+
+    id сохраняется от исходной задачи; поля повторяют Task, чтобы к архиву применялись
+    те же фильтры и сериализация.
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID задачи")
+    title = models.CharField(max_length=255, verbose_name="Название задачи")
+    description = models.TextField(
+        blank=True, null=True, verbose_name="Описание задачи"
+    )
+    status = models.IntegerField(
+        choices=TaskStatus.choices, verbose_name="Статус выполнения"
+    )
+    deadline = models.DateTimeField(verbose_name="Срок выполнения")
+    priority = models.IntegerField(
+        choices=TaskPriority.choices, verbose_name="Приоритет задачи"
+    )
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="archived_task_owner",
+        verbose_name="Создатель задачи",
+    )
+    executor = models.ManyToManyField(
+        User, related_name="archived_task_executors", verbose_name="Исполнитель задачи"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_tasks",
+    )
+    tags = models.ManyToManyField(Tag, blank=True, related_name="archived_tasks")
+    notified = models.BooleanField(default=False)
+    comments_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество комментариев"
+    )
+    last_activity_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последний комментарий"
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True, verbose_name="Время архивации"
+    )
+
+    class Meta:
+        verbose_name = "Архивная задача"
+        verbose_name_plural = "Архивные задачи"
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(
+        ArchivedTask, on_delete=models.CASCADE, related_name="comments"
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="archived_comment_author",
+        verbose_name="Автор комментария",
+    )
+    text = models.TextField(verbose_name="Текст комментария")
+    created_at = models.DateTimeField(verbose_name="Время создания")
+
+    class Meta:
+        verbose_name = "Архивный комментарий"
+        verbose_name_plural = "Архивные комментарии"
+
+    def __str__(self):
+        return f"Comment by {self.author} on {self.task}"
+
+
+class JobLease(models.Model):
+    """Аренда (lease) периодической задачи.
+
+    не дает двум воркерам выполнять одну и ту же периодическую задачу одновременно;
+    владелец продлевает аренду, пока работает, просроченную аренду забирает другой
+    воркер; пропущенные из-за занятой аренды запуски считаются в skipped_ticks.
+    """
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="Имя задачи")
+    owner = models.CharField(
+        max_length=255, blank=True, default="", verbose_name="Владелец аренды"
+    )
+    acquired_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время захвата"
+    )
+    renewed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Время продления"
+    )
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Истекает в")
+    skipped_ticks = models.PositiveIntegerField(
+        default=0, verbose_name="Пропущено запусков"
+    )
+    last_skipped_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последний пропуск"
+    )
+    takeovers = models.PositiveIntegerField(
+        default=0, verbose_name="Перехвачено просроченных аренд"
+    )
+
+    class Meta:
+        verbose_name = "Аренда периодической задачи"
+        verbose_name_plural = "Аренды периодических задач"
+
+    def __str__(self):
+        return self.name
+
+
+class AdminJobStatus(models.TextChoices):
+    PENDING = "pending", "В очереди"
+    RUNNING = "running", "Выполняется"
+    DONE = "done", "Выполнено"
+    FAILED = "failed", "Ошибка"
+    CANCELLED = "cancelled", "Отменено"
+
+
+class AdminJob(models.Model):
+    """Массовое действие админки, выполняемое celery пачками (tasks.jobs).
+
+    processed/total - прогресс для страницы задания в админке, cancel_requested -
+    отмена: задание останавливается перед следующей пачкой; heartbeat_at - время
+    последней пачки: задание RUNNING без пачек дольше ADMIN_JOB_STALE_SECONDS
+    считается брошенным упавшим воркером (tasks.jobs.fail_stale_jobs).
+    """
+
+    action = models.CharField(max_length=64, verbose_name="Действие")
+    model = models.CharField(max_length=100, verbose_name="Модель")
+    object_ids = models.JSONField(default=list, verbose_name="ID объектов")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Параметры")
+    status = models.CharField(
+        max_length=16,
+        choices=AdminJobStatus.choices,
+        default=AdminJobStatus.PENDING,
+        verbose_name="Статус",
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Всего объектов")
+    processed = models.PositiveIntegerField(default=0, verbose_name="Обработано")
+    cancel_requested = models.BooleanField(default=False, verbose_name="Отмена")
+    error = models.TextField(blank=True, default="", verbose_name="Ошибка")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="admin_jobs",
+        verbose_name="Запустил",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начато")
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Последняя пачка"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершено")
+
+    class Meta:
+        verbose_name = "Фоновое действие админки"
+        verbose_name_plural = "Фоновые действия админки"
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"{self.action} {self.model} ({self.processed}/{self.total})"
+
+
+class DeadlineNotificationDelivery(models.Model):
+    """Письмо о дедлайне задачи, доставленное получателю.
+
+    tasks.tasks.deadline_notification при повторе после частичного сбоя smtp пропускает
+    уже уведомленных получателей; записи задачи удаляются, когда задача помечается
+    notified.
+    """
+
+    task = models.ForeignKey(
+        Task, on_delete=models.CASCADE, related_name="deadline_deliveries"
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    sent_at = models.DateTimeField(auto_now_add=True, verbose_name="Отправлено")
+
+    class Meta:
+        verbose_name = "Доставленное уведомление о дедлайне"
+        verbose_name_plural = "Доставленные уведомления о дедлайне"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "user"], name="deadline_delivery_task_user_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} -> {self.user_id}"
@@ -0,0 +1,151 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(comment):
+    position = f"{comment.created_at.isoformat()}|{comment.id}"
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(value):
+    """Курсор -> (created_at, id); принимает и просто дату-время в ISO (id = 0)."""
+    try:
+        created_at, pk = parse_datetime(value), 0
+        if created_at is None:
+            created_at, pk = urlsafe_b64decode(value.encode()).decode().split("|")
+            created_at, pk = parse_datetime(created_at), int(pk)
+    except ValueError:
+        created_at = None
+    if created_at is None:
+        raise ValidationError({"cursor": "Invalid cursor."})
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return created_at, pk
+
+
+class CommentTimelinePagination(BasePagination):
+    """Keyset-пагинация ленты комментариев по (created_at, id).
+
+    в отличие от limit/offset следующая страница начинается строго после последнего
+    комментария предыдущей - страницы не съезжают при добавлении новых комментариев
+    и читаются по индексу (task_id, created_at, id) без пропуска offset строк.
+
+    ?order=newest (по умолчанию) | oldest - направление ленты;
+    ?cursor= - продолжение из ссылки next;
+    ?since= - только комментарии новее курсора since из предыдущего ответа (или даты
+    ISO), от старых к новым - для дозагрузки новых комментариев.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get("page_size", self.page_size))
+        except ValueError:
+            page_size = self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        since = request.query_params.get("since")
+        cursor = request.query_params.get("cursor")
+        self.newest_first = (
+            request.query_params.get("order", "newest") != "oldest" and not since
+        )
+
+        if since:
+            queryset = queryset.filter(self.after(*decode_cursor(since)))
+        if cursor:
+            position = decode_cursor(cursor)
+            queryset = queryset.filter(
+                self.before(*position) if self.newest_first else self.after(*position)
+            )
+
+        if self.newest_first:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            queryset = queryset.order_by("created_at", "id")
+
+        page = list(queryset[: self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[: self.page_size]
+        return self.page
+
+    @staticmethod
+    def after(created_at, pk):
+        return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+    @staticmethod
+    def before(created_at, pk):
+        return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, "cursor", encode_cursor(self.page[-1]))
+
+    def get_since(self):
+        """Курсор самого нового комментария страницы - для следующего ?since=."""
+        if not self.page:
+            return self.request.query_params.get("since")
+        newest = self.page[0] if self.newest_first else self.page[-1]
+        return encode_cursor(newest)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "since": self.get_since(), "results": data}
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "since": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+def estimated_count(queryset):
+    """Оценка числа строк таблицы из статистики postgres (pg_class.reltuples) или None,
+    если оценки нет: не postgres, выборка с фильтром, таблица без ANALYZE."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql" or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для админки больших таблиц: без фильтров берет оценку числа строк
+    вместо COUNT(*) по всей таблице, если оценка больше ADMIN_ESTIMATED_COUNT_THRESHOLD;
+    маленькие таблицы и фильтры считаются точно."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
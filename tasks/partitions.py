@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+
+# комментарии на postgres хранятся в таблице, секционированной по месяцам created_at
+# (миграция 0012_partition_comments); на других бд секционирования нет.
+TABLE = "tasks_comment"
+# строки вне месячных секций (например, с датой дальше созданных секций):
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def partition_name(start):
+    return f"{TABLE}_p{start:%Y_%m}"
+
+
+def create_partition_sql(start):
+    """Секция на месяц, начинающийся со start: [start, start + 1 месяц)."""
+    end = add_months(start, 1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(start)}" '
+        f'PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def move_from_default_sql(start):
+    """Создание секции, когда в default уже есть строки ее месяца: postgres не создаст
+    такую секцию, пока строки лежат в default.
+
+    default отсоединяется, строки месяца переносятся в новую секцию, default
+    присоединяется обратно.
+    """
+    end = add_months(start, 1)
+    name = partition_name(start)
+    in_month = (
+        f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+    )
+    return [
+        f'ALTER TABLE "{TABLE}" DETACH PARTITION "{DEFAULT_PARTITION}"',
+        create_partition_sql(start),
+        f'INSERT INTO "{name}" SELECT * FROM "{DEFAULT_PARTITION}" WHERE {in_month}',
+        f'DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month}',
+        f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT',
+    ]
+
+
+def is_partitioned(connection=None):
+    connection = connection or default_connection
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def create_partition(start, cursor):
+    """Создает секцию месяца start, если ее нет; строки этого месяца из default
+    переносятся в нее."""
+    cursor.execute("SELECT to_regclass(%s)", [f'"{partition_name(start)}"'])
+    if cursor.fetchone()[0] is not None:
+        return
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" '
+        "WHERE created_at >= %s AND created_at < %s)",
+        [start, add_months(start, 1)],
+    )
+    (in_default,) = cursor.fetchone()
+    if in_default:
+        statements = move_from_default_sql(start)
+    else:
+        statements = [create_partition_sql(start)]
+    for sql in statements:
+        cursor.execute(sql)
+
+
+def create_partitions(start, end, connection=None):
+    """Создает месячные секции от месяца start до месяца end включительно, возвращает
+    имена секций."""
+    connection = connection or default_connection
+    names = []
+    current = month_start(start)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        while current <= end:
+            create_partition(current, cursor)
+            names.append(partition_name(current))
+            current = add_months(current, 1)
+    return names
+
+
+def list_partitions(connection=None):
+    """Секции таблицы комментариев: [(имя, верхняя граница)], кроме default."""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        if not name.startswith(f"{TABLE}_p"):
+            continue  # default-секция
+        # границы секции - из имени: tasks_comment_p2025_01
+        year, month = name.rsplit("_p", 1)[1].split("_")
+        start = datetime(int(year), int(month), 1, tzinfo=timezone.utc)
+        partitions.append((name, add_months(start, 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def detach_partitions(retention_months, now, connection=None):
+    """Отсоединяет секции, все комментарии которых старше retention_months месяцев.
+
+    отсоединенная секция остается отдельной таблицей - ее можно выгрузить и удалить,
+    не трогая рабочую таблицу; возвращает имена отсоединенных секций.
+    """
+    connection = connection or default_connection
+    cutoff = add_months(month_start(now), -retention_months)
+    detached = []
+    with connection.cursor() as cursor:
+        for name, end in list_partitions(connection):
+            if end <= cutoff:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                detached.append(name)
+    return detached
+
+
+def maintain_comment_partitions(now, ahead=None, retention_months=None):
+    """Создает секции на ahead месяцев вперед и, если задан retention_months,
+    отсоединяет старые; на бд без секционирования ничего не делает.
+
+    возвращает (созданные, отсоединенные).
+    """
+    if not is_partitioned():
+        return [], []
+    if ahead is None:
+        ahead = settings.COMMENT_PARTITIONS_AHEAD
+    if retention_months is None:
+        retention_months = settings.COMMENT_PARTITION_RETENTION_MONTHS
+
+    created = create_partitions(now, add_months(month_start(now), ahead))
+    detached = detach_partitions(retention_months, now) if retention_months else []
+    return created, detached
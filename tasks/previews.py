@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def attach_comments_preview(tasks, size=None):
+    """Кладет в task.comments_preview последние size комментариев каждой задачи.
+
+    один запрос на всю страницу: ROW_NUMBER() OVER (PARTITION BY task_id ORDER BY
+    created_at DESC) и отбор первых size строк в каждой задаче - вместо запроса
+    комментариев на каждую задачу.
+    """
+    size = size or settings.COMMENTS_PREVIEW_SIZE
+    tasks = list(tasks)
+    if not tasks:
+        return tasks
+    # Comment для задач и ArchivedComment для архивных:
+    comment_model = tasks[0]._meta.get_field("comments").related_model
+    comments = (
+        comment_model.objects.filter(task_id__in=[task.pk for task in tasks])
+        .select_related("author")
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F("task_id"),
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(row_number__lte=size)
+        .order_by("task_id", "row_number")
+    )
+    previews = {task.pk: [] for task in tasks}
+    for comment in comments:
+        previews[comment.task_id].append(comment)
+    for task in tasks:
+        task.comments_preview = previews[task.pk]
+    return tasks
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+from django.template.loader import get_template
+from django.utils.html import conditional_escape
+
+# маркер поля получателя, подставляется вместо значения при общем рендеринге:
+PLACEHOLDER = "\x00{}\x00"
+
+
+def task_snapshot(task):
+    """Плоский снимок задачи для шаблонов писем.
+
+    берутся только уже загруженные поля модели, поэтому рендеринг шаблона не может
+    выполнить ленивый запрос в бд (task.owner, task.executor и т.п.).
+    """
+    return {
+        "id": task.pk,
+        "title": task.title,
+        "description": task.description,
+        "deadline": task.deadline,
+        "status": task.get_status_display(),
+        "priority": task.get_priority_display(),
+    }
+
+
+class SharedRendering:
+    """Письмо, отрендеренное один раз с маркерами вместо полей получателя."""
+
+    def __init__(self, text, html, placeholders):
+        self.text = text
+        self.html = html
+        self.placeholders = placeholders
+
+    def for_recipient(self, **values):
+        """Подставляет значения получателя, возвращает (text, html)."""
+        text, html = self.text, self.html
+        for field, marker in self.placeholders.items():
+            # экранирую так же, как это сделал бы autoescape шаблона:
+            value = conditional_escape(values[field])
+            text = text.replace(marker, value)
+            html = html.replace(marker, value)
+        return text, html
+
+
+class NotificationTemplate:
+    """Пара скомпилированных шаблонов письма: name.txt и name.html."""
+
+    def __init__(self, name):
+        self.name = name
+        self.text = get_template(f"{name}.txt")
+        self.html = get_template(f"{name}.html")
+
+    def render(self, context):
+        return self.text.render(context), self.html.render(context)
+
+    def render_shared(self, context, recipient_fields=("username",)):
+        """Рендерит общую для всех получателей часть письма.
+
+        поля получателя заменяются маркерами и подставляются потом через
+        SharedRendering.for_recipient(); в шаблоне они должны выводиться как есть, без
+        фильтров.
+        """
+        placeholders = {field: PLACEHOLDER.format(field) for field in recipient_fields}
+        text, html = self.render({**context, **placeholders})
+        return SharedRendering(text, html, placeholders)
+
+
+@lru_cache(maxsize=None)
+def get_notification_template(name):
+    """Шаблоны компилируются один раз на процесс воркера."""
+    return NotificationTemplate(name)
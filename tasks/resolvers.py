@@ -0,0 +1,126 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from tasks.models import Category, Tag
+
+# общий для процессов счетчик (CACHES с CACHE_URL - redis): при переименовании или
+# удалении тэга/категории увеличивается, и остальные процессы сбрасывают свой кэш
+# имен, заметив новое значение; проверка - не чаще раза в NAME_RESOLVER_CHECK_SECONDS
+GENERATION_KEY = "tasks:name_resolvers:generation"
+
+# кэши процесса, сбрасываемые bump_generation сразу:
+_resolvers = weakref.WeakSet()
+
+
+def get_generation():
+    return cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+
+
+def bump_generation():
+    """Сбрасывает кэши имен: в этом процессе - сразу, в остальных - при следующей
+    проверке счетчика."""
+    for resolver in list(_resolvers):
+        resolver.clear()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:  # ключа еще нет
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+class NameResolver:
+    """Имена -> id тэгов/категорий: существующие находятся одним запросом IN,
+    недостающие создаются одним bulk_create(ignore_conflicts=True) - без гонки
+    get_or_create при параллельном создании задач.
+
+    найденные пары name -> id хранятся в LRU процесса (не больше maxsize).
+    """
+
+    def __init__(self, model, normalize, maxsize=None):
+        self.model = model
+        self.normalize = normalize
+        self.maxsize = maxsize or settings.NAME_RESOLVER_CACHE_SIZE
+        self._cache = OrderedDict()
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        _resolvers.add(self)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _check_generation(self):
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < settings.NAME_RESOLVER_CHECK_SECONDS
+        ):
+            return
+        generation = get_generation()
+        with self._lock:
+            if generation != self._generation:
+                self._cache.clear()
+                self._generation = generation
+            self._checked_at = now
+
+    def _from_cache(self, names):
+        self._check_generation()
+        with self._lock:
+            found = {}
+            for name in names:
+                if name in self._cache:
+                    self._cache.move_to_end(name)
+                    found[name] = self._cache[name]
+            return found
+
+    def _to_cache(self, ids):
+        with self._lock:
+            self._cache.update(ids)
+            for name in ids:
+                self._cache.move_to_end(name)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def _lookup(self, names):
+        return dict(self.model.objects.filter(name__in=names).values_list("name", "id"))
+
+    def resolve(self, names):
+        """Возвращает id для каждого имени (без повторов, в порядке имен), недостающие
+        объекты создаются."""
+        names = list(dict.fromkeys(self.normalize(name) for name in names))
+        ids = self._from_cache(names)
+
+        missing = [name for name in names if name not in ids]
+        if missing:
+            found = self._lookup(missing)
+            new = [name for name in missing if name not in found]
+            if new:
+                # параллельно созданные имена пропускаются, id берутся из бд:
+                self.model.objects.bulk_create(
+                    [self.model(name=name) for name in new], ignore_conflicts=True
+                )
+                found.update(self._lookup(new))
+            # в кэш - только после коммита: при откате созданных id уже нет
+            transaction.on_commit(partial(self._to_cache, found))
+            ids.update(found)
+
+        return [ids[name] for name in names]
+
+
+def normalize_tag(name):
+    return name.strip().capitalize()
+
+
+def normalize_category(name):
+    return name.strip()
+
+
+tag_resolver = NameResolver(Tag, normalize_tag)
+category_resolver = NameResolver(Category, normalize_category)
@@ -0,0 +1,62 @@
+import time
+
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.rendering import get_notification_template, task_snapshot
+
+TEMPLATE = "notifications/deadline_notification"
+
+
+def render_naive(task, usernames):
+    # как раньше: оба шаблона рендерятся с нуля на каждого получателя
+    for username in usernames:
+        context = {"task": task, "username": username}
+        render_to_string(f"{TEMPLATE}.txt", context)
+        render_to_string(f"{TEMPLATE}.html", context)
+
+
+def render_shared(task, usernames):
+    rendered = get_notification_template(TEMPLATE).render_shared(
+        {"task": task_snapshot(task)}
+    )
+    for username in usernames:
+        rendered.for_recipient(username=username)
+
+
+def measure(render, tasks, usernames):
+    start = time.perf_counter()
+    for task in tasks:
+        render(task, usernames)
+    return time.perf_counter() - start
+
+
+def run(emails=10000, recipients_per_task=3):
+    """Стоимость рендеринга писем о дедлайне на 10k писем.
+
+    python manage.py runscript benchmark_notification_rendering
+    --script-args 10000 3
+    """
+    emails = int(emails)
+    recipients_per_task = int(recipients_per_task)
+    # задачи не сохраняются в бд - измеряется только рендеринг:
+    tasks = [
+        Task(id=i, title=f"Task {i}", deadline=timezone.now())
+        for i in range(emails // recipients_per_task)
+    ]
+    usernames = [f"user{i}" for i in range(recipients_per_task)]
+    sent = len(tasks) * len(usernames)
+
+    render_shared(tasks[0], usernames)  # прогрев: компиляция шаблонов
+    naive = measure(render_naive, tasks, usernames)
+    shared = measure(render_shared, tasks, usernames)
+
+    per_10k = 10000 / sent
+    print(f"Emails rendered: {sent} ({recipients_per_task} recipients per task)")
+    print(f"render_to_string per recipient: {naive * per_10k:.3f} s / 10k emails")
+    print(f"shared rendering engine:        {shared * per_10k:.3f} s / 10k emails")
+    print(f"speedup: x{naive / shared:.1f}")
+
+
+# python manage.py runscript benchmark_notification_rendering
@@ -0,0 +1,67 @@
+from django.db import connection
+
+from tasks.explain import (
+    CRITICAL_QUERIES,
+    capture,
+    compare,
+    load_snapshot,
+    save_snapshot,
+)
+
+# таблицы критичных запросов - статистика планировщика обновляется перед замером:
+TABLES = [
+    "tasks_task",
+    "tasks_task_executor",
+    "tasks_task_tags",
+    "tasks_tag",
+    "tasks_category",
+    "tasks_comment",
+    "auth_user",
+]
+
+
+def run(*args):
+    """Планы EXPLAIN критичных запросов против снимков tasks/explain_snapshots.
+
+    запускать на бд с данными (runscript seed_bulk): на пустых таблицах postgres
+    выбирает seq scan. update - перезаписать снимок текущими планами; остальные
+    аргументы - имена запросов (по умолчанию все). при регрессии (seq scan вместо
+    индекса, потерянный индекс) - код выхода 1.
+    """
+    update = "update" in args
+    names = [name for name in args if name != "update"] or list(CRITICAL_QUERIES)
+    unknown = set(names) - set(CRITICAL_QUERIES)
+    if unknown:
+        raise SystemExit(f"Unknown queries: {', '.join(sorted(unknown))}")
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {', '.join(TABLES)}")
+    plans = capture(names)
+    snapshot = load_snapshot()
+
+    if update:
+        save_snapshot({**snapshot, **plans})
+        print(f"Saved {len(plans)} plans for {connection.vendor}.")
+        return
+
+    missing = [name for name in names if name not in snapshot]
+    regressions, changes = compare(plans, snapshot)
+    for name in changes:
+        print(f"[CHANGED] {name}:")
+        print("  was: " + " | ".join(line.strip() for line in snapshot[name]))
+        print("  now: " + " | ".join(line.strip() for line in plans[name]))
+    for name in missing:
+        print(f"[NO SNAPSHOT] {name} (runscript explain_plans --script-args update)")
+    for regression in regressions:
+        print(f"[REGRESSION] {regression}")
+    print(
+        f"Checked {len(names) - len(missing)} plans: {len(regressions)} regressions, "
+        f"{len(changes)} changed, {len(missing)} without snapshot."
+    )
+    if regressions or missing:
+        raise SystemExit(1)
+
+
+# python manage.py runscript explain_plans
+# python manage.py runscript explain_plans --script-args update
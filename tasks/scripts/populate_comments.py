@@ -1,21 +1,17 @@
 import logging
 
-from tasks.factories import CommentFactory
+from tasks.seeding import BulkSeeder
 
 logger = logging.getLogger("data_fixtures")
 
 
 def run(n=60):
     logger.info("Creation of comments...")
-    count = 0
-    for _ in range(n):
-        try:
-            comment = CommentFactory()
-            if not comment or not comment.id:
-                raise ValueError("Failed to create comment")
-            count += 1
-        except Exception:
-            logger.exception("Failed to create comment")
+    try:
+        count = BulkSeeder().seed_comments(int(n))
+    except Exception:
+        logger.exception("Failed to create comments")
+        return
     logger.info(f"{count} comments from {n} successfully created.")
 
 
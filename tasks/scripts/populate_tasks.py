@@ -1,21 +1,17 @@
 import logging
 
-from tasks.factories import TaskFactory
+from tasks.seeding import BulkSeeder
 
 logger = logging.getLogger("data_fixtures")
 
 
 def run(n=50):
     logger.info("Creation of tasks...")
-    count = 0
-    for _ in range(n):
-        try:
-            task = TaskFactory()
-            if not task or not task.id:
-                raise ValueError("Failed to create task")
-            count += 1
-        except Exception:
-            logger.exception("Failed to create task")
+    try:
+        count = BulkSeeder().seed_tasks(int(n))
+    except Exception:
+        logger.exception("Failed to create tasks")
+        return
     logger.info(f"{count} tasks from {n} successfully created.")
 
 
@@ -0,0 +1,19 @@
+import logging
+
+from tasks.counters import reconcile_comment_counters
+
+logger = logging.getLogger("data_fixtures")
+
+
+def run(batch_size=1000):
+    """Исправляет расхождения comments_count / last_activity_at у задач с реальными
+    комментариями (после скриптов и bulk-операций в обход api)."""
+
+    def log_progress(checked, fixed):
+        logger.info(f"Checked {checked} tasks, fixed {fixed}")
+
+    checked, fixed = reconcile_comment_counters(int(batch_size), log_progress)
+    print(f"Checked {checked} tasks, fixed {fixed}.")
+
+
+# python manage.py runscript reconcile_comment_counters --script-args 5000
@@ -0,0 +1,32 @@
+from tasks.smtp_stub import StubSMTPServer
+
+
+def run(port=1025, throttle_after=None, throttle_code=421, throttle_times=1):
+    """Запускает локальный SMTP-сервер вместо провайдера.
+
+    все письма печатаются в консоль; throttle_after позволяет проверить поведение
+    очереди писем, когда провайдер отвечает 421/450.
+    """
+    server = StubSMTPServer(
+        port=int(port),
+        throttle_after=int(throttle_after) if throttle_after else None,
+        throttle_code=int(throttle_code),
+        throttle_times=int(throttle_times),
+    )
+    print(f"Stub SMTP server listening on {server.host}:{server.port}")
+    server.start()
+    printed = 0
+    try:
+        while True:
+            server._thread.join(timeout=1)
+            for envelope, message in server.messages[printed:]:
+                print(
+                    f"[{envelope['from']} -> {', '.join(envelope['to'])}] "
+                    f"{message['Subject']}"
+                )
+            printed = len(server.messages)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+# python manage.py runscript run_smtp_stub --script-args 1025 10
@@ -0,0 +1,25 @@
+import logging
+
+from tasks.seeding import BulkSeeder
+
+logger = logging.getLogger("data_fixtures")
+
+
+def run(users=1000, tasks=10000, comments=50000, workers=1, tags=50, categories=10):
+    """Большой набор данных для нагрузочных тестов и бенчмарков (tasks.seeding)."""
+
+    def log_progress(stage, done, total):
+        logger.info(f"Seeding {stage}: {done}/{total}")
+
+    created = BulkSeeder(progress=log_progress).seed(
+        users=int(users),
+        tasks=int(tasks),
+        comments=int(comments),
+        tags=int(tags),
+        categories=int(categories),
+        workers=int(workers),
+    )
+    print(", ".join(f"{stage}: {count}" for stage, count in created.items()))
+
+
+# python manage.py runscript seed_bulk --script-args 10000 1000000 5000000 4
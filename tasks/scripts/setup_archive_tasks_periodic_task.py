@@ -0,0 +1,28 @@
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+def run():
+    """Создает периодическую задачу celery-beat, которая переносит выполненные задачи с
+    комментариями в архив."""
+
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=1, period=IntervalSchedule.DAYS
+    )
+
+    task, created = PeriodicTask.objects.update_or_create(
+        name="Архивация выполненных задач",
+        task="tasks.tasks.archive_tasks",
+        defaults={
+            "interval": schedule,
+            "queue": "low_priority",
+        },
+    )
+
+    if created:
+        print(f"Периодическая задача '{task.name}' создана.")
+
+    else:
+        print(f"Периодическая задача '{task.name}' обновлена.")
+
+
+# python manage.py runscript setup_archive_tasks_periodic_task
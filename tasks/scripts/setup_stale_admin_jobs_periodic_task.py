@@ -0,0 +1,28 @@
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+def run():
+    """Создает периодическую задачу celery-beat, которая помечает FAILED задания
+    админки, брошенные упавшим воркером."""
+
+    schedule, _ = IntervalSchedule.objects.get_or_create(
+        every=5, period=IntervalSchedule.MINUTES
+    )
+
+    task, created = PeriodicTask.objects.update_or_create(
+        name="Зависшие фоновые действия админки",
+        task="tasks.tasks.fail_stale_admin_jobs",
+        defaults={
+            "interval": schedule,
+            "queue": "low_priority",
+        },
+    )
+
+    if created:
+        print(f"Периодическая задача '{task.name}' создана.")
+
+    else:
+        print(f"Периодическая задача '{task.name}' обновлена.")
+
+
+# python manage.py runscript setup_stale_admin_jobs_periodic_task
@@ -0,0 +1,352 @@
+import io
+import multiprocessing
+import random
+import uuid
+from array import array
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from tasks.counters import reconcile_comment_counters
+from tasks.models import Category, Comment, Tag, Task, TaskPriority, TaskStatus
+
+User = get_user_model()
+
+WORDS = (
+    "api backend frontend deploy review release bug fix refactor test database "
+    "cache queue worker migration index query report design spec meeting client "
+    "server docs update check investigate support feature module schema endpoint"
+).split()
+DEFAULT_CATEGORIES = ("Feature", "Improvement", "Documentation", "Research", "Testing")
+DEFAULT_TAGS = ("architecture", "backend", "frontend", "bugs", "database")
+DEFAULT_PASSWORD = "defaultpassword123"  # как у UserFactory
+
+# доли значений - примерно как в живой базе:
+MANAGER_SHARE = 0.2
+ACTIVE_SHARE = 0.9
+NO_CATEGORY_SHARE = 0.1
+OWNER_IS_AUTHOR_SHARE = 0.3
+STATUS_WEIGHTS = {TaskStatus.TO_DO: 35, TaskStatus.IN_PROGRESS: 25, TaskStatus.DONE: 40}
+PRIORITY_WEIGHTS = {
+    TaskPriority.LOW: 50,
+    TaskPriority.MEDIUM: 35,
+    TaskPriority.HIGH: 15,
+}
+EXECUTORS_WEIGHTS = {1: 60, 2: 30, 3: 10}
+TAGS_WEIGHTS = {0: 20, 1: 40, 2: 30, 3: 10}
+COMMENT_AGE_DAYS = 30  # средний возраст комментария (экспоненциальное распределение)
+
+
+def zipf_weights(count, exponent=1.0):
+    """Накопленные веса закона Ципфа: немногие популярные, длинный хвост редких."""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def cumulative(weights):
+    """{значение: вес} -> (значения, накопленные веса) для random.choices."""
+    return list(weights), list(accumulate(weights.values()))
+
+
+class Pools:
+    """id, из которых выбираются связи, - загружаются один раз, а не выборкой
+    queryset на каждую строку."""
+
+    def __init__(self):
+        self.managers = array("q")
+        self.users = array("q")
+        self.tasks = array("q")
+        self.task_owners = array("q")  # владелец задачи self.tasks[i]
+        self.tags = array("q")
+        self.categories = array("q")
+
+    def load(self):
+        self.managers = array(
+            "q",
+            User.objects.filter(groups__name="manager").values_list("id", flat=True),
+        )
+        self.users = array(
+            "q", User.objects.filter(groups__name="user").values_list("id", flat=True)
+        )
+        self.tasks, self.task_owners = array("q"), array("q")
+        for task_id, owner_id in Task.objects.values_list("id", "owner_id").iterator():
+            self.tasks.append(task_id)
+            self.task_owners.append(owner_id)
+        self.tags = array("q", Tag.objects.values_list("id", flat=True))
+        self.categories = array("q", Category.objects.values_list("id", flat=True))
+        return self
+
+
+class BulkSeeder:
+    """Генератор больших объемов тестовых данных: пользователи, тэги, категории, задачи
+    с исполнителями и тэгами, комментарии.
+
+    строки пишутся пачками по batch_size через bulk_create, а на postgres связи и
+    комментарии - через COPY; комментарии можно писать в несколько процессов.
+    распределения - неравномерные: популярные тэги/менеджеры/задачи встречаются
+    намного чаще остальных.
+
+    seeder = BulkSeeder(seed=1)
+    seeder.seed(users=10_000, tasks=1_000_000, comments=5_000_000, workers=4)
+    """
+
+    def __init__(self, batch_size=None, seed=None, use_copy=None, progress=None):
+        """progress(stage, done, total) - вызывается после каждой пачки."""
+        self.batch_size = batch_size or settings.SEEDING_BATCH_SIZE
+        self.seed_value = seed
+        self.random = random.Random(seed)
+        self.use_copy = (
+            connection.vendor == "postgresql" if use_copy is None else use_copy
+        )
+        self.progress = progress
+        self.pools = None
+        self.now = timezone.now()
+
+    def get_pools(self):
+        if self.pools is None:
+            self.pools = Pools().load()
+        return self.pools
+
+    def report(self, stage, done, total):
+        if self.progress:
+            self.progress(stage, done, total)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def text(self, low, high):
+        return " ".join(self.random.choices(WORDS, k=self.random.randint(low, high)))
+
+    def write(self, model, objects, columns):
+        """Пачка строк без возврата id: COPY на postgres, иначе bulk_create."""
+        if not objects:
+            return
+        if not self.use_copy:
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+            return
+        buffer = io.StringIO()
+        for obj in objects:
+            values = (getattr(obj, column) for column in columns)
+            buffer.write("\t".join(copy_value(value) for value in values) + "\n")
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(model._meta.db_table)} "
+                f"({', '.join(quote(column) for column in columns)}) FROM STDIN",
+                buffer,
+            )
+
+    def seed_users(self, count):
+        pools = self.get_pools()
+        groups = {
+            name: Group.objects.get_or_create(name=name)[0]
+            for name in ("manager", "user")
+        }
+        membership = User.groups.through
+        password = make_password(DEFAULT_PASSWORD)  # хэш считается один раз
+        prefix = f"seed_{uuid.uuid4().hex[:8]}_"
+        done = 0
+        for size in self.batches(count):
+            users = [
+                User(
+                    username=f"{prefix}{done + n}",
+                    email=f"{prefix}{done + n}@example.com",
+                    password=password,
+                    is_active=self.random.random() < ACTIVE_SHARE,
+                    date_joined=self.now,
+                )
+                for n in range(size)
+            ]
+            with transaction.atomic():
+                users = User.objects.bulk_create(users)
+                links = []
+                for user in users:
+                    is_manager = self.random.random() < MANAGER_SHARE
+                    (pools.managers if is_manager else pools.users).append(user.pk)
+                    links.append(
+                        membership(
+                            user_id=user.pk,
+                            group=groups["manager" if is_manager else "user"],
+                        )
+                    )
+                membership.objects.bulk_create(links)
+            done += size
+            self.report("users", done, count)
+        return done
+
+    def seed_taxonomy(self, tags=0, categories=0):
+        """Стандартные тэги/категории и еще tags/categories сгенерированных."""
+        pools = self.get_pools()
+        for model, defaults, count, pool in (
+            (Tag, DEFAULT_TAGS, tags, pools.tags),
+            (Category, DEFAULT_CATEGORIES, categories, pools.categories),
+        ):
+            names = [*defaults, *(f"{self.text(1, 2)} {n}" for n in range(count))]
+            model.objects.bulk_create(
+                [model(name=name) for name in names], ignore_conflicts=True
+            )
+            pool[:] = array("q", model.objects.values_list("id", flat=True))
+        return len(pools.tags), len(pools.categories)
+
+    def seed_tasks(self, count):
+        pools = self.get_pools()
+        if not pools.managers or not pools.users:
+            raise ValueError("Seed users with manager and user groups first.")
+        if not pools.tags or not pools.categories:
+            self.seed_taxonomy()
+
+        owner_weights = zipf_weights(len(pools.managers))
+        executor_weights = zipf_weights(len(pools.users), 0.5)
+        tag_weights = zipf_weights(len(pools.tags), 1.1)
+        category_weights = zipf_weights(len(pools.categories))
+        statuses, status_weights = cumulative(STATUS_WEIGHTS)
+        priorities, priority_weights = cumulative(PRIORITY_WEIGHTS)
+        executor_counts, executor_count_weights = cumulative(EXECUTORS_WEIGHTS)
+        tag_counts, tag_count_weights = cumulative(TAGS_WEIGHTS)
+        executors_through, tags_through = Task.executor.through, Task.tags.through
+        choices = self.random.choices
+
+        done = 0
+        for size in self.batches(count):
+            tasks = [
+                Task(
+                    title=self.text(3, 8).capitalize(),
+                    description=self.text(8, 30),
+                    status=choices(statuses, cum_weights=status_weights)[0],
+                    priority=choices(priorities, cum_weights=priority_weights)[0],
+                    deadline=self.now + timedelta(days=self.random.uniform(-60, 30)),
+                    owner_id=choices(pools.managers, cum_weights=owner_weights)[0],
+                    category_id=(
+                        None
+                        if self.random.random() < NO_CATEGORY_SHARE
+                        else choices(pools.categories, cum_weights=category_weights)[0]
+                    ),
+                    notified=False,
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(tasks)
+                executors, tags = [], []
+                for task in tasks:
+                    pools.tasks.append(task.pk)
+                    pools.task_owners.append(task.owner_id)
+                    k = choices(executor_counts, cum_weights=executor_count_weights)[0]
+                    for user_id in set(
+                        choices(pools.users, cum_weights=executor_weights, k=k)
+                    ):
+                        executors.append(
+                            executors_through(task_id=task.pk, user_id=user_id)
+                        )
+                    k = choices(tag_counts, cum_weights=tag_count_weights)[0]
+                    for tag_id in set(
+                        choices(pools.tags, cum_weights=tag_weights, k=k)
+                    ):
+                        tags.append(tags_through(task_id=task.pk, tag_id=tag_id))
+                self.write(executors_through, executors, ("task_id", "user_id"))
+                self.write(tags_through, tags, ("task_id", "tag_id"))
+            done += size
+            self.report("tasks", done, count)
+        return done
+
+    def seed_comments(self, count, workers=1):
+        """Комментарии к задачам (популярные задачи обсуждают чаще); при workers > 1
+        - в нескольких процессах (не для sqlite в памяти)."""
+        pools = self.get_pools()
+        if not pools.tasks:
+            raise ValueError("Seed tasks first.")
+        workers = max(1, min(workers, count))
+        if workers == 1 or connection.vendor == "sqlite":
+            return self._seed_comments(count)
+
+        shares = [count // workers + (n < count % workers) for n in range(workers)]
+        seeds = [self.random.getrandbits(32) for _ in range(workers)]
+        connections.close_all()  # у каждого процесса - свое соединение
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            done = pool.starmap(
+                _comments_worker,
+                [
+                    (self.batch_size, seed, self.use_copy, pools, share)
+                    for seed, share in zip(seeds, shares)
+                ],
+            )
+        self.report("comments", sum(done), count)
+        return sum(done)
+
+    def _seed_comments(self, count):
+        pools = self.pools
+        # популярность задачи не зависит от ее id:
+        order = list(range(len(pools.tasks)))
+        self.random.shuffle(order)
+        task_weights = zipf_weights(len(order))
+        authors = pools.users or pools.managers
+        done = 0
+        for size in self.batches(count):
+            comments = []
+            for index in self.random.choices(order, cum_weights=task_weights, k=size):
+                author = (
+                    pools.task_owners[index]
+                    if self.random.random() < OWNER_IS_AUTHOR_SHARE
+                    else self.random.choice(authors)
+                )
+                age = timedelta(days=self.random.expovariate(1 / COMMENT_AGE_DAYS))
+                comments.append(
+                    Comment(
+                        task_id=pools.tasks[index],
+                        author_id=author,
+                        text=self.text(4, 20),
+                        created_at=self.now - age,
+                    )
+                )
+            with transaction.atomic():
+                self.write(
+                    Comment, comments, ("task_id", "author_id", "text", "created_at")
+                )
+            done += size
+            self.report("comments", done, count)
+        return done
+
+    def seed(self, users=0, tasks=0, comments=0, tags=0, categories=0, workers=1):
+        """Все этапы по порядку; счетчики комментариев задач пересчитываются в конце.
+
+        возвращает {этап: создано строк}.
+        """
+        created = {"users": self.seed_users(users) if users else 0}
+        created["tags"], created["categories"] = self.seed_taxonomy(tags, categories)
+        created["tasks"] = self.seed_tasks(tasks) if tasks else 0
+        created["comments"] = self.seed_comments(comments, workers) if comments else 0
+        if comments:
+            reconcile_comment_counters(self.batch_size)
+        return created
+
+
+def _comments_worker(batch_size, seed, use_copy, pools, count):
+    seeder = BulkSeeder(batch_size=batch_size, seed=seed, use_copy=use_copy)
+    seeder.pools = pools
+    try:
+        return seeder._seed_comments(count)
+    finally:
+        connections.close_all()
+
+
+def copy_value(value):
+    """Значение для текстового формата COPY."""
+    if value is None:
+        return r"\N"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
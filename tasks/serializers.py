@@ -3,7 +3,16 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from .models import Category, Comment, Tag, Task, TaskPriority, TaskStatus
+from .models import (
+    ArchivedTask,
+    Category,
+    Comment,
+    Tag,
+    Task,
+    TaskPriority,
+    TaskStatus,
+)
+from .resolvers import category_resolver, tag_resolver
 
 User = get_user_model()
 
@@ -30,13 +39,9 @@ class TagListField(serializers.ListField):
         return [tag.name for tag in instance.all()]  # instance.all() - все теги задачи
 
     def create_or_get_tags(self, tag_names):
-        """Return list of tag objects."""
-        tags = []
-        for tag_name in tag_names:
-            tag_name = tag_name.strip().capitalize()
-            tag, _ = Tag.objects.get_or_create(name=tag_name)
-            tags.append(tag)
-        return tags  # дубликаты удалятся при task.tags.set(tags)
+        """Return list of tag ids."""
+        # один запрос на все тэги вместо get_or_create на каждый:
+        return tag_resolver.resolve(tag_names)
 
 
 @extend_schema_field(OpenApiTypes.STR)
@@ -55,7 +60,29 @@ class LabelChoiceField(serializers.ChoiceField):
         self.fail("invalid_choice", input=data)
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class CommentPreviewSerializer(serializers.Serializer):
+    """Комментарий в превью задачи (?include=comments_preview)."""
+
+    id = serializers.IntegerField()
+    author = serializers.CharField(source="author.username")
+    text = serializers.CharField()
+    created_at = serializers.DateTimeField()
+
+
+class CommentsPreviewMixin:
+    """Добавляет comments_preview, если оно приложено к задаче
+    (tasks.previews.attach_comments_preview)."""
+
+    def to_representation(self, instance):
+        rep = super().to_representation(instance)
+        if hasattr(instance, "comments_preview"):
+            rep["comments_preview"] = CommentPreviewSerializer(
+                instance.comments_preview, many=True
+            ).data
+        return rep
+
+
+class TaskSerializer(CommentsPreviewMixin, serializers.ModelSerializer):
     """Сериализатор для модели задач."""
 
     owner = serializers.HiddenField(
@@ -94,7 +121,10 @@ class TaskSerializer(serializers.ModelSerializer):
             "tags",
             "priority",
             "status",
+            "comments_count",
+            "last_activity_at",
         ]
+        read_only_fields = ["comments_count", "last_activity_at"]
         extra_kwargs = {
             "title": {"help_text": "Название задачи"},
             "description": {"help_text": "Описание задачи"},
@@ -103,19 +133,22 @@ class TaskSerializer(serializers.ModelSerializer):
         }
 
     def create_or_get_category(self, category_name):
-        category_name = category_name.strip()  # убираю пробелы, исключая дублирование
-        category, _ = Category.objects.get_or_create(name=category_name)
-        return category
+        """Return category id."""
+        # имя нормализуется (strip), исключая дублирование:
+        [category_id] = category_resolver.resolve([category_name])
+        return category_id
 
     def create(self, validated_data):
         category_data = validated_data.pop("category", None)
         tags_data = validated_data.pop("tags", [])
         executor = validated_data.pop("executor")
 
-        category = self.create_or_get_category(category_data) if category_data else None
+        category_id = (
+            self.create_or_get_category(category_data) if category_data else None
+        )
         tags = TagListField().create_or_get_tags(tags_data)
 
-        task = Task.objects.create(category=category, **validated_data)
+        task = Task.objects.create(category_id=category_id, **validated_data)
         task.executor.set(executor)
         task.tags.set(tags)
         return task
@@ -126,8 +159,7 @@ class TaskSerializer(serializers.ModelSerializer):
         validated_data.pop("owner", None)  # not change owner if update
 
         if category_data:
-            category = self.create_or_get_category(category_data)
-            instance.category = category
+            instance.category_id = self.create_or_get_category(category_data)
 
         if tags_data:
             tags = TagListField().create_or_get_tags(tags_data)
@@ -146,6 +178,33 @@ class TaskSerializer(serializers.ModelSerializer):
         return rep
 
 
+class ArchivedTaskSerializer(CommentsPreviewMixin, serializers.ModelSerializer):
+    """Сериализатор архивных задач - только для чтения."""
+
+    tags = TagListField(read_only=True)
+    category = serializers.CharField(source="category.name", default=None)
+    status = LabelChoiceField(choices=TaskStatus.choices, read_only=True)
+    priority = LabelChoiceField(choices=TaskPriority.choices, read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = [
+            "id",
+            "title",
+            "description",
+            "deadline",
+            "executor",
+            "category",
+            "tags",
+            "priority",
+            "status",
+            "comments_count",
+            "last_activity_at",
+            "archived_at",
+        ]
+        read_only_fields = fields
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для модели комментариев."""
 
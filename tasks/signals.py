@@ -0,0 +1,70 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from tasks.autocomplete import index
+from tasks.models import Category, Tag, Task
+from tasks.resolvers import bump_generation
+
+KINDS = {Tag: "tag", Category: "category"}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def name_changed(sender, instance, created, **kwargs):
+    # новое имя кэшу не мешает, переименование - сбрасываю:
+    if not created:
+        bump_generation()
+    transaction.on_commit(
+        partial(index.upsert, KINDS[sender], instance.pk, instance.name)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def name_deleted(sender, instance, **kwargs):
+    bump_generation()
+    transaction.on_commit(partial(index.remove, KINDS[sender], instance.pk))
+
+
+# популярность в индексе подсказок. удаление задач ChunkedDeleter (без сигналов)
+# и смена категории не отслеживаются - их догоняет периодическая
+# перезагрузка индекса.
+@receiver(m2m_changed, sender=Task.tags.through)
+def task_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # после очистки уже не узнать, какие тэги были:
+        if reverse:
+            tags, delta = [instance.pk], -instance.task_set.count()
+        else:
+            tags, delta = list(instance.tags.values_list("id", flat=True)), -1
+    elif action in ("post_add", "post_remove") and pk_set:
+        sign = 1 if action == "post_add" else -1
+        if reverse:
+            tags, delta = [instance.pk], sign * len(pk_set)
+        else:
+            tags, delta = pk_set, sign
+    else:
+        return
+    transaction.on_commit(partial(index.add_usage, "tag", list(tags), delta))
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    if created and instance.category_id:
+        transaction.on_commit(
+            partial(index.add_usage, "category", [instance.category_id], 1)
+        )
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    if index.loaded:
+        tags = list(instance.tags.values_list("id", flat=True))
+        transaction.on_commit(partial(index.add_usage, "tag", tags, -1))
+    if instance.category_id:
+        transaction.on_commit(
+            partial(index.add_usage, "category", [instance.category_id], -1)
+        )
@@ -0,0 +1,120 @@
+import email
+import socketserver
+import threading
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный диалог SMTP: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            # точка в начале строки экранируется клиентом удвоением:
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        self.reply("220 localhost stub ESMTP")
+        envelope = {"from": None, "to": []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                code = server.next_mail_code()
+                if code != 250:
+                    self.reply(f"{code} Too many messages, slow down")
+                    if code == 421:  # 421 - сервер закрывает соединение
+                        break
+                    continue
+                envelope = {"from": command[10:].strip("<> "), "to": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                message = email.message_from_bytes(self.read_data())
+                with server.lock:
+                    server.messages.append((envelope, message))
+                self.reply("250 OK: queued")
+            elif verb == "RSET":
+                envelope = {"from": None, "to": []}
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 Command not implemented")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    """Локальный SMTP-сервер для тестов отправки почты.
+
+    письма складываются в messages, число smtp-сессий - в sessions; после
+    throttle_after принятых писем следующие throttle_times команд MAIL получают ответ
+    throttle_code (421/450), как у провайдера, ограничивающего частоту отправки.
+
+    with StubSMTPServer(throttle_after=2, throttle_code=450) as server:
+        server.start()
+        get_connection(host=server.host, port=server.port, use_tls=False, ...)
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        throttle_after=None,
+        throttle_code=421,
+        throttle_times=1,
+    ):
+        super().__init__((host, port), StubSMTPHandler)
+        self.host, self.port = self.server_address[:2]
+        self.throttle_after = throttle_after
+        self.throttle_code = throttle_code
+        self.throttle_times = throttle_times
+        self.throttled = 0
+        self.sessions = 0
+        self.messages = []
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def next_mail_code(self):
+        with self.lock:
+            if (
+                self.throttle_after is not None
+                and len(self.messages) >= self.throttle_after
+                and self.throttled < self.throttle_times
+            ):
+                self.throttled += 1
+                return self.throttle_code
+            return 250
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -1,89 +1,252 @@
 import logging
 from datetime import timedelta
+from functools import partial
 
 from celery import shared_task
 from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.db import transaction
 from django.utils import timezone
 
-from tasks.models import Task
+from tasks.archive import archive_done_tasks
+from tasks.jobs import fail_stale_jobs, run_job
+from tasks.locks import single_instance
+from tasks.mailqueue import EmailThrottled, OutboundEmailQueue, get_task_lane
+from tasks.models import DeadlineNotificationDelivery, Task
+from tasks.partitions import maintain_comment_partitions
 from tasks.permissions import is_admin, is_manager
+from tasks.rendering import get_notification_template, task_snapshot
 
 logger = logging.getLogger("notification_tasks")
+cleanup_logger = logging.getLogger("cleanup_tasks")
 
 
 left_time = 24
 
 
+def wants_digest(user):
+    """Включен ли у пользователя дайджест уведомлений о дедлайнах."""
+    # профиль может отсутствовать - RelatedObjectDoesNotExist это AttributeError:
+    profile = getattr(user, "profile", None)
+    return bool(profile and profile.deadline_digest)
+
+
+def group_tasks_by_recipient(tasks):
+    """Группирует задачи по получателям: {user: [task, ...]}.
+
+    получатели задачи - ее создатель и исполнители.
+    """
+    recipients = {}
+    for task in tasks:
+        for user in [task.owner, *task.executor.all()]:
+            recipients.setdefault(user, []).append(task)
+    return recipients
+
+
+def render_deadline_notification(task):
+    """Общая для всех получателей часть письма о дедлайне задачи."""
+    return get_notification_template(
+        "notifications/deadline_notification"
+    ).render_shared({"task": task_snapshot(task)})
+
+
+def build_deadline_email(user, task, rendered=None):
+    """Письмо о дедлайне одной задачи.
+
+    rendered - результат render_deadline_notification(task), чтобы не рендерить
+    задачу заново для каждого получателя.
+    """
+    if rendered is None:
+        rendered = render_deadline_notification(task)
+    subject = (
+        f"Скоро дедлайн созданной вами задачи {task.title}"
+        if is_admin(user) or is_manager(user)
+        else f"Скоро дедлайн выполняемой вами задачи {task.title}"
+    )
+    text_content, html_content = rendered.for_recipient(username=user.username)
+
+    msg = EmailMultiAlternatives(subject, text_content, to=[user.email])
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+def build_digest_email(user, tasks):
+    """Одно письмо со всеми задачами пользователя, у которых скоро дедлайн."""
+    context = {
+        "tasks": [task_snapshot(task) for task in tasks],
+        "username": user.username,
+    }
+    subject = f"Скоро дедлайн задач: {len(tasks)}"
+    text_content, html_content = get_notification_template(
+        "notifications/deadline_digest"
+    ).render(context)
+
+    msg = EmailMultiAlternatives(subject, text_content, to=[user.email])
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=300)
+@single_instance("tasks.tasks.deadline_notification")
 def deadline_notification(self):
     """Уведомляет создателя задачи и назначенных исполнителей.
 
     о дедлайне за 24 часа;
     если у задачи notified=False, но она просрочена - уведомление не посылается;
+    пользователь с включенным дайджестом получает одно письмо со всеми задачами;
+    доставка записывается по паре (задача, получатель) - при повторе после сбоя части
+    писем уже уведомленные получатели пропускаются; задача помечается notified, когда
+    письма получили все ее получатели.
     """
     logger.info("[DEADLINE NOTIFICATION CODE STARTED]")
     # logger.info(f"Database used: {connection.settings_dict['NAME']}")
+    notified_ids = []
+    deliveries = []
     try:
         logger.info("[TRY TO FIND SOME TASKS]")
         now_time = timezone.now()
         logger.info(f"[EVALUATE NOW_TIME]: {now_time}")
         check_time = now_time + timedelta(hours=left_time)
         logger.info(f"[EVALUATE CHECK_TIME]: {check_time}")
-        tasks = Task.objects.filter(
-            deadline__lte=check_time, deadline__gte=now_time, notified=False
+        tasks = (
+            Task.objects.filter(
+                deadline__lte=check_time, deadline__gte=now_time, notified=False
+            )
+            .select_related("owner__profile")
+            .prefetch_related("executor__profile")
         )
         # ищу задачи у которых дедлайн через 24 часа или меньше, не просроченные,
         # еще не уведомлялись
         logger.info(f"[FINDED {tasks.count()} TASKS WITH A CLOSE DEADLINE]")
-        for task in tasks:
-            users = [task.owner]
-            users.extend(task.executor.all())
-
-            logger.info(f"[TASK'S DEADLINE IS '{task.deadline}']")
+        recipients = group_tasks_by_recipient(tasks)
+        # получатели, уведомленные прошлым (упавшим) запуском:
+        delivered = set(
+            DeadlineNotificationDelivery.objects.filter(
+                task_id__in={task.pk for tasks in recipients.values() for task in tasks}
+            ).values_list("task_id", "user_id")
+        )
+        # сколько получателей еще не уведомлено по каждой задаче:
+        pending = {}
+        for user, user_tasks in list(recipients.items()):
+            for task in user_tasks:
+                pending.setdefault(task.pk, 0)
+            user_tasks = [
+                task for task in user_tasks if (task.pk, user.pk) not in delivered
+            ]
+            for task in user_tasks:
+                pending[task.pk] += 1
+            if user_tasks:
+                recipients[user] = user_tasks
+            else:
+                del recipients[user]
+        notified_ids.extend(pk for pk, count in pending.items() if not count)
+
+        def mark_sent(user, sent_tasks, msg):
             logger.info(
-                f"[USERS THAT MUST BE NOTIFICATED IS {task.owner, task.executor.all()}]"
+                f"[SUCCESS] Type: Deadline notifications | Email: {msg.to[0]} "
+                f"| Tasks: {len(sent_tasks)}"
             )
-
-            for user in users:
-                context = {
-                    "task": task,
-                    "username": user.username,
-                }
-                subject = (
-                    f"Скоро дедлайн созданной вами задачи {task.title}"
-                    if is_admin(user) or is_manager(user)
-                    else f"Скоро дедлайн выполняемой вами задачи {task.title}"
-                )
-                text_content = render_to_string(
-                    "notifications/deadline_notification.txt", context
-                )
-                html_content = render_to_string(
-                    "notifications/deadline_notification.html", context
+            for task in sent_tasks:
+                deliveries.append(DeadlineNotificationDelivery(task=task, user=user))
+                pending[task.pk] -= 1
+                if not pending[task.pk]:
+                    notified_ids.append(task.pk)
+
+        # письма уходят через очередь с ограничением скорости провайдера;
+        # задача рендерится один раз, получателям подставляется только имя:
+        queue = OutboundEmailQueue()
+        rendered = {}
+        for user, user_tasks in recipients.items():
+            if wants_digest(user) and len(user_tasks) > 1:
+                msg = build_digest_email(user, user_tasks)
+                queue.put(
+                    msg,
+                    lane=get_task_lane(self),
+                    on_sent=partial(mark_sent, user, user_tasks),
                 )
+                continue
 
-                recipient = user.email
-                msg = EmailMultiAlternatives(subject, text_content, to=[recipient])
-                msg.attach_alternative(html_content, "text/html")
-
+            for task in user_tasks:
+                if task.pk not in rendered:
+                    rendered[task.pk] = render_deadline_notification(task)
+                msg = build_deadline_email(user, task, rendered[task.pk])
                 # print(f'msg.recipients() = {msg.recipients()}')  # кому
                 # print(f'msg.body = {msg.body}')  # текстовая часть
                 # print(f'msg.alternatives = {msg.alternatives}')  # список с html
-                logger.debug(f"Email details: to={recipient}, subject={subject}")
-
-                msg.send()
-                logger.info(
-                    f"[SUCCESS] Type: Deadline notifications | Email: {recipient}"
+                logger.debug(f"Email details: to={user.email}, subject={msg.subject}")
+                queue.put(
+                    msg,
+                    lane=get_task_lane(self),
+                    on_sent=partial(mark_sent, user, [task]),
                 )
 
-                task.notified = True
+        queue.flush()
 
-                # task.save()  # make полный UPDATE всех полей
-                task.save(update_fields=["notified"])  # обновление только этого поля
-                # UPDATE tasks_task SET notified = true WHERE id = 123;
+    except EmailThrottled as e:
+        logger.warning(
+            f"[THROTTLED] Type: Deadline notifications | Pending: {e.pending} "
+            f"| Retry after: {e.retry_after:.0f}s"
+        )
+        raise self.retry(exc=e, countdown=max(1, round(e.retry_after)))
 
     except Exception as e:
         # logger.error(f"[FAILURE] Deadline notifications | Error: {str(e)}")
         logger.exception("[FAILURE] Type: Deadline notifications")  # покажет traceback
 
         raise self.retry(exc=e)
+
+    finally:
+        # доставленные письма и задачи, все получатели которых уже уведомлены,
+        # записываются пачкой, чтобы при повторе не слать письма повторно:
+        with transaction.atomic():
+            DeadlineNotificationDelivery.objects.bulk_create(
+                deliveries, ignore_conflicts=True
+            )
+            if notified_ids:
+                Task.objects.filter(pk__in=notified_ids).update(notified=True)
+                DeadlineNotificationDelivery.objects.filter(
+                    task_id__in=notified_ids
+                ).delete()
+
+
+@shared_task
+@single_instance("tasks.tasks.archive_tasks")
+def archive_tasks():
+    """Переносит выполненные задачи старше TASK_ARCHIVE_AFTER_DAYS в архив."""
+    cleanup_logger.info("[ARCHIVE TASKS CODE STARTED]")
+    archived = archive_done_tasks(
+        progress=lambda archived: cleanup_logger.info(
+            f"[PROGRESS] Archived {archived} tasks"
+        )
+    )
+    cleanup_logger.info(f"[SUCCESS] Archived {archived} tasks")
+    return archived
+
+
+@shared_task
+@single_instance("tasks.tasks.maintain_partitions")
+def maintain_partitions():
+    """Создает секции комментариев заранее и отсоединяет устаревшие."""
+    created, detached = maintain_comment_partitions(timezone.now())
+    cleanup_logger.info(
+        f"[SUCCESS] Comment partitions | Ensured: {len(created)} "
+        f"| Detached: {detached}"
+    )
+    return created, detached
+
+
+@shared_task
+def run_admin_job(job_id):
+    """Массовое действие админки пачками (tasks.jobs); ставится в low_priority."""
+    status = run_job(job_id)
+    cleanup_logger.info(f"[ADMIN JOB] {job_id} finished: {status}")
+    return status
+
+
+@shared_task
+@single_instance("tasks.tasks.fail_stale_admin_jobs")
+def fail_stale_admin_jobs():
+    """Задания админки, брошенные упавшим воркером, - в FAILED (tasks.jobs)."""
+    failed = fail_stale_jobs()
+    if failed:
+        cleanup_logger.warning(f"[ADMIN JOB] {failed} stale jobs marked as failed")
+    return failed
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Category, Task
+from tasks.pagination import EstimatedCountPaginator
+
+
+class TaskAdminChangelistTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client.force_login(admin)
+        self.url = reverse("admin:tasks_task_changelist")
+        self.category = Category.objects.create(name="Work")
+        self.group = Group.objects.create(name="manager")
+
+    def make_tasks(self, count):
+        for n in range(count):
+            owner = User.objects.create_user(f"owner{Task.objects.count()}")
+            owner.groups.add(self.group)
+            task = Task.objects.create(
+                title=f"task {n}",
+                description="",
+                deadline=timezone.now() + timedelta(days=1),
+                owner=owner,
+                category=self.category,
+            )
+            task.executor.set([owner])
+
+    def count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.make_tasks(2)
+        few = self.count_queries()
+        self.make_tasks(8)
+
+        self.assertEqual(self.count_queries(), few)
+
+    def test_filters(self):
+        self.make_tasks(1)
+        response = self.client.get(self.url, {"status__exact": 1, "priority__exact": 1})
+
+        self.assertContains(response, "task 0")
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    def setUp(self):
+        Category.objects.bulk_create(Category(name=f"c{n}") for n in range(3))
+
+    def test_exact_count_without_estimate(self):
+        # sqlite - оценки нет:
+        paginator = EstimatedCountPaginator(Category.objects.order_by("id"), 2)
+
+        self.assertEqual(paginator.count, 3)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_estimate_above_threshold(self):
+        queryset = Category.objects.order_by("id")
+        with patch("tasks.pagination.estimated_count", return_value=5000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 5000)
+        with patch("tasks.pagination.estimated_count", return_value=500):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+
+
+class TaskAdminAutocompleteTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client.force_login(self.admin)
+        User.objects.bulk_create(
+            User(username=f"user{n}", email=f"user{n}@example.com") for n in range(30)
+        )
+
+    def test_change_form_does_not_list_users(self):
+        response = self.client.get(reverse("admin:tasks_task_add"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "user29")
+        self.assertContains(response, "admin-autocomplete")
+
+    def search(self, field, term):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "tasks",
+                "model_name": "task",
+                "field_name": field,
+                "term": term,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_users_by_prefix_limited(self):
+        data = self.search("executor", "user")
+
+        self.assertEqual(len(data["results"]), 20)  # страница autocomplete
+        self.assertTrue(data["pagination"]["more"])
+        self.assertEqual(self.search("owner", "ser1")["results"], [])  # не префикс
+        self.assertEqual(
+            [row["text"] for row in self.search("owner", "user1@")["results"]],
+            ["user1"],
+        )
+
+    def test_tags_and_categories(self):
+        Category.objects.create(name="Work")
+
+        self.assertEqual(
+            [row["text"] for row in self.search("category", "wo")["results"]], ["Work"]
+        )
+        self.assertEqual(self.search("tags", "x")["results"], [])
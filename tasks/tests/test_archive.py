@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from tasks.archive import archive_done_tasks
+from tasks.models import (
+    ArchivedComment,
+    ArchivedTask,
+    Category,
+    Comment,
+    Tag,
+    Task,
+    TaskStatus,
+)
+from tasks.tasks import archive_tasks
+
+User = get_user_model()
+
+
+class ArchiveDoneTasksTest(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create(username="owner")
+        self.executor = User.objects.create(username="executor")
+        self.tag = Tag.objects.create(name="tag")
+        self.category = Category.objects.create(name="category")
+        old = timezone.now() - timedelta(days=60)
+        self.old_done = [self.make_task(f"old {n}", old) for n in range(3)]
+        self.recent_done = self.make_task("recent", timezone.now())
+        self.old_active = self.make_task("active", old, status=TaskStatus.IN_PROGRESS)
+
+    def make_task(self, title, deadline, status=TaskStatus.DONE):
+        task = Task.objects.create(
+            title=title,
+            deadline=deadline,
+            status=status,
+            owner=self.owner,
+            category=self.category,
+        )
+        task.executor.add(self.executor)
+        task.tags.add(self.tag)
+        Comment.objects.create(task=task, author=self.executor, text=f"on {title}")
+        return task
+
+    def test_old_done_tasks_moved_with_relations(self):
+        progress = []
+
+        archived = archive_done_tasks(
+            older_than_days=30, batch_size=2, sleep=0, progress=progress.append
+        )
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(progress, [2, 3])
+        self.assertCountEqual(
+            Task.objects.values_list("title", flat=True), ["recent", "active"]
+        )
+        self.assertEqual(Comment.objects.count(), 2)
+
+        task = ArchivedTask.objects.get(id=self.old_done[0].id)
+        self.assertEqual(task.title, "old 0")
+        self.assertEqual(task.owner, self.owner)
+        self.assertEqual(task.category, self.category)
+        self.assertEqual(list(task.executor.all()), [self.executor])
+        self.assertEqual(list(task.tags.all()), [self.tag])
+        self.assertEqual(
+            list(task.comments.values_list("text", flat=True)), ["on old 0"]
+        )
+        self.assertEqual(ArchivedComment.objects.count(), 3)
+
+    def test_periodic_task_archives_by_settings(self):
+        with self.settings(TASK_ARCHIVE_AFTER_DAYS=30, DELETION_BATCH_SLEEP=0):
+            self.assertEqual(archive_tasks(), 3)
+            self.assertEqual(archive_tasks(), 0)
+
+        self.assertEqual(ArchivedTask.objects.count(), 3)
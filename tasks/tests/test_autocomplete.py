@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.autocomplete import (
+    AutocompleteIndex,
+    NgramIndex,
+    Trie,
+    autocomplete,
+    search_database,
+)
+from tasks.models import Category, Tag, Task
+
+User = get_user_model()
+
+
+class TrieTest(TestCase):
+    def test_prefix_and_remove(self):
+        trie = Trie()
+        trie.insert("api", 1)
+        trie.insert("apple", 2)
+        trie.insert("bug", 3)
+
+        self.assertEqual(set(trie.keys_with_prefix("ap")), {1, 2})
+        self.assertEqual(set(trie.keys_with_prefix("")), {1, 2, 3})
+
+        trie.remove("apple", 2)
+        self.assertEqual(set(trie.keys_with_prefix("ap")), {1})
+        self.assertNotIn("p", trie.root["a"]["p"])  # пустая ветка удалена
+        trie.remove("apple", 2)  # повторно - без ошибки
+
+
+class NgramIndexTest(TestCase):
+    def test_substring_candidates(self):
+        ngrams = NgramIndex()
+        ngrams.insert("debug", 1)
+        ngrams.insert("bugfix", 2)
+        ngrams.insert("backend", 3)
+
+        self.assertEqual(ngrams.candidates("bu"), {1, 2})
+        self.assertEqual(ngrams.candidates("ebug"), {1})
+        self.assertEqual(ngrams.candidates("bugx"), set())
+
+        ngrams.remove("debug", 1)
+        self.assertEqual(ngrams.candidates("bu"), {2})
+        self.assertNotIn("deb", ngrams.grams)  # пустые n-граммы удалены
+
+
+class AutocompleteIndexTest(TestCase):
+    def setUp(self):
+        self.now = 0
+        self.reloads = []
+        self.index = AutocompleteIndex(
+            refresh_seconds=60,
+            clock=lambda: self.now,
+            run_in_background=self.reloads.append,
+        )
+        owner = User.objects.create_user(username="owner", password="pass")
+        self.backend = Tag.objects.create(name="Backend")
+        self.bug = Tag.objects.create(name="Bug")
+        self.debug = Tag.objects.create(name="Debug")
+        self.category = Category.objects.create(name="Bugfix")
+        for tags in ([self.bug], [self.bug, self.debug], [self.debug]):
+            task = Task.objects.create(
+                title="task",
+                description="",
+                deadline=timezone.now(),
+                owner=owner,
+                category=self.category,
+            )
+            task.tags.set(tags)
+
+    def test_prefix_first_then_substring_by_popularity(self):
+        results = self.index.search("bu")
+
+        self.assertEqual(
+            [(row["type"], row["name"], row["popularity"]) for row in results],
+            [("category", "Bugfix", 3), ("tag", "Bug", 2), ("tag", "Debug", 2)],
+        )
+
+    def test_kinds_and_limit(self):
+        self.assertEqual(
+            [row["name"] for row in self.index.search("bu", kinds=["tag"], limit=1)],
+            ["Bug"],
+        )
+
+    def test_served_from_memory_until_refresh(self):
+        self.index.search("b")
+        Tag.objects.create(name="Build")
+
+        with self.assertNumQueries(0):
+            self.assertNotIn("Build", [r["name"] for r in self.index.search("b")])
+
+        # устаревший индекс отдается, пока перезагружается в фоне:
+        self.now = 61
+        self.assertNotIn("Build", [row["name"] for row in self.index.search("b")])
+        self.index.search("b")
+        self.assertEqual(len(self.reloads), 1)  # одна перезагрузка
+
+        self.reloads.pop()()
+        self.assertIn("Build", [row["name"] for row in self.index.search("b")])
+
+    def test_changes_during_reload_are_replayed(self):
+        self.index.search("")
+        self.now = 61
+        self.index.search("")
+        Tag.objects.filter(pk=self.bug.pk).update(name="Issue")
+        # сигнал пришел, когда перезагрузка уже прочитала старое имя из бд:
+        self.index.upsert("tag", self.bug.pk, "Issue")
+        Tag.objects.filter(pk=self.bug.pk).update(name="Bug")
+
+        self.reloads.pop()()
+
+        names = [row["name"] for row in self.index.search("", kinds=["tag"])]
+        self.assertIn("Issue", names)
+        self.assertNotIn("Bug", names)
+
+    def test_substring_longer_than_ngram(self):
+        self.assertEqual([row["name"] for row in self.index.search("ebug")], ["Debug"])
+
+    def test_incremental_updates(self):
+        self.index.search("")
+        self.index.upsert("tag", self.bug.pk, "Issue")
+        self.index.remove("tag", self.debug.pk)
+        self.index.add_usage("tag", [self.backend.pk], 5)
+        new = Tag.objects.create(name="Bulk")  # как из bulk_create - без upsert
+        self.index.add_usage("tag", [new.pk], 1)
+
+        with self.assertNumQueries(0):
+            names = [row["name"] for row in self.index.search("", kinds=["tag"])]
+        self.assertEqual(names, ["Backend", "Issue", "Bulk"])
+
+    def test_signals_update_loaded_index(self):
+        from tasks.autocomplete import index
+
+        index.clear()
+        index.search("")
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                Tag.objects.filter(pk=self.bug.pk).get().delete()
+                Tag.objects.create(name="Bugs")
+                self.debug.task_set.first().tags.clear()
+            names = {row["name"]: row["popularity"] for row in index.search("")}
+        finally:
+            index.clear()
+
+        self.assertNotIn("Bug", names)
+        self.assertEqual(names["Bugs"], 0)
+        self.assertEqual(names["Debug"], 1)
+
+    def test_database_backend_same_ranking(self):
+        self.assertEqual(search_database("bu"), self.index.search("bu"))
+
+    @override_settings(AUTOCOMPLETE_BACKEND="database")
+    def test_backend_setting(self):
+        with self.assertNumQueries(2):
+            autocomplete("bu")
@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks_project import db
+from tasks_project.db import ConnectionMetrics, drop_inherited_connections
+
+User = get_user_model()
+
+
+class FakeConnection:
+    alias = "default"
+    settings_dict = {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True}
+
+    def __init__(self):
+        self.connection = None
+        self.close_at = 123
+
+
+class FakeConnections:
+    def __init__(self, *wrappers):
+        self.wrappers = wrappers
+
+    def __getitem__(self, alias):
+        return self.wrappers[0]
+
+    def all(self, initialized_only=False):
+        return list(self.wrappers)
+
+
+class ConnectionMetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.wrapper = FakeConnection()
+        patcher = mock.patch.object(db, "connections", FakeConnections(self.wrapper))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.now = 0.0
+        self.metrics = ConnectionMetrics(clock=lambda: self.now)
+
+    def open(self):
+        self.wrapper.connection = object()
+        self.metrics.connection_created(self.wrapper)
+
+    def test_reuse_and_reconnects(self):
+        self.metrics.checkout()  # первый запрос открывает соединение
+        self.open()
+        self.metrics.checkout()  # второй - переиспользует
+        self.metrics.checkout()  # третий - соединение не прошло проверку
+        self.open()
+        self.now = 5.0
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["checkouts"], 3)
+        self.assertEqual(snapshot["opened"], 2)
+        self.assertEqual(snapshot["reused"], 2)
+        self.assertEqual(snapshot["reconnects"], 1)
+        self.assertEqual(snapshot["reuse_ratio"], 0.667)
+        self.assertEqual(snapshot["connection_age_s"], 5.0)
+
+    def test_other_aliases_are_ignored(self):
+        self.metrics.connection_created(SimpleNamespace(alias="other"))
+        self.assertEqual(self.metrics.snapshot()["opened"], 0)
+
+    def test_drop_inherited_connections_does_not_close(self):
+        inherited = mock.Mock()
+        self.wrapper.connection = inherited
+        with mock.patch.object(db, "_inherited", []) as kept:
+            drop_inherited_connections()
+
+        inherited.close.assert_not_called()
+        self.assertIsNone(self.wrapper.connection)
+        self.assertIsNone(self.wrapper.close_at)
+        self.assertEqual(kept, [inherited])  # не соберется сборщиком мусора
+
+
+class DatabaseHealthViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("health-db")
+
+    def test_ok_without_metrics_for_anonymous(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "ok")
+        self.assertNotIn("connections", response.data)
+
+    def test_metrics_for_staff(self):
+        admin = User.objects.create_user(username="admin", is_staff=True)
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data["connections"]["pid"], db.metrics.pid)
+        self.assertEqual(
+            set(response.data["connections"]),
+            {
+                "pid",
+                "uptime_s",
+                "checkouts",
+                "opened",
+                "reused",
+                "reconnects",
+                "reuse_ratio",
+                "connection_age_s",
+                "conn_max_age",
+                "health_checks",
+            },
+        )
+        self.assertGreater(response.data["connections"]["checkouts"], 0)
+
+    def test_unavailable(self):
+        with mock.patch(
+            "tasks.views.check_database", side_effect=DatabaseError("host db down")
+        ):
+            with self.assertLogs("db_connections", "ERROR") as logs:
+                response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data, {"status": "unavailable"})
+        self.assertIn("host db down", logs.output[0])
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from tasks.counters import (
+    comment_added,
+    comments_removed,
+    reconcile_comment_counters,
+)
+from tasks.models import Comment, Task
+
+User = get_user_model()
+
+
+class CommentCountersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.task = Task.objects.create(title="task", owner=self.user)
+
+    def add_comment(self, created_at=None):
+        comment = Comment.objects.create(task=self.task, author=self.user, text="t")
+        if created_at:
+            Comment.objects.filter(pk=comment.pk).update(created_at=created_at)
+            comment.created_at = created_at
+        comment_added(comment)
+        return comment
+
+    def test_added_and_removed(self):
+        old = self.add_comment(timezone.now() - timedelta(days=1))
+        new = self.add_comment()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 2)
+        self.assertEqual(self.task.last_activity_at, new.created_at)
+
+        new.delete()
+        comments_removed([self.task.id])
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 1)
+        self.assertEqual(self.task.last_activity_at, old.created_at)
+
+    def test_older_comment_does_not_move_activity_back(self):
+        new = self.add_comment()
+        self.add_comment(timezone.now() - timedelta(days=1))
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.last_activity_at, new.created_at)
+
+    def test_reconcile_repairs_drift_in_batches(self):
+        other = Task.objects.create(title="other", owner=self.user)
+        comment = Comment.objects.create(task=self.task, author=self.user, text="t")
+        Task.objects.filter(pk=other.pk).update(comments_count=5)
+        progress = []
+
+        checked, fixed = reconcile_comment_counters(
+            batch_size=1, progress=lambda *args: progress.append(args)
+        )
+
+        self.assertEqual((checked, fixed), (2, 2))
+        self.assertEqual(progress, [(1, 1), (2, 2)])
+        self.task.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(
+            (self.task.comments_count, self.task.last_activity_at),
+            (1, comment.created_at),
+        )
+        self.assertEqual((other.comments_count, other.last_activity_at), (0, None))
+        self.assertEqual(reconcile_comment_counters(), (2, 0))
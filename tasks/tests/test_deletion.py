@@ -0,0 +1,148 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, User
+from django.db import models
+from django.db.models import ProtectedError
+from django.test import TestCase
+from django.utils import timezone
+
+from authapp.models import OutboxEmail, UserProfile
+from tasks.deletion import ChunkedDeleter, chunked_delete, truncate_project_data
+from tasks.models import Category, Comment, Tag, Task
+
+
+class ChunkedDeleterTest(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(name="user")
+        self.tag = Tag.objects.create(name="tag")
+        self.category = Category.objects.create(name="category")
+        self.keeper = User.objects.create(username="keeper")
+        self.users = [User.objects.create(username=f"bot{n}") for n in range(5)]
+        for user in self.users:
+            UserProfile.objects.get_or_create(user=user)
+            user.groups.add(self.group)
+            task = Task.objects.create(
+                title=f"task of {user}", owner=user, category=self.category
+            )
+            task.executor.add(user, self.keeper)
+            task.tags.add(self.tag)
+            Comment.objects.create(task=task, author=self.keeper, text="text")
+        self.keeper_task = Task.objects.create(title="keeper task", owner=self.keeper)
+        self.keeper_task.executor.add(self.users[0])
+        Comment.objects.create(task=self.keeper_task, author=self.users[0], text="t")
+
+    def test_cascade_deleted_in_batches(self):
+        progress = []
+        deleter = ChunkedDeleter(
+            batch_size=2, sleep=0, progress=lambda *args: progress.append(args)
+        )
+
+        deleted, counts = deleter.delete(
+            User.objects.filter(username__startswith="bot")
+        )
+
+        self.assertEqual(counts["auth.User"], 5)
+        self.assertEqual(counts["authapp.UserProfile"], 5)
+        self.assertEqual(counts["tasks.Task"], 5)
+        self.assertEqual(counts["tasks.Comment"], 6)
+        self.assertEqual(counts["tasks.Task_executor"], 11)
+        self.assertEqual(counts["tasks.Task_tags"], 5)
+        self.assertEqual(counts["auth.User_groups"], 5)
+        self.assertEqual(deleted, sum(counts.values()))
+        # 5 юзеров пачками по 2 - три транзакции:
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[-1][0], deleted)
+
+        self.assertEqual(list(User.objects.all()), [self.keeper])
+        self.assertEqual(list(Task.objects.all()), [self.keeper_task])
+        self.assertFalse(self.keeper_task.executor.exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertTrue(Group.objects.exists())
+        self.assertTrue(Tag.objects.exists())
+
+    def test_set_null_relation_updated(self):
+        chunked_delete(Category.objects.all(), sleep=0)
+
+        self.assertFalse(Category.objects.exists())
+        self.assertEqual(Task.objects.filter(category__isnull=True).count(), 6)
+
+    def test_protected_relation_stops_deletion(self):
+        relation = Comment._meta.get_field("task").remote_field
+        with patch.object(relation, "on_delete", models.PROTECT):
+            with self.assertRaises(ProtectedError):
+                chunked_delete(Task.objects.all(), sleep=0)
+
+        # пачка откатилась целиком:
+        self.assertEqual(Task.objects.count(), 6)
+        self.assertEqual(Comment.objects.count(), 6)
+
+    def test_empty_queryset(self):
+        self.assertEqual(chunked_delete(User.objects.none()), (0, {}))
+
+
+class TruncateProjectDataTest(TestCase):
+    def setUp(self):
+        self.admin_group = Group.objects.create(name="admin")
+        self.admin = User.objects.create_superuser("admin", "a@example.com", "pass")
+        self.admin.groups.add(self.admin_group)
+        user = User.objects.create_user("user", password="pass")
+        task = Task.objects.create(title="task", owner=user)
+        task.tags.add(Tag.objects.create(name="tag"))
+        task.executor.add(self.admin)
+        Comment.objects.create(task=task, author=user, text="text")
+
+    def test_all_project_data_removed(self):
+        tables, kept = truncate_project_data()
+
+        self.assertIn("tasks_task_tags", tables)
+        self.assertEqual(kept, 0)
+        for model in (User, Group, Task, Tag, Comment, Task.executor.through):
+            self.assertFalse(model.objects.exists(), model)
+
+    def test_pending_emails_kept_unless_dropped(self):
+        OutboxEmail.objects.create(
+            email_type="register_confirmation", recipient="pending@mail.com"
+        )
+        OutboxEmail.objects.create(
+            email_type="register_confirmation",
+            recipient="sent@mail.com",
+            dispatched_at=timezone.now(),
+        )
+
+        tables, _ = truncate_project_data()
+
+        self.assertNotIn("authapp_outboxemail", tables)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("recipient", flat=True)),
+            ["pending@mail.com"],
+        )
+
+        tables, _ = truncate_project_data(drop_pending_emails=True)
+
+        self.assertIn("authapp_outboxemail", tables)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_keep_superusers(self):
+        password = self.admin.password
+
+        _, kept = truncate_project_data(keep_superusers=True)
+
+        self.assertEqual(kept, 1)
+        admin = User.objects.get()
+        self.assertEqual((admin.username, admin.password), ("admin", password))
+        self.assertTrue(admin.is_superuser)
+        self.assertEqual(list(admin.groups.values_list("name", flat=True)), ["admin"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_clear_all_script(self):
+        from scripts import clear_all
+
+        with patch("builtins.print"):
+            clear_all.run("fast", "keep-admin")
+        self.assertEqual(
+            list(User.objects.values_list("username", flat=True)), ["admin"]
+        )
+
+        with patch("builtins.print"):
+            clear_all.run("100")
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,116 @@
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from tasks.explain import (
+    CRITICAL_QUERIES,
+    _postgres_lines,
+    _sqlite_lines,
+    capture,
+    compare,
+    load_snapshot,
+)
+from tasks.seeding import BulkSeeder
+
+
+class NormalizePlanTests(SimpleTestCase):
+    def test_postgres_plan(self):
+        [root] = json.loads(
+            """[{"Plan": {"Node Type": "Limit", "Startup Cost": 0.29, "Plans": [
+                {"Node Type": "Bitmap Heap Scan", "Relation Name": "tasks_task",
+                 "Recheck Cond": "(status = 2)", "Plans": [
+                    {"Node Type": "Bitmap Index Scan",
+                     "Index Name": "task_status_idx", "Plan Rows": 100}]}]}}]"""
+        )
+        self.assertEqual(
+            list(_postgres_lines(root["Plan"])),
+            [
+                "Limit",
+                "  Bitmap Heap Scan on tasks_task",
+                "    Bitmap Index Scan using task_status_idx",
+            ],
+        )
+
+    def test_postgres_monthly_partitions(self):
+        [root] = json.loads(
+            """[{"Plan": {"Node Type": "Append", "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "tasks_comment_p2025_11"},
+                {"Node Type": "Seq Scan", "Relation Name": "tasks_comment_p2025_12"},
+                {"Node Type": "Index Scan", "Relation Name": "tasks_comment_p2026_01",
+                 "Index Name": "tasks_comment_p2026_01_task_id_idx"},
+                {"Node Type": "Seq Scan", "Relation Name": "tasks_comment_default"}
+            ]}}]"""
+        )
+        self.assertEqual(
+            list(_postgres_lines(root["Plan"])),
+            [
+                "Append",
+                "  Seq Scan on tasks_comment_p?",
+                "  Index Scan on tasks_comment_p? using tasks_comment_p?_task_id_idx",
+                "  Seq Scan on tasks_comment_default",
+            ],
+        )
+
+    def test_sqlite_plan(self):
+        explained = (
+            "5 0 0 SCAN tasks_task\n"
+            "7 0 0 SEARCH tasks_task_tags USING COVERING INDEX tags_uniq (task_id=?)\n"
+            "13 0 0 SEARCH tasks_tag USING INTEGER PRIMARY KEY (rowid=?)\n"
+            "20 0 0 USE TEMP B-TREE FOR ORDER BY"
+        )
+        self.assertEqual(
+            list(_sqlite_lines(explained)),
+            [
+                "Seq Scan on tasks_task",
+                "Index Only Scan on tasks_task_tags using tags_uniq",
+                "Index Scan on tasks_tag using pk",
+                "USE TEMP B-TREE FOR ORDER BY",
+            ],
+        )
+
+
+class ComparePlanTests(SimpleTestCase):
+    snapshot = {
+        "status": [
+            "Limit",
+            "  Bitmap Heap Scan on tasks_task",
+            "    Bitmap Index Scan using task_status_idx",
+        ],
+        "comments": ["Index Scan on tasks_comment using comment_task_timeline_idx"],
+    }
+
+    def test_same_plans(self):
+        self.assertEqual(compare(self.snapshot, self.snapshot), ([], []))
+
+    def test_sequential_scan_and_lost_index(self):
+        current = {
+            "status": ["Limit", "  Seq Scan on tasks_task"],
+            "comments": ["Index Scan on tasks_comment using tasks_comment_task_id"],
+        }
+        regressions, changes = compare(current, self.snapshot)
+        self.assertEqual(
+            regressions,
+            [
+                "status: sequential scan on tasks_task",
+                "status: index task_status_idx is no longer used",
+                "comments: index comment_task_timeline_idx is no longer used",
+            ],
+        )
+        self.assertEqual(changes, [])
+
+    def test_other_changes_are_not_regressions(self):
+        current = dict(self.snapshot, status=["Sort", *self.snapshot["status"]])
+        self.assertEqual(compare(current, self.snapshot), ([], ["status"]))
+
+
+class ExplainSnapshotTests(TestCase):
+    """Планы критичных запросов на sqlite совпадают с закоммиченным снимком."""
+
+    def test_plans_match_snapshot(self):
+        BulkSeeder(seed=1).seed(users=20, tasks=50, comments=100, tags=5)
+        snapshot = load_snapshot("sqlite")
+
+        self.assertEqual(set(snapshot), set(CRITICAL_QUERIES))
+        regressions, changes = compare(capture(), snapshot)
+        self.assertEqual(regressions, [])
+        self.assertEqual(changes, [])
@@ -0,0 +1,195 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.counters import comment_added
+from tasks.jobs import cancel_job, fail_stale_jobs, run_job, start_job
+from tasks.models import AdminJob, AdminJobStatus, Comment, Task, TaskStatus
+
+User = get_user_model()
+
+
+class AdminJobTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.owner = User.objects.create(username="owner")
+        self.tasks = [
+            Task.objects.create(title=f"task {n}", owner=self.owner) for n in range(5)
+        ]
+
+    def start(self, action, queryset, **params):
+        with patch("tasks.tasks.run_admin_job.apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = start_job(action, queryset, self.admin, **params)
+        apply_async.assert_called_once_with((job.pk,), queue="low_priority")
+        return job
+
+    def test_change_status_in_batches(self):
+        job = self.start(
+            "change_status", Task.objects.all(), status=TaskStatus.DONE.value
+        )
+        self.assertEqual(job.total, 5)
+
+        # захват; на пачку - проверка отмены, 2 update и savepoint; завершение:
+        with self.assertNumQueries(2 + 3 * 5 + 1):
+            status = run_job(job.pk, batch_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(status, AdminJobStatus.DONE)
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(set(Task.objects.values_list("status", flat=True)), {3})
+        self.assertIsNotNone(job.finished_at)
+
+    def test_reassign_owner(self):
+        job = self.start(
+            "reassign_owner", Task.objects.filter(pk=self.tasks[0].pk), owner_id=1
+        )
+        run_job(job.pk)
+
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].owner_id, 1)
+
+    def test_delete_comments_updates_counters(self):
+        comment = Comment.objects.create(
+            task=self.tasks[0], author=self.owner, text="t"
+        )
+        comment_added(comment)
+        job = self.start("delete", Comment.objects.all())
+        run_job(job.pk)
+
+        self.tasks[0].refresh_from_db()
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(self.tasks[0].comments_count, 0)
+
+    def test_delete_users(self):
+        job = self.start("delete", User.objects.filter(pk=self.owner.pk))
+        run_job(job.pk)
+
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_cancel(self):
+        job = self.start("delete", Task.objects.all())
+        cancel_job(job)
+
+        self.assertEqual(run_job(job.pk), AdminJobStatus.CANCELLED)
+        self.assertEqual(Task.objects.count(), 5)
+
+    def test_cancel_running_between_batches(self):
+        job = self.start("delete", Task.objects.all())
+        with patch("tasks.jobs.ChunkedDeleter.delete", autospec=True) as delete:
+            delete.side_effect = lambda deleter, queryset: (
+                AdminJob.objects.filter(pk=job.pk).update(cancel_requested=True),
+                queryset.delete(),
+            )
+            status = run_job(job.pk, batch_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(status, AdminJobStatus.CANCELLED)
+        self.assertEqual((job.processed, Task.objects.count()), (2, 3))
+
+    def test_stale_running_job_failed(self):
+        stale = self.start("change_status", Task.objects.all(), status=2)
+        alive = self.start("change_status", Task.objects.all(), status=2)
+        now = timezone.now()
+        # воркер первого задания упал 20 минут назад, второе шлет пачки:
+        AdminJob.objects.filter(pk=stale.pk).update(
+            status=AdminJobStatus.RUNNING, heartbeat_at=now - timedelta(minutes=20)
+        )
+        AdminJob.objects.filter(pk=alive.pk).update(
+            status=AdminJobStatus.RUNNING, heartbeat_at=now
+        )
+
+        self.assertEqual(fail_stale_jobs(timeout=600), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, AdminJobStatus.FAILED)
+        self.assertIsNotNone(stale.finished_at)
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, AdminJobStatus.RUNNING)
+
+    def test_worker_stops_when_job_failed_as_stale(self):
+        job = self.start("delete", Task.objects.all())
+        with patch("tasks.jobs.ChunkedDeleter.delete", autospec=True) as delete:
+            # пачка шла дольше таймаута - задание уже признано брошенным:
+            delete.side_effect = lambda deleter, queryset: (
+                queryset.delete(),
+                fail_stale_jobs(timeout=-1),
+            )
+            status = run_job(job.pk, batch_size=2)
+
+        job.refresh_from_db()
+        self.assertEqual(status, AdminJobStatus.FAILED)
+        self.assertEqual((job.status, job.processed), (AdminJobStatus.FAILED, 2))
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_failure_recorded(self):
+        job = self.start("change_status", Task.objects.all(), status=1)
+        AdminJob.objects.filter(pk=job.pk).update(params={})
+
+        self.assertEqual(run_job(job.pk), AdminJobStatus.FAILED)
+        job.refresh_from_db()
+        self.assertIn("status", job.error)
+
+    def test_invalid_requests(self):
+        with self.assertRaises(ValueError):
+            start_job("change_status", Comment.objects.all(), status=1)
+        with self.assertRaises(ValueError):
+            start_job("change_status", Task.objects.all(), status=42)
+        with self.assertRaises(ValueError):
+            start_job("reassign_owner", Task.objects.all(), owner_id=0)
+
+    def test_runs_once(self):
+        job = self.start("change_status", Task.objects.all(), status=2)
+        run_job(job.pk)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(run_job(job.pk), AdminJobStatus.DONE)
+
+
+class AdminJobActionTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        self.client.force_login(self.admin)
+        self.task = Task.objects.create(title="task", owner=self.admin)
+
+    @patch("tasks.tasks.run_admin_job.apply_async")
+    def test_action_creates_job(self, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin:tasks_task_changelist"),
+                {
+                    "action": "change_status_in_background",
+                    "_selected_action": [self.task.pk],
+                    "status": TaskStatus.DONE.value,
+                },
+                follow=True,
+            )
+
+        job = AdminJob.objects.get()
+        self.assertEqual((job.action, job.params), ("change_status", {"status": 3}))
+        self.assertContains(
+            response, reverse("admin:tasks_adminjob_change", args=[job.pk])
+        )
+        apply_async.assert_called_once()
+        self.assertContains(
+            self.client.get(reverse("admin:tasks_adminjob_changelist")), "0/1 (0%)"
+        )
+
+    def test_action_with_unknown_owner(self):
+        response = self.client.post(
+            reverse("admin:tasks_task_changelist"),
+            {
+                "action": "reassign_owner_in_background",
+                "_selected_action": [self.task.pk],
+                "owner": "nobody",
+            },
+            follow=True,
+        )
+
+        self.assertContains(response, "nobody")
+        self.assertFalse(AdminJob.objects.exists())
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.utils import timezone
+
+from tasks.locks import LeaseLock, single_instance
+from tasks.models import JobLease
+
+
+class LeaseLockTest(TestCase):
+    def test_second_worker_skips_while_lease_is_held(self):
+        first = LeaseLock("job")
+        second = LeaseLock("job")
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        self.assertFalse(second.acquire())
+
+        lease = JobLease.objects.get(name="job")
+        self.assertEqual(lease.owner, first.token)
+        self.assertEqual(lease.skipped_ticks, 2)
+        self.assertIsNotNone(lease.last_skipped_at)
+
+    def test_released_lease_can_be_acquired_again(self):
+        first = LeaseLock("job")
+        second = LeaseLock("job")
+        first.acquire()
+        first.release()
+
+        self.assertTrue(second.acquire())
+        self.assertEqual(JobLease.objects.get(name="job").takeovers, 0)
+
+    def test_stale_lease_is_taken_over(self):
+        """Аренда упавшего воркера истекает и забирается следующим запуском."""
+        crashed = LeaseLock("job")
+        crashed.acquire()
+        JobLease.objects.filter(name="job").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        worker = LeaseLock("job")
+        self.assertTrue(worker.acquire())
+
+        lease = JobLease.objects.get(name="job")
+        self.assertEqual(lease.owner, worker.token)
+        self.assertEqual(lease.takeovers, 1)
+        # старый владелец больше не может ни продлить, ни освободить аренду:
+        self.assertFalse(crashed.renew())
+        crashed.release()
+        self.assertEqual(JobLease.objects.get(name="job").owner, worker.token)
+
+    def test_renew_extends_lease(self):
+        lease = LeaseLock("job", ttl=60)
+        lease.acquire()
+        JobLease.objects.filter(name="job").update(
+            expires_at=timezone.now() + timedelta(seconds=1)
+        )
+
+        self.assertTrue(lease.renew())
+        self.assertGreater(
+            JobLease.objects.get(name="job").expires_at,
+            timezone.now() + timedelta(seconds=50),
+        )
+
+    def test_heartbeat_thread_renews_until_stopped(self):
+        lease = LeaseLock("job", heartbeat_interval=0.01)
+        renewed = []
+
+        def renew():
+            renewed.append(True)
+            return len(renewed) < 3
+
+        with (
+            patch.object(lease, "renew", side_effect=renew),
+            patch("tasks.locks.connection"),
+        ):
+            lease.start_heartbeat()
+            lease._thread.join(timeout=5)
+            lease.stop_heartbeat()
+
+        # после потери аренды поток прекращает продления:
+        self.assertEqual(len(renewed), 3)
+        self.assertTrue(lease.lost.is_set())
+
+    def test_heartbeat_failure_is_logged_and_signalled(self):
+        lease = LeaseLock("job", heartbeat_interval=0.01)
+
+        with (
+            patch.object(lease, "renew", side_effect=DatabaseError("db down")),
+            patch("tasks.locks.connection"),
+            self.assertLogs("periodic_tasks", "ERROR") as logs,
+        ):
+            lease.start_heartbeat()
+            lease._thread.join(timeout=5)
+            lease.stop_heartbeat()
+
+        self.assertTrue(lease.lost.is_set())
+        self.assertIn("[LEASE RENEW FAILED] Job: job", logs.output[0])
+
+    def test_lease_time_from_database_clock(self):
+        """Часы воркера, ушедшие вперед, не продлевают аренду."""
+        lease = LeaseLock("job", ttl=60)
+        skewed = timezone.now() + timedelta(days=1)
+
+        with patch("django.utils.timezone.now", return_value=skewed):
+            lease.acquire()
+            self.assertFalse(LeaseLock("job").acquire())
+
+        expires_at = JobLease.objects.get(name="job").expires_at
+        self.assertLess(expires_at, timezone.now() + timedelta(seconds=120))
+        self.assertGreater(expires_at, timezone.now() + timedelta(seconds=30))
+
+
+class SingleInstanceTest(TestCase):
+    def test_job_runs_and_releases_lease(self):
+        job = MagicMock(return_value="done")
+        wrapped = single_instance("job")(job)
+
+        self.assertEqual(wrapped(1, key="value"), "done")
+
+        job.assert_called_once_with(1, key="value")
+        self.assertEqual(JobLease.objects.get(name="job").owner, "")
+
+    def test_overlapping_tick_is_skipped(self):
+        job = MagicMock()
+        LeaseLock("job").acquire()  # предыдущий запуск еще выполняется
+
+        self.assertIsNone(single_instance("job")(job)())
+
+        job.assert_not_called()
+        self.assertEqual(JobLease.objects.get(name="job").skipped_ticks, 1)
+
+    def test_lost_lease_reported_after_job(self):
+        # поток продления сразу теряет аренду:
+        with (
+            patch(
+                "tasks.locks.LeaseLock.start_heartbeat", lambda self: self.lost.set()
+            ),
+            self.assertLogs("periodic_tasks", "ERROR") as logs,
+        ):
+            single_instance("job")(MagicMock())()
+
+        self.assertIn("Finished without lease", logs.output[0])
+
+    def test_lease_released_when_job_fails(self):
+        job = MagicMock(side_effect=ValueError("boom"))
+
+        with self.assertRaises(ValueError):
+            single_instance("job")(job)()
+
+        self.assertTrue(LeaseLock("job").acquire())
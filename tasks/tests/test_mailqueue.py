@@ -0,0 +1,202 @@
+from unittest.mock import MagicMock, patch
+
+from celery.exceptions import Retry
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase, override_settings
+
+from authapp.tasks import send_email_task
+from tasks import mailqueue
+from tasks.mailqueue import (
+    EmailThrottled,
+    LocalBucketStore,
+    OutboundEmailQueue,
+    ProviderBucket,
+)
+from tasks.smtp_stub import StubSMTPServer
+
+RATE_LIMITS = {"default": {"rate": 1000, "burst": 1000, "batch_size": 3}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(
+    EMAIL_RATE_LIMITS={"default": {"rate": 6, "burst": 6, "batch_size": 3}}
+)
+class ProviderBucketTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = ProviderBucket("smtp", LocalBucketStore(clock=self.clock))
+
+    def test_idle_lanes_share_is_borrowed(self):
+        # доля high_priority - 3 из 6, остальные 3 токена свободны:
+        reserved = [self.bucket.reserve("high_priority") for _ in range(7)]
+
+        self.assertEqual(reserved[:6], [(True, 0.0)] * 6)
+        self.assertFalse(reserved[6][0])
+        self.assertAlmostEqual(reserved[6][1], 1 / 6)
+
+        self.clock.now = 10
+        self.assertEqual(self.bucket.reserve("high_priority"), (True, 0.0))
+
+    def test_busy_lanes_get_rate_by_weights(self):
+        # воркеры всех очередей шлют без остановки 100 секунд:
+        sent = dict.fromkeys(["high_priority", "default", "low_priority"], 0)
+        next_try = dict.fromkeys(sent, 0.0)
+        for step in range(20_000):
+            self.clock.now = step * 0.005
+            for lane in sent:
+                if self.clock.now >= next_try[lane]:
+                    reserved, wait = self.bucket.reserve(lane)
+                    sent[lane] += reserved
+                    next_try[lane] = self.clock.now + wait
+
+        self.assertAlmostEqual(sum(sent.values()) / 100, 6, delta=0.1)
+        self.assertAlmostEqual(sent["high_priority"] / sent["low_priority"], 3, 1)
+        self.assertAlmostEqual(sent["default"] / sent["low_priority"], 2, 1)
+
+    def test_throttle_halves_rate_and_recover_restores_it(self):
+        self.assertEqual(self.bucket.throttle(), 3)
+        self.bucket.throttle()
+        for _ in range(10):
+            self.bucket.throttle()
+        self.assertEqual(self.bucket.throttle(), 0.3)  # не ниже rate / 20
+
+        for _ in range(20):
+            rate = self.bucket.recover()
+        self.assertEqual(rate, 6)  # не выше заданной
+
+    def test_processes_share_one_bucket(self):
+        other_process = ProviderBucket("smtp", self.bucket.store)
+        for _ in range(6):
+            other_process.reserve("default")
+
+        self.assertFalse(self.bucket.reserve("default")[0])
+
+
+@override_settings(EMAIL_RATE_LIMITS=RATE_LIMITS)
+class OutboundEmailQueueTest(TestCase):
+    def setUp(self):
+        mailqueue._local_store.clear()
+
+    def make_message(self, n):
+        return EmailMessage(f"subject {n}", "body", to=[f"user{n}@mail.com"])
+
+    def test_lanes_share_sending_proportionally(self):
+        queue = OutboundEmailQueue()
+        order = []
+        for n in range(6):
+            queue.put(
+                self.make_message(n),
+                "high_priority",
+                on_sent=lambda msg: order.append("high"),
+            )
+            queue.put(
+                self.make_message(n),
+                "low_priority",
+                on_sent=lambda msg: order.append("low"),
+            )
+
+        self.assertEqual(queue.flush(), 12)
+
+        self.assertEqual(len(mail.outbox), 12)
+        # веса 3:1 - пока обе очереди не пусты, на 4 письма 3 из high_priority:
+        self.assertEqual(order[:4].count("high"), 3)
+        self.assertEqual(order[:8].count("high"), 6)
+
+
+@override_settings(EMAIL_RATE_LIMITS=RATE_LIMITS)
+class ThrottlingTest(TestCase):
+    def setUp(self):
+        mailqueue._local_store.clear()
+        self.sleep = MagicMock()
+
+    def run_server(self, **kwargs):
+        server = StubSMTPServer(**kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        connection = get_connection(
+            "django.core.mail.backends.smtp.EmailBackend",
+            host=server.host,
+            port=server.port,
+            username="",
+            password="",
+            use_tls=False,
+            timeout=5,
+        )
+        return server, connection
+
+    def fill(self, queue, n):
+        for i in range(n):
+            queue.put(EmailMessage(f"subject {i}", "body", to=[f"u{i}@mail.com"]))
+
+    def assert_throttled_and_delivered(self, code):
+        server, connection = self.run_server(throttle_after=2, throttle_code=code)
+        queue = OutboundEmailQueue(connection=connection, sleep=self.sleep)
+        self.fill(queue, 5)
+
+        self.assertEqual(queue.flush(), 5)
+
+        subjects = [message["Subject"] for _, message in server.messages]
+        self.assertEqual(subjects, [f"subject {i}" for i in range(5)])
+        # скорость снижена и выдержана пауза перед повтором:
+        self.assertLess(mailqueue.get_bucket("localhost").rate, 1000)
+        self.sleep.assert_called()
+
+    @override_settings(EMAIL_HOST="localhost")
+    def test_450_slows_down_and_retries(self):
+        self.assert_throttled_and_delivered(450)
+
+    @override_settings(EMAIL_HOST="localhost")
+    def test_421_reconnects_and_retries(self):
+        self.assert_throttled_and_delivered(421)
+
+    def test_batches_share_connection(self):
+        server, connection = self.run_server()
+        queue = OutboundEmailQueue(connection=connection)
+        self.fill(queue, 7)
+
+        self.assertEqual(queue.flush(), 7)
+
+        self.assertEqual(len(server.messages), 7)
+        # 7 писем пачками по 3 - три сессии smtp:
+        self.assertEqual(server.sessions, 3)
+
+    def test_long_throttling_raises_with_pending_messages(self):
+        server, connection = self.run_server(
+            throttle_after=1, throttle_code=450, throttle_times=1000
+        )
+        queue = OutboundEmailQueue(connection=connection, sleep=self.sleep, max_wait=1)
+        self.fill(queue, 3)
+
+        with self.assertRaises(EmailThrottled) as cm:
+            queue.flush()
+
+        self.assertEqual(len(server.messages), 1)
+        self.assertEqual(cm.exception.pending, 2)
+        self.assertEqual(len(queue), 2)
+
+
+class SendEmailThrottledTest(TestCase):
+    @patch(
+        "authapp.tasks.OutboundEmailQueue.flush",
+        side_effect=EmailThrottled(retry_after=12.4, pending=1),
+    )
+    def test_throttled_email_retried_after_rate_recovers(self, mock_flush):
+        with patch.object(
+            send_email_task, "retry", side_effect=Retry("retry called")
+        ) as mock_retry:
+            with self.assertRaises(Retry):
+                send_email_task(
+                    "register_confirmation",
+                    context={"username": "user", "confirmation_link": "link"},
+                    recipient="user@mail.com",
+                )
+
+        self.assertEqual(mock_retry.call_args.kwargs["countdown"], 12)
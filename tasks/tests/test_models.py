@@ -162,6 +162,36 @@ class CommentModelTests(BaseTaskModelTests):
         """Проверяет строковое представление комментария."""
         self.assertEqual(str(self.comment), f"Comment by {self.user} on {self.task}")
 
+    def test_comment_id_not_set_explicitly(self):
+        """Id комментария выдает только последовательность: на секционированной таблице
+        база не проверяет его уникальность."""
+        comment = Comment(
+            id=self.comment.id, task=self.task, author=self.user, text="x"
+        )
+
+        with self.assertRaises(ValueError):
+            comment.save()
+        with self.assertRaises(ValueError):
+            Comment.objects.bulk_create([comment])
+        with self.assertRaises(ValueError):
+            Comment.objects.create(
+                id=self.comment.id + 1, task=self.task, author=self.user, text="x"
+            )
+
+    def test_comment_ids_from_sequence(self):
+        """Сохранение, обновление и bulk_create без id проходят."""
+        self.comment.text = "edited"
+        self.comment.save()
+        created = Comment.objects.bulk_create(
+            [Comment(task=self.task, author=self.user, text="x") for _ in range(2)]
+        )
+
+        ids = {comment.id for comment in Comment.objects.all()}
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(
+            all(comment.id not in (None, self.comment.id) for comment in created)
+        )
+
 
 class CategoryModelTest(TestCase):
     @classmethod
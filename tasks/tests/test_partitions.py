@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from tasks.partitions import (
+    add_months,
+    create_partition_sql,
+    maintain_comment_partitions,
+    move_from_default_sql,
+    partition_name,
+)
+from tasks.tasks import maintain_partitions
+
+
+class PartitionsTest(TestCase):
+    def test_month_arithmetic_crosses_year(self):
+        start = datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(
+            add_months(start, 2), datetime(2026, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            add_months(start, -11), datetime(2024, 12, 1, tzinfo=timezone.utc)
+        )
+
+    def test_partition_covers_one_month(self):
+        start = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+        self.assertEqual(partition_name(start), "tasks_comment_p2025_12")
+        self.assertEqual(
+            create_partition_sql(start),
+            'CREATE TABLE IF NOT EXISTS "tasks_comment_p2025_12" '
+            'PARTITION OF "tasks_comment" '
+            "FOR VALUES FROM ('2025-12-01T00:00:00+00:00') "
+            "TO ('2026-01-01T00:00:00+00:00')",
+        )
+
+    def test_rows_in_default_moved_to_new_partition(self):
+        start = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+        detach, create, insert, delete, attach = move_from_default_sql(start)
+
+        self.assertEqual(
+            detach,
+            'ALTER TABLE "tasks_comment" DETACH PARTITION "tasks_comment_default"',
+        )
+        self.assertEqual(create, create_partition_sql(start))
+        in_month = (
+            "created_at >= '2025-12-01T00:00:00+00:00' "
+            "AND created_at < '2026-01-01T00:00:00+00:00'"
+        )
+        self.assertEqual(
+            insert,
+            'INSERT INTO "tasks_comment_p2025_12" SELECT * FROM '
+            f'"tasks_comment_default" WHERE {in_month}',
+        )
+        self.assertEqual(
+            delete, f'DELETE FROM "tasks_comment_default" WHERE {in_month}'
+        )
+        self.assertEqual(
+            attach,
+            'ALTER TABLE "tasks_comment" ATTACH PARTITION "tasks_comment_default" '
+            "DEFAULT",
+        )
+
+    def test_maintenance_skipped_without_partitioning(self):
+        # тесты идут на sqlite - секционирования нет:
+        self.assertEqual(maintain_partitions(), ([], []))
+
+    @patch(
+        "tasks.partitions.detach_partitions", return_value=["tasks_comment_p2025_01"]
+    )
+    @patch("tasks.partitions.create_partitions", return_value=[])
+    @patch("tasks.partitions.is_partitioned", return_value=True)
+    def test_detaching_disabled_by_default(self, _, mock_create, mock_detach):
+        now = datetime(2025, 6, 15, tzinfo=timezone.utc)
+
+        maintain_comment_partitions(now)
+        mock_create.assert_called_once_with(
+            now, datetime(2025, 9, 1, tzinfo=timezone.utc)
+        )
+        mock_detach.assert_not_called()
+
+        self.assertEqual(
+            maintain_comment_partitions(now, retention_months=12),
+            ([], ["tasks_comment_p2025_01"]),
+        )
+        mock_detach.assert_called_once_with(12, now)
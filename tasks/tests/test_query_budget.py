@@ -0,0 +1,126 @@
+from datetime import timedelta
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.archive import archive_done_tasks
+from tasks.autocomplete import index
+from tasks.models import Category, Comment, Tag, Task, TaskStatus
+from tasks.tests.test_views import BaseTestCase
+from tasks_project.testing import QueryBudgetMixin, duplicate_queries, query_shape
+
+User = get_user_model()
+
+
+class QueryShapeTests(SimpleTestCase):
+    def test_literals_and_in_lists_are_normalized(self):
+        self.assertEqual(
+            query_shape(
+                "SELECT * FROM t WHERE id = 5 AND name = 'it''s' AND x IN (1, 2)"
+            ),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)",
+        )
+
+    def test_duplicates(self):
+        queries = [{"sql": f"SELECT * FROM t WHERE id = {pk}"} for pk in (1, 2, 3)]
+        queries.append({"sql": "SELECT 1 FROM u"})
+        self.assertEqual(
+            duplicate_queries(queries), [(3, "SELECT * FROM t WHERE id = ?")]
+        )
+
+
+class TaskQueryBudgetTests(QueryBudgetMixin, BaseTestCase):
+    """Число запросов эндпоинтов задач и комментариев не растет с данными."""
+
+    def setUp(self):
+        self.numbers = count(1)
+        self.make_authenticated(self.admin)
+        self.task = self.make_related_task(self.owner)
+
+    def make_related_task(self, owner, **kwargs):
+        """Задача с категорией, двумя тэгами, двумя исполнителями и комментарием."""
+        n = next(self.numbers)
+        task = Task.objects.create(
+            title=f"task {n}",
+            description="description",
+            deadline=kwargs.pop("deadline", timezone.now() + timedelta(days=1)),
+            owner=owner,
+            category=Category.objects.create(name=f"category {n}"),
+            **kwargs,
+        )
+        task.executor.set([self.executor, self.user])
+        task.tags.set(
+            [Tag.objects.create(name=f"tag {n}"), Tag.objects.create(name=f"x {n}")]
+        )
+        Comment.objects.create(task=task, author=self.executor, text="text")
+        return task
+
+    def grow_tasks(self, size, **kwargs):
+        for _ in range(Task.objects.count(), size):
+            self.make_related_task(self.owner, **kwargs)
+
+    def grow_task(self, size):
+        """Исполнители, тэги и комментарии одной задачи."""
+        for n in range(self.task.executor.count(), size):
+            user = User.objects.create_user(username=f"executor {n}")
+            self.task.executor.add(user)
+            self.task.tags.add(Tag.objects.create(name=f"task tag {n}"))
+            Comment.objects.create(task=self.task, author=self.owner, text=str(n))
+
+    def test_task_list(self):
+        url = reverse("task-list")
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_tasks)
+
+    def test_task_list_with_comments_preview_and_facets(self):
+        def grow(size):
+            self.grow_tasks(size)
+            cache.clear()  # фасеты считаются заново на каждом размере
+
+        url = reverse("task-list")
+        params = {
+            "include": "comments_preview",
+            "facets": "status,priority,category,tag",
+        }
+        self.assertQueryBudget(lambda: self.client.get(url, params), grow)
+
+    def test_archived_task_list(self):
+        def grow(size):
+            old = timezone.now() - timedelta(days=60)
+            self.grow_tasks(size + 1, deadline=old, status=TaskStatus.DONE)
+            archive_done_tasks(older_than_days=30, sleep=0)
+
+        url = reverse("task-list")
+        self.assertQueryBudget(lambda: self.client.get(url, {"archived": "true"}), grow)
+
+    def test_task_detail(self):
+        url = reverse("task-detail", args=[self.task.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_task)
+
+    def test_comment_list(self):
+        url = reverse("task-comments-list", args=[self.task.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_task)
+
+    def test_comment_timeline(self):
+        url = reverse("task-comments-timeline", args=[self.task.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_task)
+
+    def test_comment_detail(self):
+        comment = self.task.comments.get()
+        url = reverse("task-comments-detail", args=[self.task.pk, comment.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), self.grow_task)
+
+    def test_autocomplete(self):
+        def grow(size):
+            self.grow_tasks(size)
+            index.clear()  # каждый замер - с загрузкой индекса
+
+        url = reverse("autocomplete")
+        self.assertQueryBudget(
+            lambda: self.client.get(url, {"q": "ta"}),
+            grow,
+            max_queries=3,  # пользователь из куки и загрузка тэгов и категорий
+        )
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.rendering import get_notification_template, task_snapshot
+
+User = get_user_model()
+
+
+class NotificationRenderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username="owner", email="owner@mail.com")
+        cls.task = Task.objects.create(
+            owner=cls.owner,
+            title="Task <b>title</b>",
+            deadline=timezone.now() + timedelta(hours=1),
+        )
+
+    def test_templates_compiled_once_per_process(self):
+        self.assertIs(
+            get_notification_template("notifications/deadline_notification"),
+            get_notification_template("notifications/deadline_notification"),
+        )
+
+    def test_snapshot_does_not_query_db(self):
+        task = Task.objects.get(pk=self.task.pk)
+        with self.assertNumQueries(0):
+            snapshot = task_snapshot(task)
+            render_to_string(
+                "notifications/deadline_notification.html",
+                {"task": snapshot, "username": "user"},
+            )
+        self.assertEqual(snapshot["title"], "Task <b>title</b>")
+
+    def test_shared_rendering_matches_full_rendering(self):
+        """Подстановка получателя дает тот же результат, что и рендеринг с нуля, включая
+        экранирование."""
+        rendered = get_notification_template(
+            "notifications/deadline_notification"
+        ).render_shared({"task": task_snapshot(self.task)})
+
+        for username in ("user1", "O'Brien <script>"):
+            context = {"task": self.task, "username": username}
+            text, html = rendered.for_recipient(username=username)
+            self.assertEqual(
+                text,
+                render_to_string("notifications/deadline_notification.txt", context),
+            )
+            self.assertEqual(
+                html,
+                render_to_string("notifications/deadline_notification.html", context),
+            )
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from tasks.models import Category, Tag
+from tasks.resolvers import GENERATION_KEY, NameResolver, normalize_tag, tag_resolver
+
+
+class NameResolverTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.resolver = NameResolver(Tag, normalize_tag, maxsize=2)
+        self.existing = Tag.objects.create(name="Api")
+
+    def resolve(self, names):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.resolver.resolve(names)
+
+    def test_existing_and_missing_in_two_queries(self):
+        with self.assertNumQueries(3):  # IN, bulk_create, IN по созданным
+            ids = self.resolve([" api", "Drf", "drf", "Celery"])
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[0], self.existing.id)
+        self.assertEqual(
+            list(Tag.objects.filter(id__in=ids).values_list("name", flat=True)),
+            ["Api", "Drf", "Celery"],
+        )
+
+    def test_cached_names_skip_database(self):
+        self.resolve(["Api"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolve(["api"]), [self.existing.id])
+
+    def test_cache_is_bounded(self):
+        self.resolve(["a", "b", "c"])
+
+        self.assertEqual(list(self.resolver._cache), ["B", "C"])
+
+    def test_rolled_back_names_not_cached(self):
+        self.resolver.resolve(["New"])  # on_commit не выполнен - как при откате
+
+        self.assertEqual(self.resolver._cache, {})
+
+    def test_rename_and_delete_invalidate(self):
+        tag_resolver.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            [tag_id] = tag_resolver.resolve(["api"])
+        category = Category.objects.create(name="category")
+
+        self.existing.name = "Rest"
+        self.existing.save()
+        self.assertEqual(tag_resolver._cache, {})
+        self.assertNotEqual(tag_resolver.resolve(["api"]), [tag_id])
+
+        # удаление категории сбрасывает все кэши процесса:
+        self.resolve(["Rest"])
+        category.delete()
+        with self.assertNumQueries(1):
+            self.resolve(["Rest"])
+
+    def test_queryset_update_invalidates(self):
+        self.resolve(["Api"])
+
+        Tag.objects.filter(pk=self.existing.pk).update(name="Rest")
+
+        self.assertEqual(self.resolver._cache, {})
+        self.assertNotEqual(self.resolve(["Api"]), [self.existing.id])
+
+    def test_other_process_bump_seen_after_check_interval(self):
+        self.resolve(["Api"])
+        cache.incr(GENERATION_KEY)  # сброс из другого процесса
+
+        with override_settings(NAME_RESOLVER_CHECK_SECONDS=60):
+            with self.assertNumQueries(0):  # счетчик еще не перечитан
+                self.resolve(["Api"])
+        with override_settings(NAME_RESOLVER_CHECK_SECONDS=0):
+            with self.assertNumQueries(1):
+                self.resolve(["Api"])
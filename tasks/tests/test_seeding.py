@@ -0,0 +1,73 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from tasks.models import Category, Comment, Tag, Task
+from tasks.seeding import DEFAULT_TAGS, BulkSeeder, copy_value
+
+User = get_user_model()
+
+
+class BulkSeederTest(TestCase):
+    def test_seed_all_stages(self):
+        progress = []
+        created = BulkSeeder(
+            batch_size=50, seed=1, progress=lambda *args: progress.append(args)
+        ).seed(users=60, tasks=120, comments=400, tags=20, categories=3)
+
+        self.assertEqual(
+            created,
+            {"users": 60, "tags": 25, "categories": 8, "tasks": 120, "comments": 400},
+        )
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Task.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertIn(("tasks", 120, 120), progress)
+        # у каждой задачи есть исполнитель, создатель - менеджер:
+        self.assertFalse(Task.objects.filter(executor=None).exists())
+        self.assertFalse(Task.objects.exclude(owner__groups__name="manager").exists())
+        # счетчики комментариев пересчитаны:
+        task = Task.objects.order_by("-comments_count").first()
+        self.assertEqual(task.comments_count, task.comments.count())
+
+    def test_skewed_distributions(self):
+        seeder = BulkSeeder(seed=2)
+        seeder.seed(users=50, tasks=300, comments=1000)
+
+        per_task = Counter(Comment.objects.values_list("task_id", flat=True))
+        # популярные задачи обсуждают намного чаще средней:
+        self.assertGreater(per_task.most_common(1)[0][1], 5 * 1000 / 300)
+        tag_usage = Counter(Task.tags.through.objects.values_list("tag_id", flat=True))
+        self.assertGreater(
+            tag_usage.most_common()[0][1], tag_usage.most_common()[-1][1]
+        )
+
+    def test_queries_per_batch_not_per_row(self):
+        seeder = BulkSeeder(batch_size=1000, seed=3)
+        seeder.seed(users=20)
+        seeder.seed_taxonomy()
+
+        # пачка: задачи, исполнители, тэги и savepoint/release - при любом числе строк
+        # (пока sqlite не делит insert по лимиту параметров):
+        for count in (10, 20):
+            with self.assertNumQueries(5):
+                seeder.seed_tasks(count)
+        with self.assertNumQueries(3):
+            seeder.seed_comments(50)
+
+    def test_requires_users(self):
+        with self.assertRaises(ValueError):
+            BulkSeeder().seed_tasks(1)
+
+    def test_defaults_not_duplicated(self):
+        BulkSeeder().seed_taxonomy()
+        BulkSeeder().seed_taxonomy(tags=1)
+
+        self.assertEqual(Tag.objects.count(), len(DEFAULT_TAGS) + 1)
+        self.assertEqual(Category.objects.count(), 5)
+
+    def test_copy_value(self):
+        self.assertEqual(copy_value(None), r"\N")
+        self.assertEqual(copy_value("a\tb\nc\\"), r"a\tb\nc\\")
+        self.assertEqual(copy_value(5), "5")
@@ -8,7 +8,8 @@ from django.core import mail
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from tasks.models import Task
+from authapp.models import UserProfile
+from tasks.models import DeadlineNotificationDelivery, Task
 from tasks.tasks import deadline_notification, left_time
 
 User = get_user_model()
@@ -155,3 +156,108 @@ class TestNotificationTask(APITestCase):
                 ),
                 email.subject,
             )
+
+
+class TestDeadlineDigest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager_group = Group.objects.create(name="manager")
+        user_group = Group.objects.create(name="user")
+        cls.owner = User.objects.create(username="owner", email="owner@mail.com")
+        cls.owner.groups.set([manager_group])
+        cls.executor = User.objects.create(
+            username="executor", email="executor@mail.com"
+        )
+        cls.executor.groups.set([user_group])
+
+        cls.tasks = []
+        for i in range(3):
+            task = Task.objects.create(
+                owner=cls.owner,
+                title=f"digest task{i}",
+                notified=False,
+                deadline=timezone.now() + timedelta(hours=i + 1),
+            )
+            task.executor.set([cls.executor])
+            cls.tasks.append(task)
+
+    def test_digest_groups_tasks_per_recipient(self):
+        """Исполнитель с дайджестом получает одно письмо на все задачи, создатель -
+        письмо на каждую задачу."""
+        UserProfile.objects.update_or_create(
+            user=self.executor, defaults={"deadline_digest": True}
+        )
+
+        deadline_notification()
+
+        executor_emails = [m for m in mail.outbox if m.to == ["executor@mail.com"]]
+        owner_emails = [m for m in mail.outbox if m.to == ["owner@mail.com"]]
+        self.assertEqual(len(executor_emails), 1)
+        self.assertEqual(len(owner_emails), 3)
+        self.assertEqual(executor_emails[0].subject, "Скоро дедлайн задач: 3")
+        for task in self.tasks:
+            self.assertIn(task.title, executor_emails[0].body)
+            task.refresh_from_db()
+            self.assertTrue(task.notified)
+
+    def test_without_digest_email_per_task(self):
+        deadline_notification()
+
+        self.assertEqual(len(mail.outbox), 6)
+
+    @patch(
+        "tasks.tasks.EmailMultiAlternatives.send",
+        side_effect=[None, None, None, Exception("SMTP error")],
+    )
+    def test_failed_recipient_keeps_task_not_notified(self, mock_send):
+        """Задачи помечаются notified только когда уведомлены все получатели."""
+        UserProfile.objects.update_or_create(
+            user=self.owner, defaults={"deadline_digest": True}
+        )
+        with patch.object(
+            deadline_notification, "retry", side_effect=Retry("retry called")
+        ):
+            with self.assertRaises(Retry):
+                deadline_notification()
+
+        # создатель получил дайджест, исполнитель - письма по первым двум задачам:
+        notified = []
+        for task in self.tasks:
+            task.refresh_from_db()
+            notified.append(task.notified)
+        self.assertEqual(notified, [True, True, False])
+
+    def test_retry_skips_recipients_already_notified(self):
+        """Повтор после сбоя smtp шлет письма только тем, кто их не получил."""
+        sent, failed = [], []
+
+        def send(msg, *args, **kwargs):
+            if msg.to == ["executor@mail.com"] and "task2" in msg.subject:
+                if not failed:
+                    failed.append(msg.subject)
+                    raise Exception("SMTP error")
+            sent.append((msg.to[0], msg.subject))
+
+        with patch(
+            "tasks.tasks.EmailMultiAlternatives.send", autospec=True, side_effect=send
+        ):
+            with patch.object(
+                deadline_notification, "retry", side_effect=Retry("retry called")
+            ):
+                with self.assertRaises(Retry):
+                    deadline_notification()
+            first_run = len(sent)
+            # задачи 0 и 1 уведомлены полностью - осталась доставка создателю task2:
+            self.assertEqual(
+                list(DeadlineNotificationDelivery.objects.values_list("user", "task")),
+                [(self.owner.pk, self.tasks[2].pk)],
+            )
+
+            deadline_notification()
+
+        self.assertEqual(first_run, 5)
+        self.assertEqual(sent[first_run:], [("executor@mail.com", failed[0])])
+        for task in self.tasks:
+            task.refresh_from_db()
+            self.assertTrue(task.notified)
+        self.assertFalse(DeadlineNotificationDelivery.objects.exists())
@@ -2,13 +2,18 @@ from datetime import timedelta
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from rest_framework_simplejwt.tokens import AccessToken
 
-from tasks.models import Category, Comment, Tag, Task
+from tasks.archive import archive_done_tasks
+from tasks.models import ArchivedTask, Category, Comment, Tag, Task
 
 User = get_user_model()
 
@@ -624,6 +629,127 @@ class TaskDeleteViewTests(BaseTaskTestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class ArchivedTaskViewTests(BaseTestCase):
+    """?archived=true - архив выполненных задач только для чтения."""
+
+    def setUp(self):
+        old = timezone.now() - timedelta(days=60)
+        self.active = self.make_task(self.owner, self.executor, title="active")
+        self.done = self.make_task(
+            self.owner,
+            self.executor,
+            title="done task",
+            deadline=old,
+            status=3,
+            category=self.category1,
+            tags=self.tag1,
+        )
+        archive_done_tasks(older_than_days=30, sleep=0)
+        self.list_url = reverse("task-list")
+        self.url = reverse("task-detail", args=[self.done.id])
+        self.make_authenticated(self.admin)
+
+    def test_active_list_excludes_archived(self):
+        response = self.client.get(self.list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [task["title"] for task in response.data["results"]]
+        self.assertEqual(titles, ["active"])
+
+    def test_archived_list_and_detail(self):
+        response = self.client.get(self.list_url, {"archived": "true"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [task] = response.data["results"]
+        self.assertEqual(task["title"], "done task")
+        self.assertEqual(task["status"], "done")
+        self.assertEqual(task["category"], "New Category1")
+        self.assertEqual(task["tags"], ["some tag"])
+        self.assertEqual(task["executor"], [self.executor.id])
+
+        response = self.client.get(self.url, {"archived": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], self.done.id)
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+    def test_archived_filters(self):
+        response = self.client.get(
+            self.list_url, {"archived": "true", "search": "done", "tags": "some tag"}
+        )
+        self.assertEqual(len(response.data["results"]), 1)
+
+        response = self.client.get(
+            self.list_url, {"archived": "true", "owner": "manager"}
+        )
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_archived_is_read_only(self):
+        response = self.client.patch(
+            f"{self.url}?archived=true", {"title": "new"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(ArchivedTask.objects.get().title, "done task")
+
+
+@override_settings(COMMENTS_PREVIEW_SIZE=2)
+class TaskCommentsPreviewViewTests(BaseTestCase):
+    """?include=comments_preview - последние комментарии задач страницы."""
+
+    def setUp(self):
+        self.tasks = [
+            self.make_task(self.owner, self.executor, title=f"task {n}")
+            for n in range(3)
+        ]
+        now = timezone.now()
+        for task in self.tasks[:2]:
+            for n in range(3):
+                comment = Comment.objects.create(
+                    task=task, author=self.executor, text=f"{task.title} comment {n}"
+                )
+                Comment.objects.filter(pk=comment.pk).update(
+                    created_at=now + timedelta(minutes=n)
+                )
+        self.list_url = reverse("task-list")
+        self.make_authenticated(self.admin)
+
+    def get_previews(self):
+        response = self.client.get(
+            self.list_url, {"include": "comments_preview", "ordering": "id"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {
+            task["title"]: [c["text"] for c in task["comments_preview"]]
+            for task in response.data["results"]
+        }
+
+    def test_latest_comments_attached(self):
+        self.assertEqual(
+            self.get_previews(),
+            {
+                "task 0": ["task 0 comment 2", "task 0 comment 1"],
+                "task 1": ["task 1 comment 2", "task 1 comment 1"],
+                "task 2": [],
+            },
+        )
+
+    def test_single_query_for_all_tasks(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_previews()
+        comment_queries = [
+            query for query in queries if 'FROM "tasks_comment"' in query["sql"]
+        ]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertIn("ROW_NUMBER", comment_queries[0]["sql"])
+
+    def test_preview_only_on_request(self):
+        response = self.client.get(self.list_url)
+
+        self.assertNotIn("comments_preview", response.data["results"][0])
+
+
 class BaseCommentTestCase(BaseTestCase):
     @classmethod
     def setUpTestData(cls):
@@ -671,6 +797,126 @@ class CommentListViewTests(BaseCommentTestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class CommentTimelineViewTests(BaseCommentTestCase):
+    """Лента комментариев с курсорами по (created_at, id)."""
+
+    def setUp(self):
+        super().setUp()
+        self.timeline_url = reverse(
+            "task-comments-timeline", kwargs={"task_pk": self.task.id}
+        )
+        # одинаковое время у части комментариев - порядок решает id:
+        created_at = timezone.now() - timedelta(hours=1)
+        Comment.objects.filter(pk=self.comment.pk).update(created_at=created_at)
+        for n in range(4):
+            comment = self.make_comment(self.task, self.author, text=f"comment {n}")
+            Comment.objects.filter(pk=comment.pk).update(
+                created_at=created_at + timedelta(minutes=n // 2)
+            )
+        other_task = self.make_task(self.owner, self.executor)
+        self.make_comment(other_task, self.author, text="other task")
+        self.make_authenticated(self.author)
+
+    def read_all(self, params):
+        texts = []
+        response = self.client.get(self.timeline_url, {**params, "page_size": 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            texts += [comment["text"] for comment in response.data["results"]]
+            if not response.data["next"]:
+                return texts, response
+            response = self.client.get(response.data["next"])
+
+    def test_newest_first_by_default(self):
+        texts, _ = self.read_all({})
+
+        self.assertEqual(
+            texts,
+            ["comment 3", "comment 2", "comment 1", "comment 0", "Comment text"],
+        )
+
+    def test_oldest_first(self):
+        texts, _ = self.read_all({"order": "oldest"})
+
+        self.assertEqual(
+            texts,
+            ["Comment text", "comment 0", "comment 1", "comment 2", "comment 3"],
+        )
+
+    def test_new_comment_does_not_shift_pages(self):
+        response = self.client.get(self.timeline_url, {"page_size": 2})
+        self.make_comment(self.task, self.author, text="fresh")
+
+        response = self.client.get(response.data["next"])
+
+        self.assertEqual(
+            [comment["text"] for comment in response.data["results"]],
+            ["comment 1", "comment 0"],
+        )
+
+    def test_since_returns_only_new_comments(self):
+        # since первой страницы - курсор самого нового комментария:
+        since = self.client.get(self.timeline_url, {"page_size": 2}).data["since"]
+
+        self.make_comment(self.task, self.author, text="fresh 1")
+        self.make_comment(self.task, self.author, text="fresh 2")
+        response = self.client.get(self.timeline_url, {"since": since})
+
+        self.assertEqual(
+            [comment["text"] for comment in response.data["results"]],
+            ["fresh 1", "fresh 2"],
+        )
+        response = self.client.get(self.timeline_url, {"since": response.data["since"]})
+        self.assertEqual(response.data["results"], [])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.timeline_url, {"cursor": "broken"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CommentCountersViewTests(BaseCommentTestCase):
+    """Счетчики комментариев задачи обновляются через api."""
+
+    def setUp(self):
+        super().setUp()
+        self.task_url = reverse("task-detail", args=[self.task.id])
+
+    def test_create_and_delete_update_task(self):
+        self.make_authenticated(self.owner)
+        response = self.client.post(self.list_url, self.valid_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        task = self.client.get(self.task_url).data
+        self.assertEqual(task["comments_count"], 1)  # setUp - в обход api
+        self.assertIsNotNone(task["last_activity_at"])
+
+        url = reverse(
+            "task-comments-detail",
+            kwargs={"task_pk": self.task.id, "pk": response.data["id"]},
+        )
+        self.assertEqual(self.client.delete(url).status_code, 204)
+
+        task = self.client.get(self.task_url).data
+        self.assertEqual(task["comments_count"], 0)
+
+    def test_filter_and_order_by_counters(self):
+        quiet = self.make_task(self.owner, self.executor, title="quiet")
+        Task.objects.filter(pk=self.task.pk).update(
+            comments_count=3, last_activity_at=timezone.now()
+        )
+        self.make_authenticated(self.owner)
+        list_url = reverse("task-list")
+
+        response = self.client.get(list_url, {"comments_count_min": 1})
+        self.assertEqual([t["id"] for t in response.data["results"]], [self.task.id])
+
+        response = self.client.get(list_url, {"ordering": "comments_count"})
+        self.assertEqual(
+            [t["id"] for t in response.data["results"]], [quiet.id, self.task.id]
+        )
+
+
 class CommentDetailViewTests(BaseCommentTestCase):
     """Просматривать комментарий могут все авторизованные."""
 
@@ -837,3 +1083,102 @@ class CommentDeleteViewTests(BaseCommentTestCase):
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(Comment.objects.count(), 1)
+
+
+class AutocompleteViewTests(BaseTestCase):
+    url = reverse("autocomplete")
+
+    def setUp(self):
+        from tasks.autocomplete import index
+
+        index.clear()
+        self.addCleanup(index.clear)
+
+    def test_requires_authentication(self):
+        self.assertEqual(
+            self.client.get(self.url, {"q": "new"}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+
+    def test_search_by_substring(self):
+        self.make_authenticated(self.user)
+        response = self.client.get(self.url, {"q": "cat", "type": "category"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["name"] for row in response.data],
+            ["New Category1", "New Category2", "Old Category3"],
+        )
+        response = self.client.get(self.url, {"q": "just", "limit": "x"})
+        self.assertEqual(
+            response.data,
+            [{"type": "tag", "id": self.tag2.id, "name": "just tag", "popularity": 0}],
+        )
+
+
+class TaskFacetsViewTests(BaseTestCase):
+    """?facets= - счетчики задач по текущим фильтрам."""
+
+    def setUp(self):
+        cache.clear()
+        self.first = self.make_task(
+            self.owner, self.executor, category=self.category1, tags=self.tag1
+        )
+        self.first.tags.add(self.tag2)
+        self.make_task(
+            self.owner, self.executor, status=3, category=self.category1, tags=self.tag1
+        )
+        self.make_task(self.owner, self.executor, priority=3, tags=self.tag2)
+        self.list_url = reverse("task-list")
+        self.make_authenticated(self.admin)
+
+    def get_facets(self, params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["facets"]
+
+    def test_counts_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.get_facets({"facets": "status,priority,category,tag"})
+        facet_queries = [q for q in queries if "UNION ALL" in q["sql"]]
+        self.assertEqual(len(facet_queries), 1)
+
+        self.assertEqual(
+            facets,
+            {
+                "status": {"to_do": 2, "done": 1},
+                "priority": {"low": 2, "high": 1},
+                "category": {"New Category1": 2},
+                "tag": {"some tag": 2, "just tag": 2},
+            },
+        )
+
+    def test_counts_follow_filters(self):
+        facets = self.get_facets({"facets": "status,tag", "tags": "some tag"})
+
+        self.assertEqual(facets["status"], {"to_do": 1, "done": 1})
+        self.assertEqual(facets["tag"], {"some tag": 2, "just tag": 1})
+
+    def test_cached_by_filter_signature(self):
+        params = {"facets": "status", "status_display": "to_do"}
+        self.get_facets(params)
+        self.make_task(self.owner, self.executor)
+
+        # другая страница - тот же фильтр, ответ из кэша:
+        self.assertEqual(
+            self.get_facets({**params, "offset": 1})["status"], {"to_do": 2}
+        )
+        self.assertEqual(
+            self.get_facets({"facets": "status"})["status"], {"to_do": 3, "done": 1}
+        )
+
+    def test_unknown_facet(self):
+        response = self.client.get(self.list_url, {"facets": "status,owner"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("facets", response.data)
+
+    def test_without_facets(self):
+        response = self.client.get(self.list_url)
+
+        self.assertNotIn("facets", response.data)
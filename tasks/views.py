@@ -1,21 +1,38 @@
+import logging
+
+from django.db import DatabaseError, transaction
 from django.db.models import DurationField, ExpressionWrapper, F
 from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
-from rest_framework import viewsets
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from tasks.models import Category, Comment, Tag, Task
+from tasks.autocomplete import MODELS as AUTOCOMPLETE_MODELS
+from tasks.autocomplete import autocomplete
+from tasks.counters import comment_added, comments_removed
+from tasks.facets import cached_facets, parse_facets
+from tasks.models import ArchivedTask, Category, Comment, Tag, Task
 from tasks.serializers import (
+    ArchivedTaskSerializer,
     CategorySerializer,
     CommentSerializer,
     TagSerializer,
     TaskSerializer,
 )
+from tasks_project.db import check_database, metrics
 
-from .filters import TaskFilter
+from .filters import ArchivedTaskFilter, TaskFilter
+from .pagination import CommentTimelinePagination
 from .permissions import CommentPermission, TaskPermission
+from .previews import attach_comments_preview
+
+logger = logging.getLogger("db_connections")
 
 
 @extend_schema_view(
@@ -32,11 +49,15 @@ from .permissions import CommentPermission, TaskPermission
             "- `owner`: имя автора задачи\n"
             "- `tags`: название тега (можно несколько)\n"
             "- `search`: поик по частичному совпадению (по заголовку, "
-            "описанию и т.п.)\n\n"
+            "описанию и т.п.)\n"
+            "- `comments_count_min`, `comments_count_max`: число комментариев\n"
+            "- `last_activity_after`, `last_activity_before`: время последнего "
+            "комментария\n\n"
             "### Сортировка (`?ordering=`):\n"
             "- `urgency`: задачи с ближайшими дедлайнами первыми\n"
             "- `-urgency`: задачи с отдалёнными дедлайнами первыми\n"
-            "- `priority`, `deadline`, `status`\n\n"
+            "- `priority`, `deadline`, `status`, `comments_count`, "
+            "`last_activity_at`\n\n"
             "Можно указывать несколько полей: `?ordering=priority,-urgency,"
             "status,deadline`\n\n"
             "### Примеры:\n"
@@ -70,12 +91,20 @@ from .permissions import CommentPermission, TaskPermission
                 location=OpenApiParameter.QUERY,
                 description="Фильтрация задач по имени создателя.",
             ),
+            OpenApiParameter(
+                name="facets",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Счетчики задач по текущим фильтрам в поле `facets` "
+                "ответа: `status`, `priority`, `category`, `tag` через запятую.",
+            ),
             OpenApiParameter(
                 name="ordering",
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
                 description="Сортировка задач по полям: `urgency`, `priority`, "
-                "`status`, `deadline`. С возможностью комбинировать.",
+                "`status`, `deadline`, `comments_count`, `last_activity_at`. "
+                "С возможностью комбинировать.",
             ),
             OpenApiParameter(
                 name="status_display",
@@ -118,11 +147,35 @@ from .permissions import CommentPermission, TaskPermission
                 description="Фильтрация задач по частичному совпадению в названии, "
                 "описании, комментарии, теге или категории.",
             ),
+            OpenApiParameter(
+                name="archived",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="`true` - список архивных (выполненных и перенесенных "
+                "в архив) задач, только для чтения.",
+            ),
+            OpenApiParameter(
+                name="include",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=["comments_preview"],
+                description="`comments_preview` - добавить к каждой задаче "
+                "последние комментарии (`COMMENTS_PREVIEW_SIZE`).",
+            ),
         ],
     ),
     retrieve=extend_schema(
         summary="Получение задачи по ID",
-        description="Возвращает задачу по её идентификатору.",
+        description="Возвращает задачу по её идентификатору; с `?archived=true` - "
+        "архивную задачу.",
+        parameters=[
+            OpenApiParameter(
+                name="archived",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="`true` - искать задачу в архиве.",
+            ),
+        ],
     ),
     create=extend_schema(
         summary="Создание задачи",
@@ -146,17 +199,71 @@ class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [TaskPermission]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_class = TaskFilter
-    ordering_fields = ["deadline", "urgency", "priority", "status"]
+    ordering_fields = [
+        "deadline",
+        "urgency",
+        "priority",
+        "status",
+        "comments_count",
+        "last_activity_at",
+    ]
     ordering = ["urgency"]  # по умолчанию — срочные сверху
     # /api/tasks/?ordering=urgency	срочные первыми
     # /api/tasks/?ordering=-urgency	 cначала задачи с дальним дедлайном
     # /api/tasks/?ordering=priority,-urgency  cначала по приоритету, потом по срочности
 
+    @property
+    def archived(self):
+        """?archived=true - чтение архива выполненных задач (tasks.archive)."""
+        request = getattr(self, "request", None)
+        return request is not None and request.query_params.get("archived") in (
+            "true",
+            "1",
+        )
+
+    @property
+    def filterset_class(self):
+        return ArchivedTaskFilter if self.archived else TaskFilter
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # архив только для чтения:
+        if self.archived and request.method not in permissions.SAFE_METHODS:
+            raise MethodNotAllowed(request.method)
+
+    def get_serializer_class(self):
+        return ArchivedTaskSerializer if self.archived else TaskSerializer
+
+    def list(self, request, *args, **kwargs):
+        # ?facets=status,priority,category,tag - счетчики по текущим фильтрам:
+        facets = parse_facets(request.query_params.get("facets"))
+        response = super().list(request, *args, **kwargs)
+        if facets and isinstance(response.data, dict):
+            queryset = self.filter_queryset(self.get_queryset())
+            response.data["facets"] = cached_facets(
+                queryset, facets, request.query_params
+            )
+        return response
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # ?include=comments_preview - последние комментарии задач страницы
+        # одним запросом:
+        includes = self.request.query_params.get("include", "").split(",")
+        if page is not None and "comments_preview" in includes:
+            attach_comments_preview(page)
+        return page
+
     def get_queryset(self):
-        return Task.objects.annotate(
-            urgency=ExpressionWrapper(
-                F("deadline") - now(), output_field=DurationField()
+        model = ArchivedTask if self.archived else Task
+        # категория, исполнители и тэги для сериализатора - без запросов на задачу:
+        return (
+            model.objects.select_related("category")
+            .prefetch_related("executor", "tags")
+            .annotate(
+                urgency=ExpressionWrapper(
+                    F("deadline") - now(), output_field=DurationField()
+                )
             )
         )
 
@@ -173,13 +280,69 @@ class CommentViewSet(viewsets.ModelViewSet):
         # task_pk-ключ кот исп drf-nested-routers на основе lookup='task' урла
         # поле task — это ForeignKey, а в базе оно хранится как task_id
 
+    @extend_schema(
+        summary="Лента комментариев задачи",
+        description=(
+            "Комментарии задачи постранично по курсору `(created_at, id)`: "
+            "страницы не съезжают при добавлении новых комментариев.\n\n"
+            "- `order`: `newest` (по умолчанию) или `oldest`\n"
+            "- `cursor`: продолжение из ссылки `next`\n"
+            "- `since`: значение `since` из предыдущего ответа (или дата ISO) - "
+            "только более новые комментарии, от старых к новым"
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="order",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=["newest", "oldest"],
+                description="Направление ленты.",
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Курсор следующей страницы.",
+            ),
+            OpenApiParameter(
+                name="since",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Только комментарии новее курсора или даты.",
+            ),
+            OpenApiParameter(
+                name="page_size",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Размер страницы (до 100).",
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        pagination_class=CommentTimelinePagination,
+    )
+    def timeline(self, request, task_pk=None):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def perform_create(self, serializer):
         # автоматически привязываю задачу и автора:
         # task = Task.objects.get(id=self.kwargs['task_pk'])
         task = getattr(self, "task", None) or Task.objects.get(
             id=self.kwargs["task_pk"]
         )
-        serializer.save(task=task)  # author=self.request.user,
+        # комментарий и счетчики задачи - в одной транзакции:
+        with transaction.atomic():
+            comment = serializer.save(task=task)  # author=self.request.user,
+            comment_added(comment)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            comments_removed([instance.task_id])
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -192,3 +355,61 @@ class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [TaskPermission]
+
+
+@extend_schema(
+    summary="Подсказки имен тэгов и категорий",
+    description=(
+        "Сначала имена, начинающиеся с `q`, затем содержащие `q`; внутри - по "
+        "числу задач с тэгом/категорией."
+    ),
+    parameters=[
+        OpenApiParameter(name="q", type=OpenApiTypes.STR, description="Начало имени"),
+        OpenApiParameter(
+            name="type",
+            type=OpenApiTypes.STR,
+            enum=list(AUTOCOMPLETE_MODELS),
+            description="Только тэги или только категории",
+        ),
+        OpenApiParameter(name="limit", type=OpenApiTypes.INT, description="До 50"),
+    ],
+)
+class AutocompleteView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        kind = request.query_params.get("type")
+        kinds = [kind] if kind in AUTOCOMPLETE_MODELS else None
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_limit))
+        return Response(autocomplete(request.query_params.get("q", ""), kinds, limit))
+
+
+@extend_schema(
+    summary="Проверка соединения с бд",
+    description=(
+        "`SELECT 1` через соединение процесса: 200 и время ответа или 503. "
+        "Администраторам - метрики постоянного соединения процесса (пула нет): "
+        "pid, uptime_s, checkouts, opened, reused, reconnects, reuse_ratio, "
+        "connection_age_s, conn_max_age, health_checks."
+    ),
+)
+class DatabaseHealthView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            data = {"status": "ok", "latency_ms": check_database()}
+            code = 200
+        except DatabaseError as error:
+            # эндпоинт открытый - текст ошибки (хост, пользователь бд) только в лог
+            logger.error(f"[HEALTH] Database unavailable: {error}")
+            data = {"status": "unavailable"}
+            code = 503
+        if request.user.is_staff:
+            data["connections"] = metrics.snapshot()
+        return Response(data, status=code)
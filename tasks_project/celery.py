@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import task_prerun, worker_process_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tasks_project.settings")
 
@@ -11,6 +12,29 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+# соединения с бд в процессах prefork (tasks_project.db):
+@worker_process_init.connect
+def drop_parent_connections(**kwargs):
+    # соединения родителя забываются без close(), который оборвал бы его сессию:
+    from tasks_project.db import drop_inherited_connections
+
+    drop_inherited_connections()
+
+
+@task_prerun.connect
+def count_connection_checkout(**kwargs):
+    from tasks_project.db import metrics
+
+    metrics.checkout()
+
+
+@worker_process_shutdown.connect
+def log_connection_metrics(**kwargs):
+    from tasks_project.db import logger, metrics
+
+    logger.info(f"[CELERY WORKER EXIT] {metrics.snapshot()}")
+
+
 # @app.task(bind=True, ignore_result=True)
 # def debug_task(self):
 #     print(f'Request: {self.request!r}')redis
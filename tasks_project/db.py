@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("db_connections")
+
+# соединения, унаследованные при fork: ссылки держу, чтобы сборщик мусора не закрыл
+# их в дочернем процессе - закрытие шлет серверу Terminate по сокету родителя
+_inherited = []
+
+
+class ConnectionMetrics:
+    """Счетчики соединений с бд одного процесса (воркер gunicorn или celery).
+
+    checkout - начало запроса или задачи; reused - на checkout уже было открытое
+    соединение; reconnects - такое соединение не прошло проверку CONN_HEALTH_CHECKS
+    при первом запросе и было открыто заново. соединения старше CONN_MAX_AGE
+    закрывает close_old_connections еще до checkout - они не попадают ни в reused,
+    ни в reconnects, только в opened.
+    """
+
+    def __init__(self, alias=DEFAULT_DB_ALIAS, clock=time.monotonic):
+        self.alias = alias
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.pid = os.getpid()
+            self.started_at = self.clock()
+            self.opened = 0
+            self.checkouts = 0
+            self.reused = 0
+            self.reconnects = 0
+            self.opened_at = None
+
+    def checkout(self):
+        connection = connections[self.alias]
+        is_open = connection.connection is not None
+        self.local.open_at_checkout = is_open
+        with self.lock:
+            self.checkouts += 1
+            self.reused += is_open
+
+    def connection_created(self, connection):
+        if connection.alias != self.alias:
+            return
+        with self.lock:
+            self.opened += 1
+            self.opened_at = self.clock()
+            if getattr(self.local, "open_at_checkout", False):
+                self.reconnects += 1
+        self.local.open_at_checkout = False
+
+    def snapshot(self):
+        connection = connections[self.alias]
+        with self.lock:
+            now = self.clock()
+            data = {
+                "pid": self.pid,
+                "uptime_s": round(now - self.started_at, 1),
+                "checkouts": self.checkouts,
+                "opened": self.opened,
+                "reused": self.reused,
+                "reconnects": self.reconnects,
+                "reuse_ratio": (
+                    round(self.reused / self.checkouts, 3) if self.checkouts else 0.0
+                ),
+                "connection_age_s": (
+                    round(now - self.opened_at, 1)
+                    if self.opened_at is not None and connection.connection is not None
+                    else None
+                ),
+                "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+                "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            }
+        return data
+
+
+metrics = ConnectionMetrics()
+
+
+def _on_request_started(sender, **kwargs):
+    metrics.checkout()
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    metrics.connection_created(connection)
+
+
+request_started.connect(_on_request_started, dispatch_uid="db_metrics_checkout")
+connection_created.connect(_on_connection_created, dispatch_uid="db_metrics_created")
+
+
+def drop_inherited_connections():
+    """После fork: забывает соединения родителя, не закрывая их.
+
+    close() в дочернем процессе оборвал бы сессию родителя на том же сокете. дочерний
+    процесс откроет свои соединения при первом запросе.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            _inherited.append(connection.connection)
+            connection.connection = None
+            connection.close_at = None
+    metrics.reset()
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """SELECT 1 через текущее соединение: время ответа в мс или исключение."""
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return round((time.perf_counter() - started) * 1000, 2)
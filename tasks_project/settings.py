@@ -118,11 +118,17 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # соединение живет между запросами и задачами celery DB_CONN_MAX_AGE секунд
+        # (0 - новое на каждый запрос) и проверяется перед первым использованием
+        # в запросе/задаче; метрики - tasks_project.db
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
     }
 }
 
-# Если запускаются тесты, меняем базу данных на SQLite (in-memory)
-if "test" in sys.argv:
+# Если запускаются тесты, меняем базу данных на SQLite (in-memory);
+# DJANGO_USE_SQLITE=True - то же без тестов (микробенчмарки benchmarks/)
+if "test" in sys.argv or os.getenv("DJANGO_USE_SQLITE") == "True":
     DATABASES["default"] = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",  # Используем in-memory базу данных для тестов
@@ -230,6 +236,24 @@ EMAIL_HOST_USER = os.getenv(
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# ограничение исходящей почты (tasks.mailqueue) - token bucket на smtp-провайдера
+# (ключ - EMAIL_HOST, "default" для остальных) в каждом процессе воркера:
+EMAIL_RATE_LIMITS = {
+    "default": {
+        "rate": float(os.getenv("EMAIL_RATE_PER_SECOND", 10)),  # писем в секунду
+        "burst": int(os.getenv("EMAIL_RATE_BURST", 20)),
+        "batch_size": int(os.getenv("EMAIL_BATCH_SIZE", 50)),  # писем на соединение
+    },
+}
+# доли очередей celery в лимите провайдера:
+EMAIL_QUEUE_WEIGHTS = {"high_priority": 3, "default": 2, "low_priority": 1}
+# сколько секунд задача может ждать токены, прежде чем уйти на повтор:
+EMAIL_QUEUE_MAX_WAIT = int(os.getenv("EMAIL_QUEUE_MAX_WAIT", 60))
+# outbox писем (authapp.OutboxEmail): сколько писем relay передает в celery за раз
+# и сколько дней хранятся уже переданные (чистит authapp.tasks.purge_outbox_emails):
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 100))
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", 7))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Your Project API",
     "DESCRIPTION": "Your project description",
@@ -246,6 +270,59 @@ CELERY_BEAT_SCHEDULER = os.getenv("CELERY_BEAT_SCHEDULER")
 CELERY_ENABLE_UTC = os.getenv("CELERY_ENABLE_UTC")
 CELERY_TIMEZONE = os.getenv("CELERY_TIMEZONE")
 
+# общий кэш веба и воркеров celery (токены подтверждения почты, фасеты, счетчик
+# сброса кэшей имен tasks.resolvers); без CACHE_URL и на sqlite (тесты) - кэш
+# в памяти процесса, который другие процессы не видят
+if os.getenv("CACHE_URL") and DATABASES["default"]["ENGINE"].endswith("postgresql"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("CACHE_URL"),
+        }
+    }
+
+# аренда периодических задач (tasks.locks): через сколько секунд аренда упавшего
+# воркера считается просроченной; живой воркер продлевает ее каждые ttl/3 секунд
+PERIODIC_TASK_LEASE_TTL = int(os.getenv("PERIODIC_TASK_LEASE_TTL", 120))
+
+# удаление пачками (tasks.deletion): строк в пачке и пауза между пачками в секундах
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", 500))
+DELETION_BATCH_SLEEP = float(os.getenv("DELETION_BATCH_SLEEP", 0.1))
+# архивация (tasks.archive): выполненные задачи с дедлайном старше N дней
+# переносятся в архивные таблицы пачками по TASK_ARCHIVE_BATCH_SIZE
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", 30))
+TASK_ARCHIVE_BATCH_SIZE = int(os.getenv("TASK_ARCHIVE_BATCH_SIZE", 200))
+# секции комментариев на postgres (tasks.partitions): на сколько месяцев вперед
+# создавать секции и через сколько месяцев отсоединять старые (0 - не отсоединять)
+COMMENT_PARTITIONS_AHEAD = int(os.getenv("COMMENT_PARTITIONS_AHEAD", 3))
+COMMENT_PARTITION_RETENTION_MONTHS = int(
+    os.getenv("COMMENT_PARTITION_RETENTION_MONTHS", 0)
+)
+# сколько последних комментариев отдавать в /api/tasks/?include=comments_preview
+COMMENTS_PREVIEW_SIZE = int(os.getenv("COMMENTS_PREVIEW_SIZE", 3))
+# сколько пар имя -> id тэгов и категорий держит кэш процесса (tasks.resolvers)
+NAME_RESOLVER_CACHE_SIZE = int(os.getenv("NAME_RESOLVER_CACHE_SIZE", 1024))
+# раз во сколько секунд процесс сверяет счетчик сброса этого кэша в CACHES
+NAME_RESOLVER_CHECK_SECONDS = float(os.getenv("NAME_RESOLVER_CHECK_SECONDS", 1))
+# подсказки имен (tasks.autocomplete): memory - индекс в памяти процесса,
+# database - запросы по trigram-индексам (только postgres держит их быстро)
+AUTOCOMPLETE_BACKEND = os.getenv("AUTOCOMPLETE_BACKEND", "memory")
+# раз во сколько секунд индекс в памяти перечитывается из бд целиком
+AUTOCOMPLETE_REFRESH_SECONDS = int(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", 300))
+# сколько секунд кэшируются счетчики ?facets= списка задач (tasks.facets)
+FACETS_CACHE_TTL = int(os.getenv("FACETS_CACHE_TTL", 30))
+# начиная со скольких строк админка берет оценку числа задач из статистики
+# postgres вместо COUNT(*) (tasks.pagination.EstimatedCountPaginator)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", 100_000)
+)
+# фоновые действия админки (tasks.jobs): объектов в одной транзакции
+ADMIN_JOB_BATCH_SIZE = int(os.getenv("ADMIN_JOB_BATCH_SIZE", 500))
+# через сколько секунд без новой пачки выполняемое задание считается брошенным
+ADMIN_JOB_STALE_SECONDS = int(os.getenv("ADMIN_JOB_STALE_SECONDS", 900))
+# генерация тестовых данных (tasks.seeding): строк в одной пачке записи
+SEEDING_BATCH_SIZE = int(os.getenv("SEEDING_BATCH_SIZE", 5000))
+
 
 # чтобы не тянуть логи в гит:
 # создаю папку logs/ если её нет:
@@ -285,12 +362,36 @@ LOGGING = {
             "formatter": "verbose",
             "filename": get_log_path("cleanup_tasks.log"),
         },
+        "email_file": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "formatter": "verbose",
+            "filename": get_log_path("email_queue.log"),
+        },
+        "periodic_file": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "formatter": "verbose",
+            "filename": get_log_path("periodic_tasks.log"),
+        },
+        "db_file": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "formatter": "verbose",
+            "filename": get_log_path("db_connections.log"),
+        },
         "fixtures_file": {
             "level": "INFO",
             "class": "logging.FileHandler",
             "formatter": "verbose",
             "filename": get_log_path("data_fixtures.log"),
         },
+        "autocomplete_file": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "formatter": "verbose",
+            "filename": get_log_path("autocomplete.log"),
+        },
     },
     "loggers": {
         "auth_tasks": {
@@ -308,10 +409,30 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "email_queue": {
+            "handlers": ["email_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "periodic_tasks": {
+            "handlers": ["periodic_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
         "data_fixtures": {
             "handlers": ["fixtures_file"],
             "level": "INFO",
             "propagate": False,
         },
+        "db_connections": {
+            "handlers": ["db_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "autocomplete": {
+            "handlers": ["autocomplete_file"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
@@ -0,0 +1,80 @@
+import re
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# литералы в sql -> "?", чтобы запросы N+1 с разными id совпадали по форме:
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r"\((?:\?, )+\?\)")
+
+
+def query_shape(sql):
+    """Sql без значений: WHERE id = 5 и WHERE id = 7 - одна форма."""
+    return IN_LISTS.sub("(...)", LITERALS.sub("?", sql))
+
+
+def duplicate_queries(queries):
+    """Формы запросов, выполненные больше одного раза: [(число, форма)]."""
+    shapes = Counter(query_shape(query["sql"]) for query in queries)
+    return [(count, shape) for shape, count in shapes.most_common() if count > 1]
+
+
+class QueryBudgetMixin:
+    """Проверки числа запросов для тестов api (APITestCase).
+
+    assertQueryBudget прогоняет запрос на наборах данных растущего размера и требует,
+    чтобы число запросов не зависело от размера (нет N+1); в сообщении об ошибке - число
+    запросов по размерам и повторяющиеся формы запросов.
+    """
+
+    budget_sizes = (1, 5, 10)
+    budget_database = DEFAULT_DB_ALIAS
+
+    def capture_queries(self, request):
+        """Выполняет request() и возвращает (ответ, список запросов)."""
+        with CaptureQueriesContext(connections[self.budget_database]) as context:
+            response = request()
+        status_code = getattr(response, "status_code", None)
+        if status_code is not None and status_code >= 400:
+            self.fail(f"Request failed with status {status_code}: {response.data}")
+        return response, context.captured_queries
+
+    def query_report(self, counts, queries):
+        lines = [
+            "queries by dataset size: "
+            + ", ".join(f"{size}: {count}" for size, count in counts.items())
+        ]
+        duplicates = duplicate_queries(queries)
+        if duplicates:
+            lines.append("repeated queries at the largest size:")
+            lines += [f"  {count} x {shape}" for count, shape in duplicates]
+        return "\n".join(lines)
+
+    def assertQueryBudget(
+        self,
+        request,
+        grow,
+        sizes=None,
+        max_queries=None,
+        allow_duplicates=True,
+    ):
+        """grow(size) доводит данные до size объектов, request() - запрос к api.
+
+        max_queries - верхняя граница числа запросов, allow_duplicates=False
+        запрещает повторяющиеся формы запросов; возвращает {size: число запросов}.
+        """
+        counts, queries = {}, []
+        for size in sizes or self.budget_sizes:
+            grow(size)
+            _, queries = self.capture_queries(request)
+            counts[size] = len(queries)
+
+        report = self.query_report(counts, queries)
+        if len(set(counts.values())) > 1:
+            self.fail(f"Query count grows with the dataset.\n{report}")
+        if max_queries is not None and max(counts.values()) > max_queries:
+            self.fail(f"More than {max_queries} queries.\n{report}")
+        if not allow_duplicates and duplicate_queries(queries):
+            self.fail(f"Repeated queries.\n{report}")
+        return counts
@@ -29,7 +29,9 @@ from authapp.views import (
     UserViewSet,
 )
 from tasks.views import (
+    AutocompleteView,
     CommentViewSet,
+    DatabaseHealthView,
     TaskViewSet,
 )
 
@@ -51,6 +53,8 @@ urlpatterns = [
     path("", include(router.urls)),
     path("api/auth/", include("authapp.urls")),
     path("", include(comments_router.urls)),
+    path("autocomplete/", AutocompleteView.as_view(), name="autocomplete"),
+    path("health/db/", DatabaseHealthView.as_view(), name="health-db"),
     # path('tasks/', include('tasks.urls')),
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     path(